@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('published', True)), fields=['-created_at'], name='article_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', 'parent', 'created_at'], name='comment_article_parent_idx'),
+        ),
+    ]
@@ -2,7 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.utils.text import slugify
 from django.urls import reverse
-import markdown
+from wellnessapp.markdown_cache import invalidate_markdown, render_markdown
 
 
 class Article(models.Model):
@@ -30,13 +30,20 @@ class Article(models.Model):
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['slug']),
+            models.Index(fields=['-created_at'], condition=models.Q(published=True), name='article_published_idx'),
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # None when content is deferred, so any assignment counts as a change
+        self._original_content = self.__dict__.get('content')
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        """Auto-generate slug from title if not provided"""
+        """Auto-generate slug from title if not provided and refresh the rendered HTML"""
+        adding = self._state.adding
         if not self.slug:
             base_slug = slugify(self.title)
             slug = base_slug
@@ -47,21 +54,19 @@ class Article(models.Model):
             self.slug = slug
         super().save(*args, **kwargs)
 
+        # New articles are rendered too, their content matches _original_content
+        if 'content' not in self.get_deferred_fields() and (adding or self.content != self._original_content):
+            if self._original_content not in (None, self.content):
+                invalidate_markdown(self._original_content)
+            render_markdown(self.content)
+            self._original_content = self.content
+
     def get_absolute_url(self):
         return reverse('blog:article_detail', kwargs={'slug': self.slug})
 
     def get_content_html(self):
-        """Convert markdown content to HTML"""
-        md = markdown.Markdown(
-            extensions=[
-                'markdown.extensions.fenced_code',
-                'markdown.extensions.tables',
-                'markdown.extensions.nl2br',
-                'markdown.extensions.sane_lists',
-            ],
-            output_format='html5'
-        )
-        return md.convert(self.content)
+        """Convert markdown content to HTML (cached by content hash)"""
+        return render_markdown(self.content)
 
     def get_content_preview(self, max_length=200):
         """Get plain text preview of content"""
@@ -117,6 +122,8 @@ class Comment(models.Model):
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['article', 'created_at']),
+            # Top-level comments of an article
+            models.Index(fields=['article', 'parent', 'created_at'], name='comment_article_parent_idx'),
         ]
 
     def __str__(self):
@@ -1,3 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Article, Comment
+
+
+User = get_user_model()
+
+
+class ArticleDetailTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader', password='pass12345')
+        cls.article = Article.objects.create(title='Breathing', content='Breathe in, breathe out', author=cls.user)
+
+    def add_thread(self):
+        """A comment with replies three levels deep, each liked"""
+        parent = None
+        for _ in range(4):
+            parent = Comment.objects.create(article=self.article, user=self.user, content='Nice', parent=parent)
+            parent.likes.add(self.user)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('blog:article_detail', args=[self.article.slug]))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_comment_tree_queries_do_not_grow(self):
+        self.client.force_login(self.user)
+        self.add_thread()
+        first, _ = self.count_queries()
+
+        for _ in range(3):
+            self.add_thread()
+        second, response = self.count_queries()
+
+        self.assertEqual(first, second)
+        self.assertContains(response, reverse('blog:post_comment', args=[self.article.slug]), count=13)
@@ -3,16 +3,36 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponseForbidden
 from django.views.decorators.http import require_POST
-from django.db.models import Count, Q
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Prefetch
+from wellnessapp.search import search
 from .models import Article, Comment
 from .forms import ArticleForm, CommentForm
 
 
+# Replies can be nested this deep (see blog/comment.html)
+MAX_COMMENT_DEPTH = 3
+
+
 def is_admin_user(user):
     """Check if user is admin or superuser"""
     return user.is_superuser or user.is_admin
 
 
+def get_comment_prefetches(depth=MAX_COMMENT_DEPTH):
+    """
+    Likes and replies of comments and of their replies down to ``depth``
+    levels, so rendering the comment tree needs one query per level.
+    """
+    likers = get_user_model().objects.only('id')
+    lookups = []
+    for level in range(depth + 1):
+        prefix = 'replies__' * level
+        lookups.append(Prefetch(f'{prefix}likes', queryset=likers))
+        lookups.append(Prefetch(f'{prefix}replies', queryset=Comment.objects.select_related('user')))
+    return lookups
+
+
 def article_list(request):
     """
     Display list of all published articles
@@ -20,13 +40,11 @@ def article_list(request):
     """
     articles = Article.objects.filter(published=True).select_related('author')
 
-    # Search functionality
+    # Full-text search, ordered by relevance with highlighted snippets
     search_query = request.GET.get('search', '')
     if search_query:
-        articles = articles.filter(
-            Q(title__icontains=search_query) |
-            Q(content__icontains=search_query)
-        )
+        results = search('article', search_query)
+        articles = results.attach(list(results.filter(articles)))
 
     context = {
         'articles': articles,
@@ -47,7 +65,7 @@ def article_detail(request, slug):
     )
 
     # Get all comments (only top-level, replies are nested)
-    comments = article.comments.filter(parent=None).select_related('user').prefetch_related('replies__user')
+    comments = article.comments.filter(parent=None).select_related('user').prefetch_related(*get_comment_prefetches())
 
     # Comment form for logged-in users
     comment_form = CommentForm() if request.user.is_authenticated else None
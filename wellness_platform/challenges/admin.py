@@ -4,11 +4,11 @@ from .models import Challenge, UserChallenge, DailyCheckIn, ChallengeBadge
 
 @admin.register(Challenge)
 class ChallengeAdmin(admin.ModelAdmin):
-    list_display = ['title', 'difficulty', 'goal_type', 'duration_days', 'is_active', 'is_featured', 'get_participant_count', 'created_at']
+    list_display = ['title', 'difficulty', 'goal_type', 'duration_days', 'is_active', 'is_featured', 'participant_count', 'created_at']
     list_filter = ['difficulty', 'goal_type', 'is_active', 'is_featured', 'tracking_type']
     search_fields = ['title', 'description', 'daily_requirement']
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ['created_at', 'updated_at', 'get_participant_count', 'get_completion_rate']
+    readonly_fields = ['created_at', 'updated_at', 'participant_count', 'completed_count', 'get_completion_rate']
 
     fieldsets = (
         ('Basic Information', {
@@ -28,7 +28,7 @@ class ChallengeAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Metadata', {
-            'fields': ('created_by', 'created_at', 'updated_at', 'get_participant_count', 'get_completion_rate'),
+            'fields': ('created_by', 'created_at', 'updated_at', 'participant_count', 'completed_count', 'get_completion_rate'),
             'classes': ('collapse',)
         }),
     )
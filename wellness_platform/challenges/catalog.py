@@ -0,0 +1,132 @@
+"""
+Cached challenge catalog for the explore page.
+
+The catalog only changes when an admin edits a challenge, so three kinds
+of cache entries serve browsing without queries:
+
+* facet counts of active challenges per difficulty, goal type and duration
+* the ordered ids matching each filter combination (plus search snippets)
+* each challenge, so a page is one ``get_many`` away
+
+Every key carries the catalog version, which is replaced once a save or
+delete of a ``Challenge`` commits. Participant counters are bumped with
+queryset updates that skip those signals, so cards may show counts up to
+``CATALOG_TIMEOUT`` old; joining still checks the real count.
+"""
+import hashlib
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+
+CATALOG_TIMEOUT = 5 * 60
+PAGE_SIZE = 10
+
+VERSION_KEY = 'challenges:catalog:version'
+
+# Duration filter buckets, in days
+DURATION_BUCKETS = {
+    'short': Q(duration_days__lte=7),
+    'medium': Q(duration_days__gt=7, duration_days__lte=21),
+    'long': Q(duration_days__gt=21),
+}
+
+
+def get_catalog_version():
+    return cache.get_or_set(VERSION_KEY, lambda: uuid4().hex, timeout=None)
+
+
+def invalidate_catalog():
+    """Orphan every cached catalog entry; they expire on their own"""
+    cache.set(VERSION_KEY, uuid4().hex, timeout=None)
+
+
+def get_cache_key(version, *parts):
+    return ':'.join(['challenges:catalog', version, *map(str, parts)])
+
+
+def get_facets():
+    """Active challenge counts per difficulty, goal type and duration bucket, from one query"""
+    from .models import Challenge
+
+    key = get_cache_key(get_catalog_version(), 'facets')
+    facets = cache.get(key)
+    if facets is None:
+        groups = {
+            'difficulty': {value: Q(difficulty=value) for value, _ in Challenge.DIFFICULTY_CHOICES},
+            'goal_type': {value: Q(goal_type=value) for value, _ in Challenge.GOAL_TYPE_CHOICES},
+            'duration': DURATION_BUCKETS,
+        }
+        counts = Challenge.objects.filter(is_active=True).aggregate(total=Count('id'), **{
+            f'{group}__{value}': Count('id', filter=condition)
+            for group, conditions in groups.items()
+            for value, condition in conditions.items()
+        })
+        facets = {'total': counts['total']}
+        for group, conditions in groups.items():
+            facets[group] = {value: counts[f'{group}__{value}'] for value in conditions}
+        cache.set(key, facets, timeout=CATALOG_TIMEOUT)
+    return facets
+
+
+def filter_catalog(queryset, difficulty='', goal_type='', duration=''):
+    if difficulty:
+        queryset = queryset.filter(difficulty=difficulty)
+    if goal_type:
+        queryset = queryset.filter(goal_type=goal_type)
+    if duration in DURATION_BUCKETS:
+        queryset = queryset.filter(DURATION_BUCKETS[duration])
+    return queryset
+
+
+def get_matches(difficulty='', goal_type='', duration='', search=''):
+    """
+    ``{'ids', 'snippets'}`` of the active challenges matching the filters.
+
+    Ids are in catalog order, or by relevance when searching; snippets
+    are the highlighted search snippets by id.
+    """
+    from wellnessapp.search import parse_terms, search as search_documents
+    from .models import Challenge
+
+    # Unknown filter values match nothing; keep them out of the cache keys
+    if difficulty and difficulty not in dict(Challenge.DIFFICULTY_CHOICES):
+        return {'ids': [], 'snippets': {}}
+    if goal_type and goal_type not in dict(Challenge.GOAL_TYPE_CHOICES):
+        return {'ids': [], 'snippets': {}}
+    if duration not in DURATION_BUCKETS:
+        duration = ''
+
+    terms = ' '.join(parse_terms(search))
+    digest = hashlib.md5('|'.join([difficulty, goal_type, duration, terms]).encode()).hexdigest()
+    key = get_cache_key(get_catalog_version(), 'matches', digest)
+    matches = cache.get(key)
+    if matches is None:
+        challenges = filter_catalog(Challenge.objects.filter(is_active=True), difficulty, goal_type, duration)
+        snippets = {}
+        if search:
+            results = search_documents('challenge', search)
+            challenges = results.filter(challenges)
+            snippets = results.snippets
+        ids = list(challenges.values_list('pk', flat=True))
+        matches = {'ids': ids, 'snippets': {pk: snippets[pk] for pk in ids if pk in snippets}}
+        cache.set(key, matches, timeout=CATALOG_TIMEOUT)
+    return matches
+
+
+def get_challenges(ids):
+    """Challenges of ``ids`` in that order; only those not cached yet are queried"""
+    from .models import Challenge
+
+    version = get_catalog_version()
+    keys = {pk: get_cache_key(version, 'challenge', pk) for pk in ids}
+    cached = cache.get_many(keys.values())
+    challenges = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in ids if pk not in challenges]
+    if missing:
+        loaded = Challenge.objects.in_bulk(missing)
+        cache.set_many({keys[pk]: challenge for pk, challenge in loaded.items()}, timeout=CATALOG_TIMEOUT)
+        challenges.update(loaded)
+    return [challenges[pk] for pk in ids if pk in challenges]
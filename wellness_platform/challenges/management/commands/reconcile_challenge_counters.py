@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from challenges.models import reconcile_challenge_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount participant and completion counters of challenges from their participations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--challenge', type=int, action='append', help='Only this challenge id (repeatable)')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_challenge_counters(challenge_ids=options['challenge'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters of {fixed} challenge(s)'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_featured', '-created_at'], name='challenge_catalog_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userchallenge',
+            index=models.Index(fields=['user', 'status'], name='userchallenge_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userchallenge',
+            index=models.Index(fields=['challenge', 'status'], name='userchallenge_chal_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userchallenge',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['user', 'challenge'], name='userchallenge_active_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-17 18:41
+
+from django.db import migrations, models
+
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Frozen copy of the participation statuses that take up a place
+PARTICIPANT_STATUSES = ('active', 'completed')
+
+
+def count_participants(apps, schema_editor):
+    """Fill the new counters from the participations, in one UPDATE"""
+    Challenge = apps.get_model('challenges', 'Challenge')
+    UserChallenge = apps.get_model('challenges', 'UserChallenge')
+
+    def count(**filters):
+        return Coalesce(Subquery(
+            UserChallenge.objects.filter(challenge=OuterRef('pk'), **filters).order_by().values(
+                'challenge'
+            ).annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    Challenge.objects.update(
+        participant_count=count(status__in=PARTICIPANT_STATUSES),
+        completed_count=count(status='completed'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0002_challenge_challenge_catalog_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_participants, migrations.RunPython.noop),
+    ]
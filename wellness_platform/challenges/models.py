@@ -1,9 +1,64 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .catalog import invalidate_catalog
+
+
+# Participations that take up a place in a challenge
+PARTICIPANT_STATUSES = ('active', 'completed')
+
+# Challenge columns only ever changed by their own UPDATEs
+COUNTER_FIELDS = ('participant_count', 'completed_count')
+
+
+class ChallengeFull(Exception):
+    """Raised when joining a challenge that has no places left"""
+
+
+def get_counter_deltas(old_status, new_status):
+    """Changes to (participant_count, completed_count) for a status change; None means no row"""
+    participants = (new_status in PARTICIPANT_STATUSES) - (old_status in PARTICIPANT_STATUSES)
+    completed = (new_status == 'completed') - (old_status == 'completed')
+    return participants, completed
+
+
+def reconcile_challenge_counters(challenge_ids=None):
+    """
+    Recount participants and completions from the participations.
+
+    Returns the number of challenges whose counters were wrong.
+    """
+    def count(**filters):
+        return Coalesce(Subquery(
+            UserChallenge.objects.filter(challenge=OuterRef('pk'), **filters).order_by().values(
+                'challenge'
+            ).annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    challenges = Challenge.objects.all()
+    if challenge_ids is not None:
+        challenges = challenges.filter(pk__in=challenge_ids)
+
+    drifted = challenges.annotate(
+        actual_participants=count(status__in=PARTICIPANT_STATUSES),
+        actual_completed=count(status='completed'),
+    ).filter(
+        ~Q(participant_count=F('actual_participants')) | ~Q(completed_count=F('actual_completed'))
+    ).values_list('pk', flat=True)
+
+    return Challenge.objects.filter(pk__in=list(drifted)).update(
+        participant_count=count(status__in=PARTICIPANT_STATUSES),
+        completed_count=count(status='completed'),
+    )
+
 
 class Challenge(models.Model):
     """Main Challenge Model - Created by admins"""
@@ -67,6 +122,10 @@ class Challenge(models.Model):
     is_featured = models.BooleanField(default=False, help_text='Feature on homepage?')
     max_participants = models.PositiveIntegerField(null=True, blank=True, help_text='Max users (optional)')
 
+    # Maintained by UserChallenge; repaired by manage.py reconcile_challenge_counters
+    participant_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_count = models.PositiveIntegerField(default=0, editable=False)
+
     # Personalization Tags (for smart recommendations)
     recommended_for_bmi_range = models.CharField(
         max_length=50,
@@ -91,27 +150,83 @@ class Challenge(models.Model):
         verbose_name = 'Challenge'
         verbose_name_plural = 'Challenges'
         ordering = ['-is_featured', '-created_at']
+        indexes = [
+            # Explore page: active challenges in catalog order
+            models.Index(
+                fields=['-is_featured', '-created_at'],
+                condition=models.Q(is_active=True),
+                name='challenge_catalog_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Updates leave the counters out, so saving an instance loaded before
+        someone joined cannot write its stale counts back.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
     def get_participant_count(self):
         """Get number of users who joined this challenge"""
-        return self.user_challenges.filter(status__in=['active', 'completed']).count()
+        return self.participant_count
 
     def is_full(self):
         """Check if challenge has reached max participants"""
         if self.max_participants:
-            return self.get_participant_count() >= self.max_participants
+            return self.participant_count >= self.max_participants
         return False
 
     def get_completion_rate(self):
-        """Calculate percentage of users who completed the challenge"""
-        total = self.user_challenges.count()
+        """Calculate percentage of users who completed the challenge, failed and abandoned ones included"""
+        # The counters skip failed and abandoned participations, so those are counted here
+        total = self.participant_count + self.user_challenges.exclude(status__in=PARTICIPANT_STATUSES).count()
         if total == 0:
             return 0
-        completed = self.user_challenges.filter(status='completed').count()
-        return round((completed / total) * 100, 1)
+        return round((self.completed_count / total) * 100, 1)
+
+    @classmethod
+    def update_counters(cls, pk, old_status, new_status):
+        """Apply a participation's status change to the counters of challenge ``pk``"""
+        participants, completed = get_counter_deltas(old_status, new_status)
+        updates = {}
+        if participants:
+            updates['participant_count'] = Greatest(F('participant_count') + participants, Value(0))
+        if completed:
+            updates['completed_count'] = Greatest(F('completed_count') + completed, Value(0))
+        if updates:
+            cls.objects.filter(pk=pk).update(**updates)
+
+    def add_participant(self, status='active'):
+        """
+        Count a new participation, taking a place only if one is left.
+
+        The limit is checked by the UPDATE itself, so two users cannot both
+        take the last place. Raises ChallengeFull.
+        """
+        participants, completed = get_counter_deltas(None, status)
+        if not participants:
+            return
+
+        updated = type(self).objects.filter(
+            Q(max_participants__isnull=True) | Q(participant_count__lt=F('max_participants')),
+            pk=self.pk
+        ).update(
+            participant_count=F('participant_count') + 1,
+            completed_count=F('completed_count') + completed,
+        )
+        if not updated:
+            raise ChallengeFull(f'"{self.title}" is full')
+        self.participant_count += 1
+        self.completed_count += completed
 
 
 class UserChallenge(models.Model):
@@ -148,11 +263,24 @@ class UserChallenge(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True, help_text='User notes about the challenge')
 
+    # Status as last loaded or saved; None when unknown
+    _loaded_status = None
+
     class Meta:
         verbose_name = 'User Challenge'
         verbose_name_plural = 'User Challenges'
         ordering = ['-joined_at']
         unique_together = [['user', 'challenge', 'start_date']]
+        indexes = [
+            models.Index(fields=['user', 'status'], name='userchallenge_user_status_idx'),
+            models.Index(fields=['challenge', 'status'], name='userchallenge_chal_status_idx'),
+            # "Has this user joined?" and "my active challenges" only look at active rows
+            models.Index(
+                fields=['user', 'challenge'],
+                condition=models.Q(status='active'),
+                name='userchallenge_active_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.challenge.title}"
@@ -164,16 +292,49 @@ class UserChallenge(models.Model):
 
         # Update completion percentage
         if self.challenge.duration_days > 0:
-            self.completion_percentage = (self.days_completed / self.challenge.duration_days) * 100
+            self.completion_percentage = self.get_completion_percentage(self.days_completed)
 
         # Check if completed
-        if self.days_completed >= self.challenge.duration_days and self.status == 'active':
-            self.status = 'completed'
-            self.completed_at = timezone.now()
-            self.badge_earned = True
-            self.points_earned = self.challenge.points_reward
-
-        super().save(*args, **kwargs)
+        completing = self.days_completed >= self.challenge.duration_days and self.status == 'active'
+        if completing:
+            self.mark_completed()
+
+        with transaction.atomic():
+            if self._state.adding:
+                self.challenge.add_participant(self.status)
+            elif self._loaded_status is not None:
+                Challenge.update_counters(self.challenge_id, self._loaded_status, self.status)
+            super().save(*args, **kwargs)
+            if completing:
+                self.award_badge()
+        self._loaded_status = self.status
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The status the counters know about, to tell transitions on save
+        instance._loaded_status = instance.status if 'status' in field_names else None
+        return instance
+
+    def get_completion_percentage(self, days_completed):
+        return (Decimal(days_completed) * 100 / self.challenge.duration_days).quantize(Decimal('0.01'))
+
+    def mark_completed(self):
+        """Set the completion fields; the caller saves them"""
+        self.status = 'completed'
+        self.completed_at = timezone.now()
+        self.badge_earned = True
+        self.points_earned = self.challenge.points_reward
+
+    def award_badge(self):
+        """Create the badge of a just-completed challenge"""
+        return ChallengeBadge.objects.create(
+            user_id=self.user_id,
+            challenge=self.challenge,
+            user_challenge=self,
+            badge_name=self.challenge.badge_name or self.challenge.title,
+            badge_icon=self.challenge.badge_icon or '🏆',
+        )
 
     def is_active(self):
         """Check if challenge is still active"""
@@ -186,15 +347,81 @@ class UserChallenge(models.Model):
         remaining = (self.end_date - timezone.now().date()).days
         return max(0, remaining)
 
-    def update_streak(self, completed_today):
-        """Update streak based on daily check-in"""
-        if completed_today:
-            self.current_streak += 1
-            if self.current_streak > self.longest_streak:
-                self.longest_streak = self.current_streak
+    def recompute_progress(self):
+        """
+        Rebuild days completed and streaks from all check-ins, then save.
+
+        For check-ins written in bulk, which skip ``DailyCheckIn.save``.
+        The current streak is the run of completed days ending at the
+        latest check-in, so it is zero when that one was missed.
+        """
+        from habits.models import calculate_streaks
+
+        check_ins = list(self.check_ins.order_by('date').values_list('date', 'completed'))
+        completed_days = [day for day, completed in check_ins if completed]
+        current, self.longest_streak = calculate_streaks(completed_days)
+        self.current_streak = current if check_ins and check_ins[-1][1] else 0
+        self.days_completed = len(completed_days)
+        self.save()
+
+    @classmethod
+    def lock_for_check_in(cls, pk, day):
+        """
+        The participation locked for update, with its challenge.
+
+        ``previous_completed`` is annotated with whether the check-in of the
+        day before ``day`` was completed (None without one).
+        """
+        return cls.objects.select_for_update(of=('self',)).select_related('challenge').annotate(
+            previous_completed=Subquery(
+                DailyCheckIn.objects.filter(
+                    user_challenge=OuterRef('pk'), date=day - timedelta(days=1)
+                ).values('completed')[:1]
+            )
+        ).get(pk=pk)
+
+    def apply_check_in(self, check_in):
+        """
+        Update progress for a new check-in with a single UPDATE.
+
+        Must run on a row from ``lock_for_check_in``. The streak only looks
+        at the previous day's check-in: it continues if that day was
+        completed and restarts otherwise. Completion, points and the badge
+        are awarded by the check-in that reaches the challenge length; that
+        one also updates the challenge counters and inserts the badge, two
+        more queries.
+        """
+        if check_in.completed:
+            self.current_streak = self.current_streak + 1 if self.previous_completed else 1
         else:
             self.current_streak = 0
-        self.save()
+        self.longest_streak = max(self.longest_streak, self.current_streak)
+
+        updates = {'current_streak': self.current_streak, 'longest_streak': self.longest_streak}
+        if check_in.completed:
+            self.days_completed += 1
+            updates['days_completed'] = F('days_completed') + 1
+            if self.challenge.duration_days > 0:
+                self.completion_percentage = updates['completion_percentage'] = (
+                    self.get_completion_percentage(self.days_completed)
+                )
+
+        completing = self.status == 'active' and self.days_completed >= self.challenge.duration_days
+        if completing:
+            self.mark_completed()
+            updates.update(
+                status=self.status, completed_at=self.completed_at,
+                badge_earned=self.badge_earned, points_earned=self.points_earned,
+            )
+
+        # Only the update that moves the row out of "active" may award it
+        queryset = type(self).objects.filter(pk=self.pk)
+        if completing:
+            queryset = queryset.filter(status='active')
+        if queryset.update(**updates) and completing:
+            Challenge.update_counters(self.challenge_id, 'active', self.status)
+            self.award_badge()
+        self._loaded_status = self.status
 
 
 class DailyCheckIn(models.Model):
@@ -249,14 +476,23 @@ class DailyCheckIn(models.Model):
         return f"{self.user_challenge.user.username} - {self.user_challenge.challenge.title} - {self.date}"
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-
-        # Update UserChallenge progress
-        if self.completed:
-            user_challenge = self.user_challenge
-            user_challenge.days_completed = user_challenge.check_ins.filter(completed=True).count()
-            user_challenge.save()
-            user_challenge.update_streak(True)
+        """
+        New check-ins update their participation in three queries: lock it
+        (reading the previous day's check-in), insert, and update its
+        progress. The check-in that completes the challenge takes five, as
+        it also updates the challenge counters and inserts the badge. Edits
+        rebuild the progress from all check-ins.
+        """
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            self.user_challenge.recompute_progress()
+            return
+
+        with transaction.atomic():
+            user_challenge = UserChallenge.lock_for_check_in(self.user_challenge_id, self.date)
+            super().save(*args, **kwargs)
+            user_challenge.apply_check_in(self)
+        self.user_challenge = user_challenge
 
 
 class ChallengeBadge(models.Model):
@@ -277,3 +513,17 @@ class ChallengeBadge(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.badge_name}"
+
+
+@receiver(post_delete, sender=UserChallenge)
+def release_participant(sender, instance, **kwargs):
+    """Give the place of a deleted participation back, including cascaded deletes"""
+    Challenge.update_counters(instance.challenge_id, instance.status, None)
+
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def refresh_catalog(sender, **kwargs):
+    """Admin edits to the catalog drop the cached explore pages and facets"""
+    # After commit, so a concurrent request cannot re-cache the old catalog
+    transaction.on_commit(invalidate_catalog)
@@ -1,3 +1,221 @@
+import hashlib
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .catalog import get_cache_key, get_catalog_version, get_facets, get_matches
+from .models import Challenge, ChallengeBadge, ChallengeFull, DailyCheckIn, UserChallenge
+
+
+User = get_user_model()
+
+
+class CheckInPipelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='challenger', password='pass12345')
+        cls.challenge = Challenge.objects.create(
+            title='Plank Week', slug='plank-week', description='Plank', short_description='Plank',
+            duration_days=5, daily_requirement='Plank for a minute', points_reward=50,
+            badge_name='Plank Pro', badge_icon='🧱'
+        )
+
+    def setUp(self):
+        self.start = date.today() - timedelta(days=10)
+        self.user_challenge = UserChallenge.objects.create(
+            user=self.user, challenge=self.challenge, start_date=self.start
+        )
+
+    def check_in(self, offset, completed=True):
+        return DailyCheckIn.objects.create(
+            user_challenge=self.user_challenge, date=self.start + timedelta(days=offset), completed=completed
+        )
+
+    def test_streak_follows_previous_day(self):
+        self.check_in(0)
+        self.check_in(1)
+        self.check_in(2, completed=False)
+        self.check_in(3)
+        self.user_challenge.refresh_from_db()
+        self.assertEqual((self.user_challenge.current_streak, self.user_challenge.longest_streak), (1, 2))
+        self.assertEqual(self.user_challenge.days_completed, 3)
+
+        # A gap without any check-in also restarts the streak
+        self.check_in(5)
+        self.user_challenge.refresh_from_db()
+        self.assertEqual(self.user_challenge.current_streak, 1)
+        self.assertEqual(str(self.user_challenge.completion_percentage), '80.00')
+
+    def count_check_in_statements(self, offset):
+        with CaptureQueriesContext(connection) as context:
+            self.check_in(offset)
+        return len([query['sql'] for query in context.captured_queries if 'SAVEPOINT' not in query['sql']])
+
+    def test_constant_queries(self):
+        for offset in range(3):
+            self.check_in(offset)
+        self.assertEqual(self.count_check_in_statements(3), 3)
+
+        # Completing also updates the challenge counters and inserts the badge
+        self.assertEqual(self.count_check_in_statements(4), 5)
+        self.assertEqual(self.count_check_in_statements(5), 3)
+
+    def test_completion_awarded_once(self):
+        for offset in range(5):
+            self.check_in(offset)
+        self.user_challenge.refresh_from_db()
+        self.assertEqual(self.user_challenge.status, 'completed')
+        self.assertEqual(self.user_challenge.points_earned, 50)
+        self.assertTrue(self.user_challenge.badge_earned)
+
+        # Later check-ins and a full recompute do not award it again
+        self.check_in(5)
+        self.user_challenge.refresh_from_db()
+        self.user_challenge.recompute_progress()
+        badges = ChallengeBadge.objects.filter(user_challenge=self.user_challenge)
+        self.assertEqual([badge.badge_name for badge in badges], ['Plank Pro'])
+
+    def test_editing_a_check_in_recomputes(self):
+        check_in = self.check_in(0)
+        self.check_in(1)
+        check_in.completed = False
+        check_in.save()
+        self.user_challenge.refresh_from_db()
+        self.assertEqual((self.user_challenge.days_completed, self.user_challenge.longest_streak), (1, 1))
+
+
+class ChallengeCounterTests(TestCase):
+
+    def setUp(self):
+        self.challenge = Challenge.objects.create(
+            title='Cold Showers', slug='cold-showers', description='Brr', short_description='Brr',
+            duration_days=2, daily_requirement='One cold shower', max_participants=2
+        )
+        self.users = [User.objects.create_user(username=f'bather{i}', password='pass12345') for i in range(3)]
+
+    def join(self, user):
+        return UserChallenge.objects.create(user=user, challenge=self.challenge, start_date=date.today() - timedelta(days=5))
+
+    def test_status_transitions(self):
+        first = self.join(self.users[0])
+        second = self.join(self.users[1])
+        self.challenge.refresh_from_db()
+        self.assertEqual((self.challenge.participant_count, self.challenge.completed_count), (2, 0))
+        self.assertTrue(self.challenge.is_full())
+
+        # Completing through check-ins
+        for offset in range(2):
+            DailyCheckIn.objects.create(user_challenge=first, date=first.start_date + timedelta(days=offset), completed=True)
+        second = UserChallenge.objects.get(pk=second.pk)
+        second.status = 'abandoned'
+        second.save()
+        self.challenge.refresh_from_db()
+        self.assertEqual((self.challenge.participant_count, self.challenge.completed_count), (1, 1))
+        # One completed out of everyone who joined, including the abandoned participation
+        self.assertEqual(self.challenge.get_completion_rate(), 50.0)
+
+        UserChallenge.objects.get(pk=first.pk).delete()
+        self.challenge.refresh_from_db()
+        self.assertEqual((self.challenge.participant_count, self.challenge.completed_count), (0, 0))
+
+    def test_stale_save_keeps_counters(self):
+        stale = Challenge.objects.get(pk=self.challenge.pk)
+        self.join(self.users[0])
+
+        stale.title = 'Colder Showers'
+        stale.save()
+        self.challenge.refresh_from_db()
+        self.assertEqual((self.challenge.title, self.challenge.participant_count), ('Colder Showers', 1))
+
+    def test_join_limit_checked_by_update(self):
+        self.join(self.users[0])
+        self.join(self.users[1])
+        # A stale instance that still believes there is room
+        self.challenge.participant_count = 0
+        with self.assertRaises(ChallengeFull):
+            UserChallenge.objects.create(user=self.users[2], challenge=self.challenge, start_date=date.today())
+        self.assertEqual(UserChallenge.objects.filter(challenge=self.challenge).count(), 2)
+
+        self.client.force_login(self.users[2])
+        response = self.client.post(reverse('challenges:join', args=[self.challenge.slug]))
+        self.assertRedirects(response, reverse('challenges:detail', args=[self.challenge.slug]))
+
+    def test_reconcile_command(self):
+        self.join(self.users[0])
+        Challenge.objects.filter(pk=self.challenge.pk).update(participant_count=7, completed_count=3)
+
+        out = StringIO()
+        call_command('reconcile_challenge_counters', stdout=out)
+        self.assertIn('Repaired counters of 1 challenge(s)', out.getvalue())
+        self.challenge.refresh_from_db()
+        self.assertEqual((self.challenge.participant_count, self.challenge.completed_count), (1, 0))
+
+
+class ChallengeCatalogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='browser', password='pass12345')
+        for i, (difficulty, days) in enumerate([('beginner', 5), ('beginner', 14), ('advanced', 30)] * 5):
+            Challenge.objects.create(
+                title=f'Challenge {i}', slug=f'challenge-{i}', description='Move more', short_description='Move',
+                duration_days=days, daily_requirement='Move', difficulty=difficulty,
+            )
+        self.client.force_login(self.user)
+
+    def explore(self, **params):
+        return self.client.get(reverse('challenges:explore'), params)
+
+    def test_facets(self):
+        facets = get_facets()
+        self.assertEqual(facets['total'], 15)
+        self.assertEqual((facets['difficulty']['beginner'], facets['difficulty']['expert']), (10, 0))
+        self.assertEqual(facets['duration'], {'short': 5, 'medium': 5, 'long': 5})
+
+    def test_cached_pages_skip_catalog_queries(self):
+        response = self.explore(page=2)
+        self.assertEqual(len(response.context['page_obj']), 5)
+        first = [challenge.pk for challenge in response.context['page_obj']]
+
+        # Later requests only look up the session, user and joined challenges
+        with CaptureQueriesContext(connection) as context:
+            response = self.explore(page=2)
+        self.assertFalse([query for query in context.captured_queries if 'challenges_challenge' in query['sql']])
+        self.assertEqual([challenge.pk for challenge in response.context['page_obj']], first)
+        self.assertEqual(response.context['page_obj'].paginator.count, 15)
+
+    def test_saving_a_challenge_invalidates(self):
+        self.explore(duration='long')
+        with self.captureOnCommitCallbacks(execute=True):
+            Challenge.objects.filter(difficulty='advanced').first().delete()
+        self.assertEqual(self.explore(duration='long').context['page_obj'].paginator.count, 4)
+
+        challenge = Challenge.objects.filter(difficulty='beginner').first()
+        challenge.is_active = False
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            challenge.save()
+            # Until the save commits, the cached facets are kept
+            self.assertEqual(get_facets()['difficulty']['beginner'], 10)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(get_facets()['difficulty']['beginner'], 9)
+
+    def test_unknown_filters_are_not_cached(self):
+        version = get_catalog_version()
+        self.assertEqual(get_matches(difficulty='nope'), {'ids': [], 'snippets': {}})
+        self.assertEqual(get_matches(goal_type='x' * 1000), {'ids': [], 'snippets': {}})
+        self.assertFalse(any(cache.has_key(get_cache_key(version, 'matches', digest)) for digest in [
+            hashlib.md5('|'.join(values).encode()).hexdigest() for values in [('nope', '', '', ''), ('', 'x' * 1000, '', '')]
+        ]))
 
-# Create your tests here.
+        # An unknown duration is ignored, and shares the unfiltered entry
+        self.assertEqual(len(get_matches(duration='forever')['ids']), 15)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_matches()['ids']), 15)
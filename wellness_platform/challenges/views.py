@@ -4,8 +4,10 @@ from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q, Count, Sum
 from django.utils import timezone
-from datetime import date, timedelta
-from .models import Challenge, UserChallenge, DailyCheckIn, ChallengeBadge
+from datetime import date
+from wellnessapp.calendars import MonthCalendar
+from . import catalog
+from .models import Challenge, ChallengeFull, UserChallenge, DailyCheckIn, ChallengeBadge
 
 
 def is_superuser(user):
@@ -16,35 +18,15 @@ def is_superuser(user):
 @login_required
 def challenge_explore(request):
     """Explore/catalog page with filters and pagination"""
-    challenges = Challenge.objects.filter(is_active=True)
-
     # Get filter parameters
     difficulty = request.GET.get('difficulty', '')
     goal_type = request.GET.get('goal_type', '')
     duration = request.GET.get('duration', '')
     search = request.GET.get('search', '')
 
-    # Apply filters
-    if difficulty:
-        challenges = challenges.filter(difficulty=difficulty)
-
-    if goal_type:
-        challenges = challenges.filter(goal_type=goal_type)
-
-    if duration:
-        if duration == 'short':
-            challenges = challenges.filter(duration_days__lte=7)
-        elif duration == 'medium':
-            challenges = challenges.filter(duration_days__gt=7, duration_days__lte=21)
-        elif duration == 'long':
-            challenges = challenges.filter(duration_days__gt=21)
-
-    if search:
-        challenges = challenges.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search) |
-            Q(daily_requirement__icontains=search)
-        )
+    # Matching ids, facet counts and challenges all come from the catalog cache
+    matches = catalog.get_matches(difficulty, goal_type, duration, search)
+    facets = catalog.get_facets()
 
     # Get user's active challenges to mark as joined
     user_challenge_ids = []
@@ -54,10 +36,13 @@ def challenge_explore(request):
             status='active'
         ).values_list('challenge_id', flat=True)
 
-    # Pagination - 10 per page
-    paginator = Paginator(challenges, 10)
+    # Pagination - 10 per page, over the cached ids
+    paginator = Paginator(matches['ids'], catalog.PAGE_SIZE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = catalog.get_challenges(page_obj.object_list)
+    for challenge in page_obj.object_list:
+        challenge.search_snippet = matches['snippets'].get(challenge.pk, '')
 
     context = {
         'page_obj': page_obj,
@@ -66,8 +51,13 @@ def challenge_explore(request):
         'goal_type': goal_type,
         'duration': duration,
         'search': search,
-        'difficulty_choices': Challenge.DIFFICULTY_CHOICES,
-        'goal_type_choices': Challenge.GOAL_TYPE_CHOICES,
+        'facets': facets,
+        'difficulty_choices': [
+            (value, label, facets['difficulty'][value]) for value, label in Challenge.DIFFICULTY_CHOICES
+        ],
+        'goal_type_choices': [
+            (value, label, facets['goal_type'][value]) for value, label in Challenge.GOAL_TYPE_CHOICES
+        ],
     }
     return render(request, 'challenges/explore.html', context)
 
@@ -120,12 +110,16 @@ def challenge_join(request, slug):
         messages.warning(request, 'You have already joined this challenge!')
         return redirect('challenges:detail', slug=slug)
 
-    # Create UserChallenge
-    user_challenge = UserChallenge.objects.create(
-        user=request.user,
-        challenge=challenge,
-        start_date=date.today()
-    )
+    # Create UserChallenge; the place is taken atomically, so the check above can be stale
+    try:
+        user_challenge = UserChallenge.objects.create(
+            user=request.user,
+            challenge=challenge,
+            start_date=date.today()
+        )
+    except ChallengeFull:
+        messages.error(request, 'This challenge is full!')
+        return redirect('challenges:detail', slug=slug)
 
     messages.success(request, f'Successfully joined "{challenge.title}"! Good luck! 🎉')
     return redirect('challenges:my_challenge', pk=user_challenge.pk)
@@ -166,34 +160,30 @@ def my_challenges(request):
 def my_challenge_detail(request, pk):
     """Detailed view of user's challenge with progress tracking"""
     user_challenge = get_object_or_404(
-        UserChallenge,
+        UserChallenge.objects.select_related('challenge'),
         pk=pk,
         user=request.user
     )
 
-    # Get check-ins
-    check_ins = user_challenge.check_ins.order_by('-date')[:30]
-
-    # Get today's check-in
     today = date.today()
-    today_checkin = user_challenge.check_ins.filter(date=today).first()
-
-    # Calculate calendar data (last 30 days)
-    calendar_data = []
-    for i in range(30):
-        check_date = today - timedelta(days=i)
-        checkin = user_challenge.check_ins.filter(date=check_date).first()
-        calendar_data.append({
-            'date': check_date,
-            'completed': checkin.completed if checkin else False,
-            'has_checkin': checkin is not None
-        })
+    calendar = MonthCalendar.from_request(
+        request, user_challenge.check_ins.all(), 'date',
+        today=today,
+        completed=lambda checkin: checkin.completed,
+        min_month=user_challenge.start_date,
+        max_month=min(today, user_challenge.end_date),
+    )
+
+    # Today's check-in is already in the calendar when the current month is shown
+    if calendar.first_day <= today <= calendar.last_day:
+        today_checkin = calendar.entries.get(today)
+    else:
+        today_checkin = user_challenge.check_ins.filter(date=today).first()
 
     context = {
         'user_challenge': user_challenge,
-        'check_ins': check_ins,
         'today_checkin': today_checkin,
-        'calendar_data': calendar_data,
+        'calendar': calendar,
         'can_checkin': not today_checkin and user_challenge.is_active(),
     }
     return render(request, 'challenges/my_challenge_detail.html', context)
@@ -0,0 +1,103 @@
+from datetime import date
+
+from django.db.models import Count, Q, Sum
+
+
+class DashboardSnapshot:
+    """
+    Collects every number shown on the user dashboard.
+
+    Each section is computed with a single aggregate query so the total
+    number of queries stays constant no matter how many habits, meals or
+    journal entries the user has.
+    """
+
+    RECENT_JOURNAL_LIMIT = 3
+
+    def __init__(self, user, today=None):
+        self.user = user
+        self.today = today or date.today()
+
+    @classmethod
+    def for_user(cls, user, today=None):
+        """Build and compute a snapshot for a user"""
+        snapshot = cls(user, today)
+        snapshot.compute()
+        return snapshot
+
+    def compute(self):
+        self._compute_habits()
+        self._compute_mood()
+        self._compute_nutrition()
+        self._compute_journal()
+
+    def _compute_habits(self):
+        """Active habit count, today's completions and streak sum in one query"""
+        from habits.models import Habit
+
+        habits = Habit.objects.filter(user=self.user, is_active=True).with_today_status(self.today)
+        totals = habits.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(completed_today=True)),
+            streak=Sum('current_streak'),
+        )
+
+        self.total_active_habits = totals['total']
+        self.habits_completed_today = totals['completed']
+        self.current_streak = totals['streak'] or 0
+
+    def _compute_mood(self):
+        from mood.models import MoodEntry
+
+        self.today_mood = MoodEntry.objects.filter(
+            user=self.user,
+            entry_date=self.today
+        ).first()
+
+    def _compute_nutrition(self):
+        """Today's meal totals plus the (optional) nutrition goal"""
+        from nutrition.models import Meal, NutritionGoal
+
+        totals = Meal.get_daily_totals(self.user, self.today, self.today).get(self.today, {})
+        self.nutrition_summary = {
+            'date': self.today,
+            'meal_count': totals.get('meal_count', 0),
+            'total_calories': totals.get('total_calories', 0),
+            'total_protein': totals.get('total_protein', 0),
+            'total_carbs': totals.get('total_carbs', 0),
+            'total_fat': totals.get('total_fat', 0),
+        }
+        self.nutrition_goal = NutritionGoal.objects.filter(user=self.user).first()
+
+    def _compute_journal(self):
+        """Entry count, word totals and the most recent entries"""
+        from journal.models import JournalEntry
+
+        entries = JournalEntry.objects.filter(user=self.user)
+
+        totals = entries.aggregate(count=Count('id'), words=Sum('word_count'))
+        self.total_journal_entries = totals['count']
+        self.total_journal_words = totals['words'] or 0
+
+        if self.total_journal_entries > 0:
+            self.avg_journal_words = self.total_journal_words // self.total_journal_entries
+        else:
+            self.avg_journal_words = 0
+
+        self.recent_journal_entries = list(entries.defer('content')[:self.RECENT_JOURNAL_LIMIT])
+
+    def as_context(self):
+        """Template context for the user dashboard"""
+        return {
+            'habits_completed_today': self.habits_completed_today,
+            'total_active_habits': self.total_active_habits,
+            'current_streak': self.current_streak,
+            'today_mood': self.today_mood,
+            'has_logged_mood_today': self.today_mood is not None,
+            'nutrition_summary': self.nutrition_summary,
+            'nutrition_goal': self.nutrition_goal,
+            'total_journal_entries': self.total_journal_entries,
+            'total_journal_words': self.total_journal_words,
+            'recent_journal_entries': self.recent_journal_entries,
+            'avg_journal_words': self.avg_journal_words,
+        }
@@ -1,3 +1,85 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from habits.models import Habit, HabitCompletion
+from journal.models import JournalEntry
+from mood.models import MoodEntry
+from nutrition.models import Meal
+
+from .services import DashboardSnapshot
+
+
+User = get_user_model()
+
+
+class DashboardSnapshotTests(TestCase):
+    """The dashboard must cost a fixed number of queries"""
+
+    SNAPSHOT_QUERIES = 6
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='snap', password='pass12345')
+        self.today = date.today()
+
+    def add_data(self, count):
+        offset = Habit.objects.filter(user=self.user).count()
+        for i in range(count):
+            habit = Habit.objects.create(user=self.user, name=f'Habit {offset + i}', current_streak=i)
+            if i % 2 == 0:
+                HabitCompletion.objects.create(habit=habit, completed_date=self.today)
+            Meal.objects.create(
+                user=self.user, meal_type='snack', food_name=f'Food {i}', portion='1',
+                calories=100, protein=1, carbs=2, fat=3, meal_date=self.today
+            )
+            JournalEntry.objects.create(user=self.user, title=f'Entry {i}', content='one two three')
+
+    def test_values(self):
+        self.add_data(4)
+        MoodEntry.objects.create(user=self.user, mood='happy', entry_date=self.today)
+        Habit.objects.create(user=self.user, name='Paused', is_active=False, current_streak=50)
+
+        snapshot = DashboardSnapshot.for_user(self.user, self.today)
+
+        self.assertEqual(snapshot.total_active_habits, 4)
+        self.assertEqual(snapshot.habits_completed_today, 2)
+        self.assertEqual(snapshot.current_streak, 0 + 1 + 2 + 3)
+        self.assertEqual(snapshot.today_mood.mood, 'happy')
+        self.assertEqual(snapshot.nutrition_summary['meal_count'], 4)
+        self.assertEqual(snapshot.nutrition_summary['total_calories'], 400)
+        self.assertEqual(snapshot.total_journal_entries, 4)
+        self.assertEqual(snapshot.total_journal_words, 12)
+        self.assertEqual(snapshot.avg_journal_words, 3)
+        self.assertEqual(len(snapshot.recent_journal_entries), 3)
+
+    def test_query_count_is_constant(self):
+        self.add_data(2)
+        with self.assertNumQueries(self.SNAPSHOT_QUERIES):
+            DashboardSnapshot.for_user(self.user, self.today)
+
+        self.add_data(25)
+        with self.assertNumQueries(self.SNAPSHOT_QUERIES):
+            DashboardSnapshot.for_user(self.user, self.today)
+
+    def test_view_query_count_does_not_grow(self):
+        self.client.force_login(self.user)
+        url = reverse('dashboard:user_dashboard')
+
+        self.add_data(2)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.add_data(25)
+        # Habits from the previous day must not be counted as done today
+        HabitCompletion.objects.create(
+            habit=Habit.objects.filter(user=self.user).last(),
+            completed_date=self.today - timedelta(days=1)
+        )
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.client.get(url).status_code, 200)
 
-# Create your tests here.
+        self.assertEqual(len(small), len(large))
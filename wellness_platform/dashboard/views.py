@@ -1,7 +1,9 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from datetime import date
+from django.conf import settings
+from wellnessapp.request_metrics import metrics_store
+from .services import DashboardSnapshot
 
 
 def is_admin_user(user):
@@ -20,56 +22,11 @@ def user_dashboard_view(request):
     """
     Display the main dashboard for regular users only
     """
-    # Import models here to avoid circular imports
-    from habits.models import Habit
-    from mood.models import MoodEntry
-    from nutrition.models import Meal, NutritionGoal
-    from journal.models import JournalEntry
-
-    # Get habits data
-    active_habits = request.user.habits.filter(is_active=True)
-    habits_completed_today = sum(1 for habit in active_habits if habit.is_completed_today())
-    total_active_habits = active_habits.count()
-
-    # Calculate current streak (sum of all active habit streaks)
-    current_streak = sum(habit.current_streak for habit in active_habits)
-
-    # Get today's mood
-    today_mood = MoodEntry.get_today_mood(request.user)
-
-    # Get nutrition data for today
-    nutrition_summary = Meal.get_daily_summary(request.user, date.today())
-
-    # Get nutrition goal if exists
-    try:
-        nutrition_goal = request.user.nutrition_goal
-    except NutritionGoal.DoesNotExist:
-        nutrition_goal = None
-
-    # Get journal statistics
-    user_journal_entries = JournalEntry.objects.filter(user=request.user)
-    total_journal_entries = user_journal_entries.count()
-    total_journal_words = sum(entry.get_word_count() for entry in user_journal_entries)
-    recent_journal_entries = user_journal_entries[:3]
-
-    if total_journal_entries > 0:
-        avg_journal_words = total_journal_words // total_journal_entries
-    else:
-        avg_journal_words = 0
+    snapshot = DashboardSnapshot.for_user(request.user)
 
     context = {
         'user': request.user,
-        'habits_completed_today': habits_completed_today,
-        'total_active_habits': total_active_habits,
-        'current_streak': current_streak,
-        'today_mood': today_mood,
-        'has_logged_mood_today': today_mood is not None,
-        'nutrition_summary': nutrition_summary,
-        'nutrition_goal': nutrition_goal,
-        'total_journal_entries': total_journal_entries,
-        'total_journal_words': total_journal_words,
-        'recent_journal_entries': recent_journal_entries,
-        'avg_journal_words': round(avg_journal_words),
+        **snapshot.as_context(),
     }
     return render(request, 'dashboard/user_dashboard.html', context)
 
@@ -97,6 +54,8 @@ def admin_dashboard_view(request):
         'total_users': total_users,
         'admin_users': admin_users,
         'regular_users': regular_users,
+        'request_metrics_enabled': settings.REQUEST_METRICS_ENABLED,
+        'request_metrics': metrics_store.summary(),
     }
     return render(request, 'dashboard/admin_dashboard.html', context)
 
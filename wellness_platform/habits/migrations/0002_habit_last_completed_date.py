@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-17 17:53
+
+from django.db import migrations, models
+
+
+# Frozen copy of the streak rules as defined for this migration; later
+# changes to habits.models must not change what it writes
+def get_period_index(day, frequency='daily'):
+    if frequency == 'weekly':
+        # date(1, 1, 1) is a Monday, so weeks line up with ordinal 1
+        return (day.toordinal() - 1) // 7
+    return day.toordinal()
+
+
+def calculate_streaks(dates, frequency='daily'):
+    periods = sorted({get_period_index(day, frequency) for day in dates})
+
+    run = longest = 0
+    previous = None
+    for period in periods:
+        run = run + 1 if previous is not None and period == previous + 1 else 1
+        longest = max(longest, run)
+        previous = period
+
+    return run, longest
+
+
+def recompute_streaks(apps, schema_editor):
+    Habit = apps.get_model('habits', 'Habit')
+    HabitCompletion = apps.get_model('habits', 'HabitCompletion')
+
+    for habit in Habit.objects.all().iterator():
+        dates = list(
+            HabitCompletion.objects.filter(habit=habit)
+            .order_by('completed_date')
+            .values_list('completed_date', flat=True)
+        )
+        habit.current_streak, habit.longest_streak = calculate_streaks(dates, habit.frequency)
+        habit.last_completed_date = dates[-1] if dates else None
+        habit.save(update_fields=['current_streak', 'longest_streak', 'last_completed_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='last_completed_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(recompute_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 17:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0002_habit_last_completed_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user'], name='habit_user_active_idx'),
+        ),
+    ]
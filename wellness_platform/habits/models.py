@@ -1,9 +1,63 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Value
 from django.conf import settings
 from django.utils import timezone
+from collections import defaultdict
 from datetime import timedelta, date
 
 
+def get_period_index(day, frequency='daily'):
+    """Ordinal of the day for daily habits, or of its Monday-based week for weekly ones"""
+    if frequency == 'weekly':
+        # date(1, 1, 1) is a Monday, so weeks line up with ordinal 1
+        return (day.toordinal() - 1) // 7
+    return day.toordinal()
+
+
+def calculate_streaks(dates, frequency='daily'):
+    """
+    Compute (current_streak, longest_streak) from completion dates.
+
+    The current streak is the run of consecutive periods ending at the
+    most recent completion.
+    """
+    periods = sorted({get_period_index(day, frequency) for day in dates})
+
+    run = longest = 0
+    previous = None
+    for period in periods:
+        run = run + 1 if previous is not None and period == previous + 1 else 1
+        longest = max(longest, run)
+        previous = period
+
+    return run, longest
+
+
+class HabitQuerySet(models.QuerySet):
+    """Annotations that replace per-habit completion lookups"""
+
+    def with_today_status(self, today=None):
+        """Annotate ``completed_today`` with an EXISTS subquery"""
+        if today is None:
+            today = date.today()
+        return self.annotate(completed_today=Exists(
+            HabitCompletion.objects.filter(habit=OuterRef('pk'), completed_date=today)
+        ))
+
+    def with_completion_rate(self, days=30, today=None):
+        """Annotate how many completions fall in the last ``days`` days"""
+        if today is None:
+            today = date.today()
+        start_date = today - timedelta(days=days)
+        return self.annotate(
+            recent_completions=Count('completions', filter=Q(
+                completions__completed_date__gte=start_date,
+                completions__completed_date__lte=today
+            )),
+            recent_completions_days=Value(days),
+        )
+
+
 class Habit(models.Model):
     """Model representing a user's habit"""
     FREQUENCY_CHOICES = [
@@ -37,10 +91,19 @@ class Habit(models.Model):
     current_streak = models.IntegerField(default=0)
     longest_streak = models.IntegerField(default=0)
     total_completions = models.IntegerField(default=0)
+    last_completed_date = models.DateField(null=True, blank=True, editable=False)
+
+    STATS_FIELDS = ['current_streak', 'longest_streak', 'total_completions', 'last_completed_date']
+
+    objects = HabitQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
         unique_together = ['user', 'name']
+        indexes = [
+            # Booleans filter as a bare column on SQLite, which only a partial index matches
+            models.Index(fields=['user'], condition=models.Q(is_active=True), name='habit_user_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_frequency_display()})"
@@ -56,6 +119,9 @@ class Habit(models.Model):
 
     def is_completed_today(self):
         """Check if habit is completed today"""
+        if hasattr(self, 'completed_today'):
+            # Annotated by HabitQuerySet.with_today_status()
+            return self.completed_today
         return self.get_completion_for_date() is not None
 
     def can_complete_today(self):
@@ -68,59 +134,209 @@ class Habit(models.Model):
             completed_date = date.today()
 
         # Check if already completed
-        if self.get_completion_for_date(completed_date):
+        if self.completions.filter(completed_date=completed_date).exists():
             return False, "Already completed for this date"
 
         # Create completion record
-        completion = HabitCompletion.objects.create(
+        HabitCompletion.objects.create(
             habit=self,
             completed_date=completed_date
         )
 
         # Update tracking statistics
-        self.update_streaks()
+        if not self.apply_completion(completed_date):
+            self.recompute_streaks()
         self.total_completions += 1
-        self.save()
+        self.save(update_fields=self.STATS_FIELDS)
 
         return True, "Habit marked as complete"
 
-    def update_streaks(self):
-        """Update current and longest streak based on completion history"""
-        completions = self.completions.order_by('-completed_date')
+    def mark_incomplete(self, completed_date=None):
+        """Remove the completion for a specific date"""
+        if completed_date is None:
+            completed_date = date.today()
 
-        if not completions.exists():
-            self.current_streak = 0
-            return
+        deleted, _ = self.completions.filter(completed_date=completed_date).delete()
+        if not deleted:
+            return False, "Habit was not completed on this date"
 
-        # Calculate current streak
-        current_streak = 0
-        check_date = date.today()
+        # Update tracking statistics
+        if not self.apply_uncompletion(completed_date):
+            self.recompute_streaks()
+        self.total_completions = max(0, self.total_completions - 1)
+        self.save(update_fields=self.STATS_FIELDS)
+
+        return True, "Completion removed"
+
+    @classmethod
+    def bulk_mark_complete(cls, user, habit_dates):
+        """
+        Mark many habits complete in one transaction.
+
+        ``habit_dates`` maps habit ids to the dates to complete. Habits not
+        owned by ``user`` are ignored. Returns the updated habits and the
+        number of completions created.
+        """
+        with transaction.atomic():
+            habits = {
+                habit.pk: habit
+                for habit in cls.objects.select_for_update().filter(user=user, pk__in=habit_dates)
+            }
+            requested = {
+                (habit_id, completed_date)
+                for habit_id in habits
+                for completed_date in habit_dates[habit_id]
+            }
+            existing = set(HabitCompletion.objects.filter(
+                habit_id__in=habits,
+                completed_date__in={completed_date for _, completed_date in requested}
+            ).values_list('habit_id', 'completed_date'))
+
+            new_dates = defaultdict(list)
+            for habit_id, completed_date in sorted(requested - existing):
+                new_dates[habit_id].append(completed_date)
+
+            HabitCompletion.objects.bulk_create(
+                [
+                    HabitCompletion(habit_id=habit_id, completed_date=completed_date)
+                    for habit_id, dates in new_dates.items()
+                    for completed_date in dates
+                ],
+                ignore_conflicts=True
+            )
+
+            # One UPDATE per distinct increment, usually just one
+            habits_by_increment = defaultdict(list)
+            for habit_id, dates in new_dates.items():
+                habits_by_increment[len(dates)].append(habit_id)
+            for increment, habit_ids in habits_by_increment.items():
+                cls.objects.filter(pk__in=habit_ids).update(
+                    total_completions=F('total_completions') + increment
+                )
+
+            for habit_id, dates in new_dates.items():
+                habit = habits[habit_id]
+                habit.total_completions += len(dates)
+                if not all(habit.apply_completion(completed_date) for completed_date in dates):
+                    habit.recompute_streaks()
+
+            cls.objects.bulk_update(
+                [habits[habit_id] for habit_id in new_dates],
+                ['current_streak', 'longest_streak', 'last_completed_date']
+            )
+
+        return list(habits.values()), sum(len(dates) for dates in new_dates.values())
+
+    @classmethod
+    def recompute_stats_for(cls, habit_ids):
+        """
+        Rebuild streaks and totals of many habits from their completions.
+
+        For writes that bypass ``mark_complete``, such as bulk imports.
+        Costs two queries plus one batched UPDATE.
+        """
+        habits = list(cls.objects.filter(pk__in=habit_ids))
+        dates = defaultdict(list)
+        for habit_id, completed_date in HabitCompletion.objects.filter(
+            habit_id__in=habit_ids
+        ).order_by('completed_date').values_list('habit_id', 'completed_date'):
+            dates[habit_id].append(completed_date)
+
+        for habit in habits:
+            habit_dates = dates.get(habit.pk, [])
+            habit.current_streak, habit.longest_streak = calculate_streaks(habit_dates, habit.frequency)
+            habit.total_completions = len(habit_dates)
+            habit.last_completed_date = habit_dates[-1] if habit_dates else None
+
+        cls.objects.bulk_update(habits, cls.STATS_FIELDS, batch_size=500)
+        return habits
+
+    def get_period_index(self, day):
+        return get_period_index(day, self.frequency)
+
+    def apply_completion(self, completed_date):
+        """
+        Update streaks in memory for a newly added completion.
+
+        Only the latest completion date is consulted, so this costs no
+        queries. Returns False when the date lies in a period before the
+        latest completion, in which case the caller must recompute.
+        """
+        if self.last_completed_date is None:
+            self.current_streak = 1
+        else:
+            gap = self.get_period_index(completed_date) - self.get_period_index(self.last_completed_date)
+            if gap < 0:
+                return False
+            if gap == 1:
+                self.current_streak += 1
+            elif gap > 1:
+                self.current_streak = 1
+            # gap == 0: another completion in an already counted week
+
+        if self.last_completed_date is None or completed_date > self.last_completed_date:
+            self.last_completed_date = completed_date
+        self.longest_streak = max(self.longest_streak, self.current_streak)
+        return True
+
+    def apply_uncompletion(self, completed_date):
+        """
+        Update streaks for a removed completion using the neighbouring one.
+
+        Costs at most one query. Returns False when the removal reaches
+        into history the stored counters cannot describe, in which case
+        the caller must recompute.
+        """
+        if self.last_completed_date is None:
+            return False
+
+        removed_period = self.get_period_index(completed_date)
+        last_period = self.get_period_index(self.last_completed_date)
+        if removed_period < last_period:
+            return False
+        if completed_date != self.last_completed_date:
+            # Another completion still covers the latest week
+            return True
+
+        previous_date = self.completions.filter(
+            completed_date__lt=completed_date
+        ).order_by('-completed_date').values_list('completed_date', flat=True).first()
+
+        # longest_streak is a high-water mark and is left as it is
+        if previous_date is None:
+            self.current_streak = 0
+            self.last_completed_date = None
+            return True
 
-        for completion in completions:
-            if completion.completed_date == check_date:
-                current_streak += 1
-                check_date -= timedelta(days=1)
-            elif (check_date - completion.completed_date).days == 1:
-                current_streak += 1
-                check_date = completion.completed_date - timedelta(days=1)
-            else:
-                break
+        gap = last_period - self.get_period_index(previous_date)
+        if gap > 1:
+            # The length of the earlier run is unknown
+            return False
 
-        self.current_streak = current_streak
+        if gap == 1:
+            self.current_streak -= 1
+        self.last_completed_date = previous_date
+        return True
 
-        # Update longest streak if current is higher
-        if current_streak > self.longest_streak:
-            self.longest_streak = current_streak
+    def recompute_streaks(self):
+        """Rebuild streak statistics from the full completion history"""
+        dates = list(self.completions.order_by('completed_date').values_list('completed_date', flat=True))
+        self.current_streak, self.longest_streak = calculate_streaks(dates, self.frequency)
+        self.last_completed_date = dates[-1] if dates else None
 
     def get_completion_rate(self, days=30):
         """Calculate completion rate for the last N days"""
-        end_date = date.today()
-        start_date = end_date - timedelta(days=days)
-
-        completions_count = self.completions.filter(
-            completed_date__gte=start_date,
-            completed_date__lte=end_date
-        ).count()
+        if getattr(self, 'recent_completions_days', None) == days:
+            # Annotated by HabitQuerySet.with_completion_rate()
+            completions_count = self.recent_completions
+        else:
+            end_date = date.today()
+            start_date = end_date - timedelta(days=days)
+
+            completions_count = self.completions.filter(
+                completed_date__gte=start_date,
+                completed_date__lte=end_date
+            ).count()
 
         if self.frequency == 'daily':
             expected_completions = days
@@ -1,3 +1,238 @@
+import json
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Habit, HabitCompletion, calculate_streaks
+
+
+User = get_user_model()
+
+
+class StreakEngineTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='streaks', password='pass12345')
+        self.today = date(2026, 3, 18)  # a Wednesday
+
+    def make_habit(self, frequency='daily', name='Walk'):
+        return Habit.objects.create(user=self.user, name=name, frequency=frequency)
+
+    def assertStreaks(self, habit, current, longest):
+        habit.refresh_from_db()
+        self.assertEqual((habit.current_streak, habit.longest_streak), (current, longest))
+
+    def test_consecutive_days(self):
+        habit = self.make_habit()
+        for offset in (2, 1, 0):
+            habit.mark_complete(self.today - timedelta(days=offset))
+        self.assertStreaks(habit, 3, 3)
+
+    def test_gap_restarts_streak(self):
+        habit = self.make_habit()
+        habit.mark_complete(self.today - timedelta(days=5))
+        habit.mark_complete(self.today - timedelta(days=4))
+        habit.mark_complete(self.today)
+        self.assertStreaks(habit, 1, 2)
+
+    def test_backfilled_date_joins_runs(self):
+        habit = self.make_habit()
+        habit.mark_complete(self.today - timedelta(days=2))
+        habit.mark_complete(self.today)
+        habit.mark_complete(self.today - timedelta(days=1))
+        self.assertStreaks(habit, 3, 3)
+
+    def test_weekly_habit_counts_weeks(self):
+        habit = self.make_habit(frequency='weekly')
+        # Two completions in one week count once
+        habit.mark_complete(self.today - timedelta(days=14))
+        habit.mark_complete(self.today - timedelta(days=7))
+        habit.mark_complete(self.today - timedelta(days=8))
+        habit.mark_complete(self.today)
+        self.assertStreaks(habit, 3, 3)
+
+    def test_uncomplete_latest(self):
+        habit = self.make_habit()
+        for offset in (3, 2, 1, 0):
+            habit.mark_complete(self.today - timedelta(days=offset))
+        habit.mark_incomplete(self.today)
+        self.assertStreaks(habit, 3, 4)
+
+    def test_uncomplete_middle_splits_run(self):
+        habit = self.make_habit()
+        for offset in (3, 2, 1, 0):
+            habit.mark_complete(self.today - timedelta(days=offset))
+        habit.mark_incomplete(self.today - timedelta(days=2))
+        self.assertStreaks(habit, 2, 2)
+
+    def test_uncomplete_missing_date(self):
+        habit = self.make_habit()
+        success, _ = habit.mark_incomplete(self.today)
+        self.assertFalse(success)
+
+    def test_matches_full_recompute(self):
+        rng = random.Random(7)
+        for frequency in ('daily', 'weekly'):
+            habit = self.make_habit(frequency=frequency, name=f'Random {frequency}')
+            for _ in range(200):
+                day = self.today - timedelta(days=rng.randrange(60))
+                if rng.random() < 0.7:
+                    habit.mark_complete(day)
+                else:
+                    habit.mark_incomplete(day)
+
+                dates = habit.completions.values_list('completed_date', flat=True)
+                current, longest = calculate_streaks(dates, frequency)
+                self.assertEqual(habit.current_streak, current)
+                # Undoing the latest day never lowers the high-water mark
+                self.assertGreaterEqual(habit.longest_streak, longest)
+                self.assertEqual(habit.total_completions, len(dates))
+
+
+class StreakEngineBenchmark(TestCase):
+    """Marking a habit complete costs the same no matter how long its history is"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='bench', password='pass12345')
+        self.today = date.today()
+
+    def make_habit_with_history(self, days):
+        habit = Habit.objects.create(user=self.user, name=f'History {days}')
+        HabitCompletion.objects.bulk_create(
+            HabitCompletion(habit=habit, completed_date=self.today - timedelta(days=offset))
+            for offset in range(1, days + 1)
+        )
+        habit.recompute_streaks()
+        habit.total_completions = days
+        habit.save()
+        return habit
+
+    def test_constant_queries(self):
+        for days in (10, 5 * 365):
+            habit = self.make_habit_with_history(days)
+            # exists() + insert + update
+            with self.assertNumQueries(3):
+                habit.mark_complete(self.today)
+            # delete + neighbour lookup + update
+            with self.assertNumQueries(3):
+                habit.mark_incomplete(self.today)
+            self.assertEqual(habit.current_streak, days)
+
+
+class BulkCompletionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk', password='pass12345')
+        self.other = User.objects.create_user(username='other', password='pass12345')
+        self.client.force_login(self.user)
+        self.url = reverse('habits:habit_complete_bulk')
+
+    def post_json(self, data):
+        return self.client.post(self.url, json.dumps(data), content_type='application/json')
+
+    def test_json_completes_many_habits(self):
+        habits = [Habit.objects.create(user=self.user, name=f'Habit {i}') for i in range(5)]
+        foreign = Habit.objects.create(user=self.other, name='Not mine')
+        habits[0].mark_complete()
+
+        response = self.post_json({'habit_ids': [habit.pk for habit in habits] + [foreign.pk]})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['created'], 4)
+        self.assertEqual(len(data['habits']), 5)
+        self.assertTrue(all(habit['completed_today'] for habit in data['habits']))
+        self.assertTrue(all(habit['total_completions'] == 1 for habit in data['habits']))
+        self.assertFalse(foreign.completions.exists())
+
+    def test_backfilled_dates_update_streaks(self):
+        habit = Habit.objects.create(user=self.user, name='Read')
+        today = date.today()
+        habit.mark_complete(today)
+
+        self.post_json({'completions': [
+            {'habit_id': habit.pk, 'date': (today - timedelta(days=offset)).isoformat()}
+            for offset in (1, 2)
+        ]})
+
+        habit.refresh_from_db()
+        self.assertEqual((habit.current_streak, habit.total_completions), (3, 3))
+
+    def test_query_count_does_not_grow(self):
+        for count in (3, 15):
+            Habit.objects.filter(user=self.user).delete()
+            habits = [Habit.objects.create(user=self.user, name=f'Habit {i}') for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                self.post_json({'habit_ids': [habit.pk for habit in habits]})
+            if count == 3:
+                baseline = len(queries)
+        self.assertEqual(len(queries), baseline)
+
+    def test_rejects_future_dates(self):
+        habit = Habit.objects.create(user=self.user, name='Run')
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        response = self.post_json({'habit_ids': [habit.pk], 'date': tomorrow})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_malformed_json(self):
+        habit = Habit.objects.create(user=self.user, name='Walk')
+        for data in (
+            {'habit_ids': str(habit.pk)},
+            {'completions': None},
+            {'habit_ids': [habit.pk], 'completions': {'habit_id': habit.pk}},
+            {'completions': [habit.pk]},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post_json(data).status_code, 400)
+        self.assertFalse(habit.completions.exists())
+
+    def test_form_post_redirects(self):
+        habit = Habit.objects.create(user=self.user, name='Stretch')
+        response = self.client.post(self.url, {'habit_ids': [habit.pk]})
+        self.assertRedirects(response, reverse('habits:habit_list'))
+        self.assertTrue(habit.is_completed_today())
+
+
+class HabitQuerySetTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='annotated', password='pass12345')
+        self.today = date.today()
+
+    def test_annotations(self):
+        done = Habit.objects.create(user=self.user, name='Done')
+        pending = Habit.objects.create(user=self.user, name='Pending')
+        done.mark_complete(self.today)
+        done.mark_complete(self.today - timedelta(days=3))
+        done.mark_complete(self.today - timedelta(days=40))
+
+        habits = {
+            habit.name: habit
+            for habit in Habit.objects.with_today_status().with_completion_rate(days=30)
+        }
+
+        self.assertTrue(habits['Done'].completed_today)
+        self.assertFalse(habits['Pending'].completed_today)
+        self.assertEqual(habits['Done'].recent_completions, 2)
+        expected_rate = done.get_completion_rate(30)
+        with self.assertNumQueries(0):
+            self.assertEqual(habits['Done'].get_completion_rate(30), expected_rate)
+            self.assertFalse(habits['Pending'].is_completed_today())
 
-# Create your tests here.
+    def test_habit_list_query_count_does_not_grow(self):
+        self.client.force_login(self.user)
+        url = reverse('habits:habit_list')
+        for count in (2, 20):
+            Habit.objects.filter(user=self.user).delete()
+            for i in range(count):
+                Habit.objects.create(user=self.user, name=f'Habit {i}').mark_complete(self.today)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            if count == 2:
+                baseline = len(queries)
+        self.assertEqual(len(queries), baseline)
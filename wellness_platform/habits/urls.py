@@ -6,6 +6,7 @@ app_name = 'habits'
 urlpatterns = [
     path('', views.habit_list, name='habit_list'),
     path('create/', views.habit_create, name='habit_create'),
+    path('complete/', views.habit_complete_bulk, name='habit_complete_bulk'),
     path('<int:pk>/', views.habit_detail, name='habit_detail'),
     path('<int:pk>/edit/', views.habit_edit, name='habit_edit'),
     path('<int:pk>/delete/', views.habit_delete, name='habit_delete'),
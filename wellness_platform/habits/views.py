@@ -2,7 +2,11 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Q
-from datetime import date, timedelta
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from datetime import date
+import json
+from wellnessapp.calendars import MonthCalendar
 from .models import Habit, HabitCompletion
 from .forms import HabitForm
 
@@ -10,11 +14,11 @@ from .forms import HabitForm
 @login_required
 def habit_list(request):
     """Display all habits for the logged-in user"""
-    habits = request.user.habits.filter(is_active=True)
+    habits = list(request.user.habits.filter(is_active=True).with_today_status())
 
     # Calculate statistics
-    total_habits = habits.count()
-    completed_today = sum(1 for habit in habits if habit.is_completed_today())
+    total_habits = len(habits)
+    completed_today = sum(1 for habit in habits if habit.completed_today)
     total_completions = sum(habit.total_completions for habit in habits)
     active_streaks = sum(habit.current_streak for habit in habits)
 
@@ -56,36 +60,22 @@ def habit_create(request):
 @login_required
 def habit_detail(request, pk):
     """Display detailed view of a specific habit"""
-    habit = get_object_or_404(Habit, pk=pk, user=request.user)
+    habit = get_object_or_404(
+        Habit.objects.with_today_status().with_completion_rate(days=30),
+        pk=pk,
+        user=request.user
+    )
 
-    # Get completion history for the last 30 days
-    end_date = date.today()
-    start_date = end_date - timedelta(days=29)
-
-    completions = habit.completions.filter(
-        completed_date__gte=start_date,
-        completed_date__lte=end_date
-    ).values_list('completed_date', flat=True)
-
-    # Create calendar data
-    calendar_data = []
-    current_date = start_date
-    while current_date <= end_date:
-        calendar_data.append({
-            'date': current_date,
-            'completed': current_date in completions,
-            'is_today': current_date == end_date,
-        })
-        current_date += timedelta(days=1)
+    calendar = MonthCalendar.from_request(request, habit.completions.all(), 'completed_date')
 
     # Get completion rate
     completion_rate = habit.get_completion_rate(days=30)
 
     context = {
         'habit': habit,
-        'calendar_data': calendar_data,
+        'calendar': calendar,
         'completion_rate': completion_rate,
-        'can_complete': habit.can_complete_today(),
+        'can_complete': not habit.completed_today,
     }
     return render(request, 'habits/habit_detail.html', context)
 
@@ -98,7 +88,11 @@ def habit_edit(request, pk):
     if request.method == 'POST':
         form = HabitForm(request.POST, instance=habit)
         if form.is_valid():
-            form.save()
+            habit = form.save()
+            if 'frequency' in form.changed_data:
+                # Streaks are counted in days or weeks depending on frequency
+                habit.recompute_streaks()
+                habit.save(update_fields=Habit.STATS_FIELDS)
             messages.success(request, f'Habit "{habit.name}" updated successfully!')
             return redirect('habits:habit_detail', pk=habit.pk)
     else:
@@ -148,24 +142,105 @@ def habit_complete(request, pk):
     return redirect('habits:habit_list')
 
 
+def parse_bulk_completions(request):
+    """
+    Read the habits and dates to complete from a form or JSON POST.
+
+    Form posts send ``habit_ids`` (repeated) and an optional ``date``.
+    JSON bodies send ``{"habit_ids": [...], "date": ...}`` and/or
+    ``{"completions": [{"habit_id": ..., "date": ...}]}``. Dates default
+    to today and may not lie in the future.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or '{}')
+        except ValueError:
+            raise ValueError('Invalid JSON body')
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+        habit_ids = data.get('habit_ids', [])
+        completions = data.get('completions', [])
+        if not isinstance(habit_ids, list) or not isinstance(completions, list):
+            raise ValueError('habit_ids and completions must be lists')
+        entries = [(habit_id, data.get('date')) for habit_id in habit_ids]
+        for completion in completions:
+            if not isinstance(completion, dict):
+                raise ValueError('Each completion must be an object')
+            entries.append((completion.get('habit_id'), completion.get('date')))
+    else:
+        entries = [(habit_id, request.POST.get('date')) for habit_id in request.POST.getlist('habit_ids')]
+
+    today = date.today()
+    habit_dates = {}
+    for habit_id, date_str in entries:
+        try:
+            habit_id = int(habit_id)
+            completed_date = date.fromisoformat(date_str) if date_str else today
+        except (TypeError, ValueError):
+            raise ValueError('Invalid habit id or date')
+        if completed_date > today:
+            raise ValueError('Cannot complete habits in the future')
+        habit_dates.setdefault(habit_id, set()).add(completed_date)
+
+    if not habit_dates:
+        raise ValueError('No habits selected')
+    return habit_dates
+
+
+@login_required
+@require_POST
+def habit_complete_bulk(request):
+    """Mark several habits complete at once (form POST or JSON)"""
+    wants_json = request.content_type == 'application/json'
+
+    try:
+        habit_dates = parse_bulk_completions(request)
+    except ValueError as e:
+        if wants_json:
+            return JsonResponse({'error': str(e)}, status=400)
+        messages.error(request, str(e))
+        return redirect('habits:habit_list')
+
+    habits, created = Habit.bulk_mark_complete(request.user, habit_dates)
+
+    if not wants_json:
+        if created:
+            messages.success(request, f'{created} habit completion{"s" if created != 1 else ""} recorded!')
+        else:
+            messages.warning(request, 'Those habits were already completed')
+        return redirect('habits:habit_list')
+
+    completed_today = set(HabitCompletion.objects.filter(
+        habit__in=habits,
+        completed_date=date.today()
+    ).values_list('habit_id', flat=True))
+
+    return JsonResponse({
+        'created': created,
+        'habits': [
+            {
+                'id': habit.pk,
+                'name': habit.name,
+                'completed_today': habit.pk in completed_today,
+                'current_streak': habit.current_streak,
+                'longest_streak': habit.longest_streak,
+                'total_completions': habit.total_completions,
+            }
+            for habit in habits
+        ],
+    })
+
+
 @login_required
 def habit_uncomplete(request, pk):
     """Remove today's completion for a habit"""
     habit = get_object_or_404(Habit, pk=pk, user=request.user)
 
     if request.method == 'POST':
-        today = date.today()
-        try:
-            completion = habit.completions.get(completed_date=today)
-            completion.delete()
-
-            # Update streaks and total
-            habit.update_streaks()
-            habit.total_completions = max(0, habit.total_completions - 1)
-            habit.save()
-
+        success, message = habit.mark_incomplete()
+        if success:
             messages.success(request, f'Completion removed for "{habit.name}"')
-        except HabitCompletion.DoesNotExist:
+        else:
             messages.warning(request, 'Habit was not completed today')
 
     # Redirect back to the referring page or habit list
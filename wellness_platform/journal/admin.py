@@ -27,12 +27,12 @@ class JournalEntryAdmin(admin.ModelAdmin):
 
     def word_count_display(self, obj):
         """Display word count"""
-        return f"{obj.get_word_count()} words"
+        return f"{obj.word_count} words"
     word_count_display.short_description = 'Word Count'
 
     def content_preview(self, obj):
         """Display content preview"""
-        return obj.get_content_preview(200)
+        return obj.preview_text
     content_preview.short_description = 'Content Preview'
 
     def is_edited(self, obj):
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from journal.models import backfill_content_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored word count, preview and reading time for all journal entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Entries updated per query')
+
+    def handle(self, *args, **options):
+        updated = backfill_content_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated stats for {updated} journal entries'))
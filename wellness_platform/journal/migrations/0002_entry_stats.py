@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-17 17:52
+
+from django.db import migrations, models
+
+# Frozen copy of the stats as defined when the fields were added; later
+# changes to journal.models must not change what this migration writes
+PREVIEW_LENGTH = 150
+WORDS_PER_MINUTE = 200
+
+
+def get_content_stats(content):
+    plain_text = content.replace('#', '').replace('*', '').replace('_', '').replace('`', '')
+    plain_text = ' '.join(plain_text.split())
+    if len(plain_text) > PREVIEW_LENGTH:
+        plain_text = plain_text[:PREVIEW_LENGTH] + '...'
+
+    word_count = len(content.split())
+    return {
+        'word_count': word_count,
+        'preview_text': plain_text,
+        'reading_time': max(1, round(word_count / WORDS_PER_MINUTE)),
+    }
+
+
+def backfill_stats(apps, schema_editor, batch_size=500):
+    JournalEntry = apps.get_model('journal', 'JournalEntry')
+    last_pk = 0
+    while True:
+        batch = list(
+            JournalEntry.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'content')[:batch_size]
+        )
+        if not batch:
+            return
+
+        for entry in batch:
+            for field, value in get_content_stats(entry.content).items():
+                setattr(entry, field, value)
+        JournalEntry.objects.bulk_update(batch, ['word_count', 'preview_text', 'reading_time'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='preview_text',
+            field=models.CharField(blank=True, editable=False, max_length=153),
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='journalentry',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,52 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-import markdown
-from markdown.extensions.fenced_code import FencedCodeExtension
-from markdown.extensions.tables import TableExtension
-from markdown.extensions.nl2br import Nl2BrExtension
+from wellnessapp.markdown_cache import invalidate_markdown, render_markdown
+
+
+PREVIEW_LENGTH = 150
+WORDS_PER_MINUTE = 200
+
+
+def get_content_stats(content):
+    """Compute the stored word count, preview and reading time for some content"""
+    # Remove markdown formatting for preview
+    plain_text = content.replace('#', '').replace('*', '').replace('_', '').replace('`', '')
+    plain_text = ' '.join(plain_text.split())  # Normalize whitespace
+
+    if len(plain_text) > PREVIEW_LENGTH:
+        plain_text = plain_text[:PREVIEW_LENGTH] + '...'
+
+    word_count = len(content.split())
+    return {
+        'word_count': word_count,
+        'preview_text': plain_text,
+        'reading_time': max(1, round(word_count / WORDS_PER_MINUTE)),
+    }
+
+
+def backfill_content_stats(batch_size=500):
+    """
+    Recompute stored stats for every journal entry in batches.
+
+    Returns the number of entries updated.
+    """
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            JournalEntry.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'content')[:batch_size]
+        )
+        if not batch:
+            return updated
+
+        for entry in batch:
+            for field, value in get_content_stats(entry.content).items():
+                setattr(entry, field, value)
+        JournalEntry.objects.bulk_update(batch, ['word_count', 'preview_text', 'reading_time'])
+
+        updated += len(batch)
+        last_pk = batch[-1].pk
 
 
 class JournalEntry(models.Model):
@@ -18,6 +60,11 @@ class JournalEntry(models.Model):
     title = models.CharField(max_length=200, help_text="Entry title")
     content = models.TextField(help_text="Entry content in Markdown format")
 
+    # Stored stats, recomputed whenever content changes
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    preview_text = models.CharField(max_length=PREVIEW_LENGTH + 3, blank=True, editable=False)
+    reading_time = models.PositiveIntegerField(default=1, editable=False, help_text="Minutes")
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -30,24 +77,47 @@ class JournalEntry(models.Model):
             models.Index(fields=['user', '-created_at']),
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # None when content is deferred, so any assignment counts as a change
+        self._original_content = self.__dict__.get('content')
+
     def __str__(self):
         return f"{self.title} - {self.user.username} ({self.created_at.strftime('%Y-%m-%d')})"
 
+    def save(self, *args, **kwargs):
+        """Refresh stored stats and rendered HTML only when the content actually changed"""
+        content_loaded = 'content' not in self.get_deferred_fields()
+        content_changed = content_loaded and (self._state.adding or self.content != self._original_content)
+        if content_changed:
+            self.refresh_content_stats()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'word_count', 'preview_text', 'reading_time'}
+
+        super().save(*args, **kwargs)
+
+        if content_changed:
+            if self._original_content is not None:
+                invalidate_markdown(self._original_content)
+            render_markdown(self.content)
+        if content_loaded:
+            self._original_content = self.content
+
+    def refresh_content_stats(self):
+        """Recompute word count, preview and reading time from content"""
+        for field, value in get_content_stats(self.content).items():
+            setattr(self, field, value)
+
     def get_content_html(self):
-        """Convert Markdown content to safe HTML"""
-        md = markdown.Markdown(
-            extensions=[
-                'markdown.extensions.fenced_code',
-                'markdown.extensions.tables',
-                'markdown.extensions.nl2br',
-                'markdown.extensions.sane_lists',
-            ],
-            output_format='html5'
-        )
-        return md.convert(self.content)
+        """Convert Markdown content to safe HTML (cached by content hash)"""
+        return render_markdown(self.content)
 
-    def get_content_preview(self, max_length=150):
+    def get_content_preview(self, max_length=PREVIEW_LENGTH):
         """Get plain text preview of content"""
+        if max_length == PREVIEW_LENGTH:
+            return self.preview_text
+
         # Remove markdown formatting for preview
         plain_text = self.content.replace('#', '').replace('*', '').replace('_', '').replace('`', '')
         plain_text = ' '.join(plain_text.split())  # Normalize whitespace
@@ -58,7 +128,7 @@ class JournalEntry(models.Model):
 
     def get_word_count(self):
         """Get word count of the entry"""
-        return len(self.content.split())
+        return self.word_count
 
     def was_recently_updated(self):
         """Check if entry was updated in the last 24 hours"""
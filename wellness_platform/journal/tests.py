@@ -1,3 +1,72 @@
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import JournalEntry, get_content_stats
+
+
+User = get_user_model()
+
+
+class JournalEntryStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer', password='pass12345')
+
+    def add_entry(self, content, title='Today'):
+        return JournalEntry.objects.create(user=self.user, title=title, content=content)
+
+    def test_stats_only_recomputed_when_content_changes(self):
+        entry = self.add_entry('One two three')
+        self.assertEqual((entry.word_count, entry.preview_text, entry.reading_time), (3, 'One two three', 1))
+
+        with patch('journal.models.get_content_stats', wraps=get_content_stats) as stats:
+            entry.title = 'Renamed'
+            entry.save()
+            JournalEntry.objects.get(pk=entry.pk).save()
+            self.assertFalse(stats.called)
+
+            entry.content = 'One two three four'
+            entry.save(update_fields=['content'])
+            self.assertEqual(stats.call_count, 1)
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.word_count, 4)
+
+    def test_backfill(self):
+        entries = [self.add_entry('word ' * count) for count in (5, 450)]
+        JournalEntry.objects.update(word_count=0, preview_text='', reading_time=1)
+
+        # The data migration and the command fill in the same values
+        migration = import_module('journal.migrations.0002_entry_stats')
+        migration.backfill_stats(apps, None, batch_size=1)
+        self.assertEqual(
+            list(JournalEntry.objects.order_by('pk').values_list('word_count', 'reading_time')), [(5, 1), (450, 2)]
+        )
+
+        JournalEntry.objects.update(word_count=0, preview_text='')
+        out = StringIO()
+        call_command('backfill_journal_stats', stdout=out)
+        entry = JournalEntry.objects.get(pk=entries[1].pk)
+        self.assertEqual(entry.word_count, 450)
+        self.assertTrue(entry.preview_text.endswith('...'))
+
+    def test_list_sums_stored_counts_without_content(self):
+        self.add_entry('a b c')
+        self.add_entry('d e f g h')
+        self.client.force_login(self.user)
 
-# Create your tests here.
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('journal:journal_list'))
+        self.assertEqual((response.context['total_words'], response.context['avg_words']), (8, 4))
+        self.assertTrue(any('SUM("journal_journalentry"."word_count")' in query['sql'] for query in context.captured_queries))
+        self.assertFalse(any('"journal_journalentry"."content"' in query['sql'] for query in context.captured_queries))
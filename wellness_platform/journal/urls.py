@@ -5,6 +5,7 @@ app_name = 'journal'
 
 urlpatterns = [
     path('', views.journal_list, name='journal_list'),
+    path('search/', views.journal_search, name='journal_search'),
     path('new/', views.journal_create, name='journal_create'),
     path('<int:pk>/', views.journal_detail, name='journal_detail'),
     path('<int:pk>/edit/', views.journal_edit, name='journal_edit'),
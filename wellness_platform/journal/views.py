@@ -2,6 +2,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponseForbidden
+from django.db.models import Count, Sum
+from wellnessapp.search import search
 from .models import JournalEntry
 from .forms import JournalEntryForm
 
@@ -11,18 +13,36 @@ def journal_list(request):
     """Display list of user's journal entries"""
     entries = JournalEntry.objects.filter(user=request.user)
 
-    # Get statistics
-    total_entries = entries.count()
-    total_words = sum(entry.get_word_count() for entry in entries)
+    # Get statistics from the stored word counts
+    stats = entries.aggregate(total_entries=Count('id'), total_words=Sum('word_count'))
+    total_entries = stats['total_entries']
+    total_words = stats['total_words'] or 0
 
     context = {
-        'entries': entries,
+        # The list only shows stored previews, never the full content
+        'entries': entries.defer('content'),
         'total_entries': total_entries,
         'total_words': total_words,
+        'avg_words': total_words // total_entries if total_entries else 0,
     }
     return render(request, 'journal/journal_list.html', context)
 
 
+@login_required
+def journal_search(request):
+    """Search the user's own journal entries, best matches first"""
+    query = request.GET.get('q', '').strip()
+    entries = []
+    if query:
+        results = search('journal', query, owner=request.user)
+        entries = results.attach(list(results.filter(JournalEntry.objects.filter(user=request.user).defer('content'))))
+
+    return render(request, 'journal/journal_search.html', {
+        'query': query,
+        'entries': entries,
+    })
+
+
 @login_required
 def journal_create(request):
     """Create a new journal entry"""
@@ -0,0 +1,135 @@
+"""
+Per-user mood statistics: monthly distributions, logging streaks, the
+most common mood per weekday and a year-long calendar heatmap.
+
+Distributions are grouped in the database; streaks and the heatmap come
+from one query of entry dates and moods (at most one row per day). The
+result is cached per user and day, and dropped whenever a ``MoodEntry``
+is saved or deleted.
+"""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import ExtractIsoWeekDay, TruncMonth
+
+
+MOOD_ANALYTICS_TIMEOUT = 24 * 60 * 60
+HEATMAP_DAYS = 365
+
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def get_cache_key(user_id, today):
+    # The date is part of the key so streaks and the heatmap roll over at midnight
+    return f'mood:analytics:{user_id}:{today.isoformat()}'
+
+
+def get_monthly_distribution(entries, moods):
+    """Mood counts per month, oldest first"""
+    months = {}
+    for row in entries.annotate(month=TruncMonth('entry_date')).values('month', 'mood').annotate(count=Count('id')):
+        counts = months.setdefault(row['month'], dict.fromkeys(moods, 0))
+        counts[row['mood']] = row['count']
+
+    return [
+        {'month': month, 'total': sum(counts.values()), 'counts': counts}
+        for month, counts in sorted(months.items())
+    ]
+
+
+def get_weekday_moods(entries, moods):
+    """Most common mood for each weekday, Monday first; ties go to the earlier choice"""
+    counts = [dict.fromkeys(moods, 0) for _ in WEEKDAY_NAMES]
+    for row in entries.annotate(weekday=ExtractIsoWeekDay('entry_date')).values('weekday', 'mood').annotate(count=Count('id')):
+        counts[row['weekday'] - 1][row['mood']] = row['count']
+
+    weekdays = []
+    for name, day_counts in zip(WEEKDAY_NAMES, counts):
+        top = max(moods, key=lambda mood: day_counts[mood])
+        weekdays.append({
+            'weekday': name,
+            'mood': top if day_counts[top] else None,
+            'count': day_counts[top],
+            'total': sum(day_counts.values()),
+        })
+    return weekdays
+
+
+def get_logging_streaks(dates, today):
+    """
+    (current, longest) runs of consecutive logged days.
+
+    The current streak still counts if today has not been logged yet.
+    """
+    from habits.models import calculate_streaks
+
+    current, longest = calculate_streaks(dates)
+    if not dates or dates[-1] < today - timedelta(days=1):
+        current = 0
+    return current, longest
+
+
+def get_heatmap(moods_by_date, today, days=HEATMAP_DAYS):
+    """
+    Weeks (Monday to Sunday) of ``{'date', 'mood'}`` cells ending at ``today``.
+
+    Days before the window or after today are ``None`` so every week has
+    seven cells.
+    """
+    first = today - timedelta(days=days - 1)
+    start = first - timedelta(days=first.weekday())
+
+    weeks = []
+    day = start
+    while day <= today:
+        week = []
+        for _ in range(7):
+            week.append({'date': day, 'mood': moods_by_date.get(day)} if first <= day <= today else None)
+            day += timedelta(days=1)
+        weeks.append(week)
+    return weeks
+
+
+def build_mood_analytics(user_id, today=None):
+    """All statistics for one user in three queries"""
+    from .models import MoodEntry
+
+    today = today or date.today()
+    moods = [mood for mood, _ in MoodEntry.MOOD_CHOICES]
+    entries = MoodEntry.objects.filter(user_id=user_id).order_by()
+
+    moods_by_date = dict(entries.order_by('entry_date').values_list('entry_date', 'mood'))
+    dates = list(moods_by_date)
+    current_streak, longest_streak = get_logging_streaks(dates, today)
+
+    monthly = get_monthly_distribution(entries, moods)
+    totals = dict.fromkeys(moods, 0)
+    for month in monthly:
+        for mood, count in month['counts'].items():
+            totals[mood] += count
+
+    return {
+        'total_entries': len(dates),
+        'first_entry': dates[0] if dates else None,
+        'mood_totals': totals,
+        'monthly': monthly,
+        'weekdays': get_weekday_moods(entries, moods),
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+        'heatmap': get_heatmap(moods_by_date, today),
+    }
+
+
+def get_mood_analytics(user_id):
+    """Cached mood statistics for a user"""
+    key = get_cache_key(user_id, date.today())
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = build_mood_analytics(user_id)
+        cache.set(key, analytics, timeout=MOOD_ANALYTICS_TIMEOUT)
+    return analytics
+
+
+def invalidate_mood_analytics(user_id):
+    cache.delete(get_cache_key(user_id, date.today()))
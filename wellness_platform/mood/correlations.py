@@ -0,0 +1,308 @@
+"""
+How mood relates to habits, nutrition and challenge check-ins.
+
+Each source table is read once for the window and pivoted into columns
+of a frame with one row per calendar day. Correlations and "days you do
+X you log mood Y more often" effects, on the same day and on the day
+after, are then computed for every factor at once with pandas/NumPy.
+The report is cached per user, period and day. Mood entry changes drop
+it; habit, meal and check-in changes show up within
+``CORRELATIONS_TIMEOUT``.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from nutrition.trends import to_number
+
+
+CORRELATION_PERIODS = {
+    '3m': 91,
+    '6m': 182,
+    '1y': 365,
+}
+DEFAULT_CORRELATION_PERIOD = '6m'
+CORRELATIONS_TIMEOUT = 60 * 60
+
+# 0 compares a factor with mood the same day, 1 with mood the day after
+LAGS = (0, 1)
+
+# Rough valence of each mood, so mood can be correlated with numbers
+MOOD_SCORES = {
+    'happy': 2,
+    'energetic': 2,
+    'calm': 1,
+    'neutral': 0,
+    'tired': -1,
+    'sad': -2,
+    'stressed': -2,
+    'anxious': -2,
+}
+
+# Challenge check-in feedback as numbers
+CHECK_IN_MOOD_SCORES = {'excited': 2, 'motivated': 1, 'normal': 0, 'tired': -1, 'struggling': -2}
+CHECK_IN_DIFFICULTY_SCORES = {'easy': 1, 'moderate': 2, 'hard': 3, 'very_hard': 4}
+
+NUTRIENTS = ['calories', 'protein', 'carbs', 'fat']
+
+# Each side of a comparison needs this many days with a logged mood
+MIN_EFFECT_DAYS = 5
+# Smallest relative difference worth reporting, in percent
+MIN_EFFECT_LIFT = 20
+MAX_EFFECTS = 10
+
+
+def get_cache_key(user_id, period, today):
+    return f'mood:correlations:{user_id}:{period}:{today.isoformat()}'
+
+
+class MoodCorrelations:
+    """
+    Correlation report for one user over ``start_date`` to ``end_date``.
+
+    ``factors`` describes every non-mood column of ``frame``: its label,
+    its source and whether it is a yes/no column (habits done, challenge
+    days completed), which also get mood rate comparisons.
+    """
+
+    def __init__(self, user, start_date, end_date):
+        self.user = user
+        self.start_date = start_date
+        self.end_date = end_date
+        self.factors = {}
+        self.frame = self.load_frame()
+
+    @classmethod
+    def for_period(cls, user, period=DEFAULT_CORRELATION_PERIOD, end_date=None):
+        end_date = end_date or date.today()
+        return cls(user, end_date - timedelta(days=CORRELATION_PERIODS[period] - 1), end_date)
+
+    @property
+    def days(self):
+        return pd.date_range(self.start_date, self.end_date, freq='D')
+
+    def in_window(self, field):
+        return {f'{field}__gte': self.start_date, f'{field}__lte': self.end_date}
+
+    def pivot(self, rows, columns, values, fill_value=None):
+        """Rows of (date, column, value) as a frame with one column per distinct ``columns`` value"""
+        frame = pd.DataFrame.from_records(rows, columns=['date', columns, values])
+        if frame.empty:
+            return pd.DataFrame(index=self.days)
+        frame['date'] = pd.to_datetime(frame['date'])
+        table = frame.pivot_table(index='date', columns=columns, values=values, aggfunc='max')
+        return table.reindex(self.days, fill_value=fill_value).astype(float)
+
+    def add_factors(self, table, kind, labels, binary):
+        for column in table.columns:
+            self.factors[column] = {'label': labels[column], 'kind': kind, 'binary': binary}
+        return table
+
+    def load_mood(self):
+        from .models import MoodEntry
+
+        rows = MoodEntry.objects.filter(user=self.user, **self.in_window('entry_date')).values_list('entry_date', 'mood')
+        frame = pd.DataFrame.from_records(list(rows), columns=['date', 'mood'])
+        frame['date'] = pd.to_datetime(frame['date'])
+        moods = frame.set_index('date')['mood'].reindex(self.days)
+
+        # One 0/1 column per mood, NaN on days without an entry
+        one_hot = pd.DataFrame({
+            f'mood:{mood}': (moods == mood).astype(float) for mood in MOOD_SCORES
+        }, index=self.days).where(moods.notna())
+        one_hot['mood_score'] = moods.map(MOOD_SCORES).astype(float)
+        return one_hot
+
+    def load_habits(self):
+        """Every habit with a completion in the window: 1 on completed days, else 0"""
+        from habits.models import HabitCompletion
+
+        rows = list(HabitCompletion.objects.filter(
+            habit__user=self.user, **self.in_window('completed_date')
+        ).values_list('completed_date', 'habit_id', 'habit__name'))
+
+        labels = {f'habit:{habit_id}': name for _, habit_id, name in rows}
+        table = self.pivot(
+            [(day, f'habit:{habit_id}', 1) for day, habit_id, _ in rows], 'factor', 'done', fill_value=0
+        ).fillna(0)
+        return self.add_factors(table, 'habit', labels, binary=True)
+
+    def load_nutrition(self):
+        """Daily intake; NaN on days without logged meals"""
+        from nutrition.models import DailyNutritionTotal
+
+        rows = DailyNutritionTotal.objects.filter(user=self.user, **self.in_window('date')).annotate(
+            **{f'{nutrient}_value': Cast(nutrient, FloatField()) for nutrient in NUTRIENTS}
+        ).values_list('date', *(f'{nutrient}_value' for nutrient in NUTRIENTS))
+
+        frame = pd.DataFrame.from_records(list(rows), columns=['date', *NUTRIENTS])
+        frame['date'] = pd.to_datetime(frame['date'])
+        table = frame.set_index('date').reindex(self.days).astype(float)
+        table.columns = [f'nutrition:{nutrient}' for nutrient in NUTRIENTS]
+        return self.add_factors(table, 'nutrition', {
+            f'nutrition:{nutrient}': nutrient.capitalize() for nutrient in NUTRIENTS
+        }, binary=False)
+
+    def load_check_ins(self):
+        """
+        Challenge days completed, per challenge goal type, plus how check-ins felt.
+
+        Columns are NaN on days without a check-in, so a missed check-in is
+        not counted as a failed day.
+        """
+        from challenges.models import Challenge, DailyCheckIn
+
+        rows = list(DailyCheckIn.objects.filter(
+            user_challenge__user=self.user, **self.in_window('date')
+        ).values_list('date', 'user_challenge__challenge__goal_type', 'completed', 'mood', 'difficulty'))
+
+        goal_types = dict(Challenge.GOAL_TYPE_CHOICES)
+        completed = self.pivot(
+            [(day, f'challenge:{goal_type}', int(done)) for day, goal_type, done, _, _ in rows], 'factor', 'done'
+        )
+        self.add_factors(completed, 'challenge', {
+            f'challenge:{goal_type}': f'{goal_types.get(goal_type, goal_type)} challenge' for _, goal_type, _, _, _ in rows
+        }, binary=True)
+
+        feedback = self.pivot([
+            (day, name, scores.get(value))
+            for day, _, _, mood, difficulty in rows
+            for name, scores, value in (
+                ('check_in:energy', CHECK_IN_MOOD_SCORES, mood),
+                ('check_in:difficulty', CHECK_IN_DIFFICULTY_SCORES, difficulty),
+            )
+            if value in scores
+        ], 'factor', 'score')
+        self.add_factors(feedback, 'challenge', {
+            'check_in:energy': 'Check-in energy', 'check_in:difficulty': 'Check-in difficulty',
+        }, binary=False)
+        return pd.concat([completed, feedback], axis=1)
+
+    def load_frame(self):
+        """The per-day matrix: mood columns followed by every factor"""
+        return pd.concat(
+            [self.load_mood(), self.load_habits(), self.load_nutrition(), self.load_check_ins()], axis=1
+        ).reindex(self.days)
+
+    @property
+    def factor_columns(self):
+        return list(self.factors)
+
+    def correlations(self):
+        """Pearson correlation of each factor with the mood score, per lag"""
+        factors = self.frame[self.factor_columns]
+        score = self.frame['mood_score']
+        # Constant columns have no variance; their correlation is NaN
+        with np.errstate(divide='ignore', invalid='ignore'):
+            by_lag = {lag: factors.shift(lag).corrwith(score) for lag in LAGS}
+        present = factors.notna().sum()
+
+        results = []
+        for column, info in self.factors.items():
+            values = {lag: by_lag[lag].get(column) for lag in LAGS}
+            if all(pd.isna(value) for value in values.values()):
+                continue
+            results.append({
+                'factor': column,
+                'label': info['label'],
+                'kind': info['kind'],
+                'days': int(present[column]),
+                'same_day': to_number(values[0], 2),
+                'next_day': to_number(values[1], 2),
+            })
+        return sorted(results, key=lambda row: -max(abs(row['same_day'] or 0), abs(row['next_day'] or 0)))
+
+    def effects(self):
+        """
+        How much more often each mood is logged on days a yes/no factor happened.
+
+        For every lag the factor matrix F (days x factors, 0/1) and mood
+        matrix M (days x moods, 0/1) give all rates with two products:
+        ``F.T @ M / F.sum()`` with the factor and the same for ``1 - F``
+        without it.
+        """
+        binary = [column for column, info in self.factors.items() if info['binary']]
+        mood_columns = [f'mood:{mood}' for mood in MOOD_SCORES]
+        if not binary:
+            return []
+
+        effects = []
+        for lag in LAGS:
+            factors = self.frame[binary].shift(lag)
+            moods = self.frame[mood_columns]
+            # Days where both the factor and the mood are known
+            usable = moods.notna().all(axis=1).to_numpy()[:, None] & factors.notna().to_numpy()
+            with_factor = np.where(usable, factors.to_numpy(), 0)
+            without_factor = np.where(usable, 1 - factors.to_numpy(), 0)
+            mood_matrix = np.nan_to_num(moods.to_numpy())
+
+            days_with = with_factor.sum(axis=0)
+            days_without = without_factor.sum(axis=0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rate_with = (with_factor.T @ mood_matrix) / days_with[:, None]
+                rate_without = (without_factor.T @ mood_matrix) / days_without[:, None]
+                lift = (rate_with / rate_without - 1) * 100
+
+            for i, column in enumerate(binary):
+                if days_with[i] < MIN_EFFECT_DAYS or days_without[i] < MIN_EFFECT_DAYS:
+                    continue
+                for j, mood in enumerate(MOOD_SCORES):
+                    if not np.isfinite(lift[i, j]) or abs(lift[i, j]) < MIN_EFFECT_LIFT:
+                        continue
+                    effects.append(self.describe_effect(
+                        column, mood, lag, rate_with[i, j], rate_without[i, j], lift[i, j],
+                        int(days_with[i]), int(days_without[i]),
+                    ))
+
+        effects.sort(key=lambda effect: -abs(effect['lift_pct']))
+        return effects[:MAX_EFFECTS]
+
+    def describe_effect(self, column, mood, lag, rate_with, rate_without, lift, days_with, days_without):
+        info = self.factors[column]
+        when = 'the day after you' if lag else 'on days you'
+        action = 'complete' if info['kind'] == 'habit' else 'complete a'
+        direction = 'more' if lift > 0 else 'less'
+        return {
+            'factor': column,
+            'label': info['label'],
+            'mood': mood,
+            'lag': lag,
+            'with_pct': to_number(rate_with * 100),
+            'without_pct': to_number(rate_without * 100),
+            'lift_pct': to_number(lift, 0),
+            'days_with': days_with,
+            'days_without': days_without,
+            'text': f'{when.capitalize()} {action} {info["label"]}, you log {mood.capitalize()} '
+                    f'{abs(lift):.0f}% {direction} often',
+        }
+
+    def as_dict(self):
+        mood_days = int(self.frame['mood_score'].notna().sum())
+        return {
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'days': len(self.frame),
+            'mood_days': mood_days,
+            'correlations': self.correlations() if mood_days else [],
+            'effects': self.effects() if mood_days else [],
+        }
+
+
+def get_mood_correlations(user, period=DEFAULT_CORRELATION_PERIOD):
+    """Cached correlation report for one of ``CORRELATION_PERIODS`` ending today"""
+    today = date.today()
+    key = get_cache_key(user.pk, period, today)
+    report = cache.get(key)
+    if report is None:
+        report = MoodCorrelations.for_period(user, period, today).as_dict()
+        cache.set(key, report, timeout=CORRELATIONS_TIMEOUT)
+    return report
+
+
+def invalidate_mood_correlations(user_id):
+    today = date.today()
+    cache.delete_many([get_cache_key(user_id, period, today) for period in CORRELATION_PERIODS])
@@ -3,6 +3,9 @@ from django.conf import settings
 from django.utils import timezone
 from datetime import date
 
+from .analytics import invalidate_mood_analytics
+from .correlations import invalidate_mood_correlations
+
 
 class MoodEntry(models.Model):
     """Model representing a user's daily mood entry"""
@@ -37,6 +40,18 @@ class MoodEntry(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.get_mood_display()} on {self.entry_date}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_mood_analytics(self.user_id)
+        invalidate_mood_correlations(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        user_id = self.user_id
+        result = super().delete(*args, **kwargs)
+        invalidate_mood_analytics(user_id)
+        invalidate_mood_correlations(user_id)
+        return result
+
     def get_mood_emoji(self):
         """Return just the emoji from the mood choice"""
         mood_dict = dict(self.MOOD_CHOICES)
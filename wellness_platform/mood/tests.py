@@ -1,3 +1,141 @@
+import warnings
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from habits.models import Habit, HabitCompletion
+
+from .analytics import build_mood_analytics, get_mood_analytics
+from .correlations import MoodCorrelations, get_mood_correlations
+from .models import MoodEntry
+
+
+User = get_user_model()
+
+
+class MoodAnalyticsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='feeler', password='pass12345')
+        self.today = date.today()
+
+    def log(self, days_ago, mood):
+        return MoodEntry.objects.create(user=self.user, mood=mood, entry_date=self.today - timedelta(days=days_ago))
+
+    def test_statistics(self):
+        for days_ago, mood in [(1, 'happy'), (2, 'happy'), (3, 'sad'), (10, 'calm'), (11, 'calm'), (12, 'calm')]:
+            self.log(days_ago, mood)
+
+        with self.assertNumQueries(3):
+            analytics = build_mood_analytics(self.user.pk, today=self.today)
+
+        self.assertEqual(analytics['total_entries'], 6)
+        # Today is not logged yet, so the streak ending yesterday still counts
+        self.assertEqual((analytics['current_streak'], analytics['longest_streak']), (3, 3))
+        self.assertEqual(analytics['mood_totals']['calm'], 3)
+        self.assertEqual(sum(month['total'] for month in analytics['monthly']), 6)
+
+        weekday = (self.today - timedelta(days=10)).weekday()
+        self.assertEqual(analytics['weekdays'][weekday]['mood'], 'calm')
+
+        cells = {cell['date']: cell['mood'] for week in analytics['heatmap'] for cell in week if cell}
+        self.assertEqual(len(cells), 365)
+        self.assertEqual(cells[self.today - timedelta(days=3)], 'sad')
+        self.assertIsNone(cells[self.today])
+        self.assertTrue(all(len(week) == 7 for week in analytics['heatmap']))
+
+    def test_cached_until_entry_saved(self):
+        self.log(1, 'happy')
+        self.assertEqual(get_mood_analytics(self.user.pk)['total_entries'], 1)
+
+        with self.assertNumQueries(0):
+            get_mood_analytics(self.user.pk)
+
+        entry = self.log(0, 'tired')
+        self.assertEqual(get_mood_analytics(self.user.pk)['current_streak'], 2)
+        entry.delete()
+        self.assertEqual(get_mood_analytics(self.user.pk)['total_entries'], 1)
+
+    def test_views(self):
+        self.log(0, 'energetic')
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('mood:mood_analytics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['top_mood'], 'energetic')
+
+        data = self.client.get(reverse('mood:mood_analytics_data')).json()
+        self.assertEqual(data['current_streak'], 1)
+        self.assertEqual(data['monthly'][0]['counts']['energetic'], 1)
+
+
+class MoodCorrelationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='correlator', password='pass12345')
+        self.today = date.today()
+
+    def test_habit_effects_and_correlations(self):
+        exercise = Habit.objects.create(user=self.user, name='Exercise')
+        for days_ago in range(40):
+            day = self.today - timedelta(days=days_ago)
+            exercised = days_ago % 2 == 0
+            if exercised:
+                HabitCompletion.objects.create(habit=exercise, completed_date=day)
+            # Happy on exercise days, and on one in four of the others
+            MoodEntry.objects.create(user=self.user, entry_date=day, mood='happy' if exercised or days_ago % 4 == 1 else 'sad')
+
+        with self.assertNumQueries(4):
+            report = MoodCorrelations.for_period(self.user, '3m', self.today).as_dict()
+
+        self.assertEqual(report['mood_days'], 40)
+        effect = next(
+            effect for effect in report['effects']
+            if effect['factor'] == f'habit:{exercise.pk}' and effect['mood'] == 'happy' and effect['lag'] == 0
+        )
+        self.assertEqual((effect['with_pct'], effect['without_pct'], effect['lift_pct']), (100.0, 50.0, 100.0))
+        self.assertIn('On days you complete Exercise, you log Happy 100% more often', effect['text'])
+
+        row = next(row for row in report['correlations'] if row['factor'] == f'habit:{exercise.pk}')
+        self.assertGreater(row['same_day'], 0.5)
+        self.assertEqual(row['days'], 91)
+
+    def test_constant_factor_has_no_correlation(self):
+        water = Habit.objects.create(user=self.user, name='Water')
+        for days_ago in range(10):
+            day = self.today - timedelta(days=days_ago)
+            HabitCompletion.objects.create(habit=water, completed_date=day)
+            MoodEntry.objects.create(user=self.user, entry_date=day, mood='happy' if days_ago % 2 else 'sad')
+
+        # Done every day of the logged moods, so the habit has no variance there
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            report = MoodCorrelations(self.user, self.today - timedelta(days=9), self.today).as_dict()
+        self.assertEqual(report['correlations'], [])
+
+    def test_cached_until_entry_saved(self):
+        MoodEntry.objects.create(user=self.user, entry_date=self.today, mood='happy')
+        self.assertEqual(get_mood_correlations(self.user, '3m')['mood_days'], 1)
+        self.assertEqual(get_mood_correlations(self.user, '1y')['mood_days'], 1)
+
+        with self.assertNumQueries(0):
+            get_mood_correlations(self.user, '3m')
+
+        entry = MoodEntry.objects.create(user=self.user, entry_date=self.today - timedelta(days=1), mood='sad')
+        self.assertEqual(get_mood_correlations(self.user, '3m')['mood_days'], 2)
+        entry.delete()
+        self.assertEqual(get_mood_correlations(self.user, '1y')['mood_days'], 1)
+
+    def test_view_without_data(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('mood:mood_insights'), {'period': '1y'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report']['effects'], [])
 
-# Create your tests here.
+        data = self.client.get(reverse('mood:mood_insights_data'), {'period': 'bogus'}).json()
+        self.assertEqual(data['period'], '6m')
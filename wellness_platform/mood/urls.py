@@ -6,6 +6,10 @@ app_name = 'mood'
 urlpatterns = [
     path('log/', views.mood_log, name='mood_log'),
     path('history/', views.mood_history, name='mood_history'),
+    path('analytics/', views.mood_analytics, name='mood_analytics'),
+    path('analytics/data/', views.mood_analytics_data, name='mood_analytics_data'),
+    path('insights/', views.mood_insights, name='mood_insights'),
+    path('insights/data/', views.mood_insights_data, name='mood_insights_data'),
     path('<int:pk>/', views.mood_detail, name='mood_detail'),
     path('<int:pk>/delete/', views.mood_delete, name='mood_delete'),
 ]
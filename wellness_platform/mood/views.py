@@ -1,7 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
 from datetime import date
+from .analytics import get_mood_analytics
+from .correlations import CORRELATION_PERIODS, DEFAULT_CORRELATION_PERIOD, get_mood_correlations
 from .models import MoodEntry
 from .forms import MoodEntryForm
 
@@ -53,6 +56,58 @@ def mood_history(request):
     return render(request, 'mood/mood_history.html', context)
 
 
+@login_required
+def mood_analytics(request):
+    """Mood trends: monthly distribution, streaks, weekdays and a year heatmap"""
+    analytics = get_mood_analytics(request.user.pk)
+    choices = dict(MoodEntry.MOOD_CHOICES)
+
+    context = {
+        **analytics,
+        'mood_labels': [(mood, label) for mood, label in MoodEntry.MOOD_CHOICES],
+        'top_mood': max(analytics['mood_totals'], key=analytics['mood_totals'].get) if analytics['total_entries'] else None,
+        'weekdays': [{**day, 'label': choices.get(day['mood'], '')} for day in analytics['weekdays']],
+        'months': [
+            {**month, 'counts': [(mood, month['counts'][mood]) for mood in choices]}
+            for month in analytics['monthly']
+        ],
+    }
+    if context['top_mood']:
+        context['top_mood_label'] = choices[context['top_mood']]
+    return render(request, 'mood/mood_analytics.html', context)
+
+
+@login_required
+def mood_analytics_data(request):
+    """Mood analytics as JSON"""
+    return JsonResponse(get_mood_analytics(request.user.pk))
+
+
+def get_correlation_period(request):
+    period = request.GET.get('period', DEFAULT_CORRELATION_PERIOD)
+    return period if period in CORRELATION_PERIODS else DEFAULT_CORRELATION_PERIOD
+
+
+@login_required
+def mood_insights(request):
+    """How habits, meals and challenge days relate to mood"""
+    period = get_correlation_period(request)
+
+    context = {
+        'period': period,
+        'periods': CORRELATION_PERIODS,
+        'report': get_mood_correlations(request.user, period),
+    }
+    return render(request, 'mood/mood_insights.html', context)
+
+
+@login_required
+def mood_insights_data(request):
+    """Mood correlation report as JSON"""
+    period = get_correlation_period(request)
+    return JsonResponse({'period': period, **get_mood_correlations(request.user, period)})
+
+
 @login_required
 def mood_detail(request, pk):
     """View a specific mood entry"""
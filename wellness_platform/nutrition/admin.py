@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Meal, NutritionGoal
+from .foods import clear_search_cache
+from .models import DailyNutritionTotal, Food, Meal, NutritionGoal
 
 
 @admin.register(NutritionGoal)
@@ -32,10 +33,11 @@ class MealAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'food_name', 'notes']
     date_hierarchy = 'meal_date'
     readonly_fields = ['logged_at']
+    raw_id_fields = ['food']
 
     fieldsets = (
         ('Basic Information', {
-            'fields': ('user', 'meal_type', 'food_name', 'portion', 'meal_date')
+            'fields': ('user', 'meal_type', 'food', 'food_name', 'portion', 'meal_date')
         }),
         ('Nutritional Information', {
             'fields': ('calories', 'protein', 'carbs', 'fat')
@@ -49,3 +51,52 @@ class MealAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset with select_related"""
         return super().get_queryset(request).select_related('user')
+
+    def delete_queryset(self, request, queryset):
+        """Bulk deletes skip Meal.delete(), so rebuild the affected days"""
+        days = set(queryset.values_list('user_id', 'meal_date'))
+        super().delete_queryset(request, queryset)
+        for user_id, day in days:
+            DailyNutritionTotal.rebuild_day(user_id, day)
+
+
+@admin.register(DailyNutritionTotal)
+class DailyNutritionTotalAdmin(admin.ModelAdmin):
+    """Read-only view of the daily rollup maintained from meals"""
+    list_display = ['user', 'date', 'meal_count', 'calories', 'protein', 'carbs', 'fat']
+    search_fields = ['user__username']
+    date_hierarchy = 'date'
+    readonly_fields = ['user', 'date', 'meal_count', 'calories', 'protein', 'carbs', 'fat']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Food)
+class FoodAdmin(admin.ModelAdmin):
+    """Admin interface for the food catalog"""
+    list_display = ['name', 'brand', 'calories', 'protein', 'carbs', 'fat', 'serving_size_g', 'source']
+    list_filter = ['source']
+    search_fields = ['normalized_name', 'brand']
+    readonly_fields = ['normalized_name', 'created_at']
+
+    fieldsets = (
+        ('Food', {
+            'fields': ('name', 'normalized_name', 'brand', 'source')
+        }),
+        ('Per 100g', {
+            'fields': ('calories', 'protein', 'carbs', 'fat')
+        }),
+        ('Serving', {
+            'fields': ('serving_size_g', 'serving_description')
+        }),
+        ('Metadata', {
+            'fields': ('created_at',),
+            'classes': ('collapse',)
+        }),
+    )
+
+    def delete_queryset(self, request, queryset):
+        """Bulk deletes skip Food.delete(), so clear cached searches here"""
+        super().delete_queryset(request, queryset)
+        clear_search_cache()
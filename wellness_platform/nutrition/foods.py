@@ -0,0 +1,97 @@
+"""
+Food catalog search.
+
+Every word of a food's name and brand is stored as a ``FoodTerm``. A
+query matches foods that have, for each query word, a term starting with
+that word. Prefixes are matched with a range (``term >= 'chi' AND
+term < 'chi\\uffff'``) rather than ``LIKE`` so the term index is used on
+every database backend.
+
+Autocomplete sends a request per keystroke and most users type the same
+few prefixes, so results are kept in a per-process LRU cache that is
+cleared whenever the catalog changes in this process.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.functions import Length
+
+
+SEARCH_CACHE_SIZE = 2048
+MAX_SEARCH_RESULTS = 20
+DEFAULT_SEARCH_RESULTS = 10
+
+# Only the first few words narrow the results; the rest are ignored
+MAX_QUERY_WORDS = 4
+
+
+def normalize_food_name(name):
+    """Lowercase ASCII words separated by single spaces"""
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name.lower()).split())
+
+
+def search_queryset(query):
+    """Foods matching every word of ``query`` as a prefix, best matches first"""
+    from .models import Food, FoodTerm
+
+    normalized = normalize_food_name(query)
+    words = normalized.split()[:MAX_QUERY_WORDS]
+    if not words:
+        return Food.objects.none()
+
+    foods = Food.objects.all()
+    for word in words:
+        foods = foods.filter(pk__in=FoodTerm.objects.filter(
+            term__gte=word,
+            term__lt=word + '\uffff'
+        ).values('food_id'))
+
+    # Names starting with the query rank above a match on a later word
+    return foods.annotate(
+        rank=Case(
+            When(normalized_name__startswith=normalized, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField()
+        )
+    ).order_by('rank', Length('name'), 'name')
+
+
+def food_as_dict(food):
+    """JSON-ready catalog entry with the nutrition of one serving"""
+    serving = food.nutrition_for(food.serving_size_g)
+    return {
+        'id': food.pk,
+        'name': food.name,
+        'brand': food.brand,
+        'serving_size_g': food.serving_size_g,
+        'serving_description': food.serving_description or f'{food.serving_size_g}g',
+        'per_100g': {
+            'calories': food.calories,
+            'protein': float(food.protein),
+            'carbs': float(food.carbs),
+            'fat': float(food.fat),
+        },
+        'serving': {key: float(value) for key, value in serving.items()},
+    }
+
+
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def _cached_search(normalized, limit):
+    return tuple(food_as_dict(food) for food in search_queryset(normalized)[:limit])
+
+
+def search_foods(query, limit=DEFAULT_SEARCH_RESULTS):
+    """Up to ``limit`` matching foods as dicts; repeated prefixes skip the database"""
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    normalized = normalize_food_name(query)
+    if not normalized:
+        return []
+    return list(_cached_search(normalized, limit))
+
+
+def clear_search_cache():
+    """Forget cached results after the catalog changes"""
+    _cached_search.cache_clear()
@@ -3,18 +3,27 @@ from .models import Meal, NutritionGoal
 
 
 class MealForm(forms.ModelForm):
-    """Form for logging meals"""
+    """
+    Form for logging meals.
+
+    Picking a catalog food sets the hidden ``food`` field; any of the
+    name, portion, calories and macros left blank are then filled from
+    one serving of that food.
+    """
+    FOOD_FIELDS = ['food_name', 'portion', 'calories', 'protein', 'carbs', 'fat']
 
     class Meta:
         model = Meal
-        fields = ['meal_type', 'food_name', 'portion', 'calories', 'protein', 'carbs', 'fat', 'meal_date', 'notes']
+        fields = ['meal_type', 'food', 'food_name', 'portion', 'calories', 'protein', 'carbs', 'fat', 'meal_date', 'notes']
         widgets = {
             'meal_type': forms.Select(attrs={
                 'class': 'mt-1 block w-full rounded-lg border-gray-300 dark:border-gray-600 bg-white dark:bg-gray-700 text-gray-900 dark:text-white shadow-sm focus:border-indigo-500 focus:ring-indigo-500'
             }),
+            'food': forms.HiddenInput(),
             'food_name': forms.TextInput(attrs={
                 'class': 'mt-1 block w-full rounded-lg border-gray-300 dark:border-gray-600 bg-white dark:bg-gray-700 text-gray-900 dark:text-white shadow-sm focus:border-indigo-500 focus:ring-indigo-500',
-                'placeholder': 'e.g., Grilled chicken breast, Oatmeal with berries'
+                'placeholder': 'e.g., Grilled chicken breast, Oatmeal with berries',
+                'autocomplete': 'off'
             }),
             'portion': forms.TextInput(attrs={
                 'class': 'mt-1 block w-full rounded-lg border-gray-300 dark:border-gray-600 bg-white dark:bg-gray-700 text-gray-900 dark:text-white shadow-sm focus:border-indigo-500 focus:ring-indigo-500',
@@ -61,6 +70,34 @@ class MealForm(forms.ModelForm):
             'notes': 'Notes (Optional)'
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Required unless a catalog food supplies them; checked in clean()
+        self.required_food_fields = [name for name in self.FOOD_FIELDS if self.fields[name].required]
+        for name in self.required_food_fields:
+            self.fields[name].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        food = cleaned_data.get('food')
+
+        if food:
+            serving = food.nutrition_for(food.serving_size_g)
+            defaults = {
+                'food_name': food.name,
+                'portion': food.serving_description or f'{food.serving_size_g}g',
+                **serving,
+            }
+            for name, value in defaults.items():
+                if cleaned_data.get(name) in (None, '') and name not in self.errors:
+                    cleaned_data[name] = value
+
+        for name in self.required_food_fields:
+            if cleaned_data.get(name) in (None, '') and name not in self.errors:
+                self.add_error(name, forms.ValidationError(self.fields[name].error_messages['required'], code='required'))
+
+        return cleaned_data
+
 
 class NutritionGoalForm(forms.ModelForm):
     """Form for setting nutrition goals"""
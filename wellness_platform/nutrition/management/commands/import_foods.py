@@ -0,0 +1,91 @@
+import csv
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from nutrition.foods import clear_search_cache, normalize_food_name
+from nutrition.models import Food, FoodTerm
+
+
+DEFAULT_DATASET = Path(__file__).resolve().parents[2] / 'data' / 'foods.csv'
+
+REQUIRED_COLUMNS = {'name', 'calories', 'protein', 'carbs', 'fat'}
+
+
+class Command(BaseCommand):
+    help = 'Bulk import foods (nutrition per 100g) from a CSV file into the catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(DEFAULT_DATASET),
+                            help='CSV with name, brand, calories, protein, carbs, fat, serving_size_g, '
+                                 'serving_description columns (default: bundled dataset)')
+        parser.add_argument('--source', default='', help='Label stored on imported foods (default: file name)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per query')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+        source = options['source'] or path.stem
+        batch_size = options['batch_size']
+
+        before = Food.objects.count()
+        skipped = 0
+        batch = []
+        with path.open(newline='', encoding='utf-8') as handle:
+            reader = csv.DictReader(handle)
+            missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f'Missing columns: {", ".join(sorted(missing))}')
+
+            for line, row in enumerate(reader, start=2):
+                try:
+                    batch.append(self.build_food(row, source))
+                except (ValueError, InvalidOperation) as exc:
+                    skipped += 1
+                    self.stderr.write(f'Line {line}: skipped ({exc})')
+                    continue
+                if len(batch) >= batch_size:
+                    self.import_batch(batch, batch_size)
+                    batch = []
+        self.import_batch(batch, batch_size)
+        clear_search_cache()
+
+        created = Food.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} new foods from {path.name} ({skipped} rows skipped)'
+        ))
+
+    def build_food(self, row, source):
+        name = (row.get('name') or '').strip()
+        if not normalize_food_name(name):
+            raise ValueError('empty name')
+
+        return Food(
+            name=name,
+            normalized_name=normalize_food_name(name),
+            brand=(row.get('brand') or '').strip(),
+            calories=int(Decimal(row['calories'])),
+            protein=Decimal(row['protein'] or 0).quantize(Decimal('0.1')),
+            carbs=Decimal(row['carbs'] or 0).quantize(Decimal('0.1')),
+            fat=Decimal(row['fat'] or 0).quantize(Decimal('0.1')),
+            serving_size_g=int(row.get('serving_size_g') or 100),
+            serving_description=(row.get('serving_description') or '').strip(),
+            source=source,
+        )
+
+    def import_batch(self, foods, batch_size):
+        """Insert new foods, skipping ones already in the catalog, then index them"""
+        if not foods:
+            return
+        with transaction.atomic():
+            # bulk_create() skips Food.save(), so search terms are built here
+            Food.objects.bulk_create(foods, batch_size=batch_size, ignore_conflicts=True)
+            keys = {(food.normalized_name, food.brand) for food in foods}
+            saved = [
+                food for food in Food.objects.filter(normalized_name__in={name for name, _ in keys})
+                if (food.normalized_name, food.brand) in keys
+            ]
+            FoodTerm.index(saved, batch_size=batch_size)
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from nutrition.models import rebuild_daily_totals
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily nutrition rollup from logged meals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', help='Only rebuild this username (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per query')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            users = dict(
+                get_user_model().objects.filter(username__in=options['user']).values_list('username', 'pk')
+            )
+            missing = set(options['user']) - set(users)
+            if missing:
+                raise CommandError(f'Unknown users: {", ".join(sorted(missing))}')
+            user_ids = list(users.values())
+
+        created = rebuild_daily_totals(user_ids=user_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} daily nutrition totals'))
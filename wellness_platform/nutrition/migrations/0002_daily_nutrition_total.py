@@ -0,0 +1,66 @@
+# Generated by Django 5.2 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_totals(apps, schema_editor, batch_size=1000):
+    """Frozen copy of the rollup rebuild as defined for this migration"""
+    Meal = apps.get_model('nutrition', 'Meal')
+    DailyNutritionTotal = apps.get_model('nutrition', 'DailyNutritionTotal')
+
+    rows = Meal.objects.values('user_id', 'meal_date').annotate(
+        meal_count=models.Count('id'),
+        total_calories=models.Sum('calories'),
+        total_protein=models.Sum('protein'),
+        total_carbs=models.Sum('carbs'),
+        total_fat=models.Sum('fat')
+    ).order_by('user_id', 'meal_date')
+
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(DailyNutritionTotal(
+            user_id=row['user_id'],
+            date=row['meal_date'],
+            meal_count=row['meal_count'],
+            calories=row['total_calories'],
+            protein=row['total_protein'],
+            carbs=row['total_carbs'],
+            fat=row['total_fat'],
+        ))
+        if len(batch) >= batch_size:
+            DailyNutritionTotal.objects.bulk_create(batch)
+            batch = []
+    DailyNutritionTotal.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nutrition', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyNutritionTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('meal_count', models.PositiveIntegerField(default=0)),
+                ('calories', models.PositiveIntegerField(default=0)),
+                ('protein', models.DecimalField(decimal_places=1, default=0, max_digits=9)),
+                ('carbs', models.DecimalField(decimal_places=1, default=0, max_digits=9)),
+                ('fat', models.DecimalField(decimal_places=1, default=0, max_digits=9)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_nutrition_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Nutrition Total',
+                'verbose_name_plural': 'Daily Nutrition Totals',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='daily_nutrition_total_unique_day')],
+            },
+        ),
+        migrations.RunPython(build_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-17 18:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nutrition', '0002_daily_nutrition_total'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Food',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(editable=False, max_length=200)),
+                ('brand', models.CharField(blank=True, max_length=100)),
+                ('calories', models.PositiveIntegerField(help_text='Calories (kcal) per 100g')),
+                ('protein', models.DecimalField(decimal_places=1, default=0, help_text='Protein per 100g', max_digits=6)),
+                ('carbs', models.DecimalField(decimal_places=1, default=0, help_text='Carbohydrates per 100g', max_digits=6)),
+                ('fat', models.DecimalField(decimal_places=1, default=0, help_text='Fat per 100g', max_digits=6)),
+                ('serving_size_g', models.PositiveIntegerField(default=100, help_text='Typical serving in grams')),
+                ('serving_description', models.CharField(blank=True, help_text='e.g., 1 medium apple', max_length=100)),
+                ('source', models.CharField(blank=True, help_text='Dataset the entry was imported from', max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Food',
+                'verbose_name_plural': 'Foods',
+                'ordering': ['name'],
+                'constraints': [models.UniqueConstraint(fields=('normalized_name', 'brand'), name='food_unique_name_brand')],
+            },
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='food',
+            field=models.ForeignKey(blank=True, help_text='Catalog entry the meal was logged from, if any', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='meals', to='nutrition.food'),
+        ),
+        migrations.CreateModel(
+            name='FoodTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='nutrition.food')),
+            ],
+            options={
+                'verbose_name': 'Food Term',
+                'verbose_name_plural': 'Food Terms',
+                'constraints': [models.UniqueConstraint(fields=('term', 'food'), name='food_term_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 18:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nutrition', '0003_food_catalog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='meal',
+            options={'ordering': ['-meal_date', '-logged_at', '-id'], 'verbose_name': 'Meal', 'verbose_name_plural': 'Meals'},
+        ),
+        migrations.RemoveIndex(
+            model_name='meal',
+            name='nutrition_m_user_id_91c3ff_idx',
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['user', 'meal_date', 'logged_at'], name='nutrition_m_user_id_83bca5_idx'),
+        ),
+    ]
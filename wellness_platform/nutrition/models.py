@@ -1,8 +1,59 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import date, timedelta
-from django.db.models import Sum
+from functools import partial
+from decimal import Decimal
+from django.db.models import Count, F, Sum
+
+from .recent_foods import invalidate_recent_foods
+
+
+# Meal fields that feed the daily rollup
+ROLLUP_FIELDS = ('user_id', 'meal_date', 'calories', 'protein', 'carbs', 'fat')
+
+
+def rebuild_daily_totals(user_ids=None, batch_size=1000):
+    """
+    Recreate the daily rollup rows from the raw meals.
+
+    Limited to ``user_ids`` when given. Returns the number of rows created.
+    """
+    meals = Meal.objects.all()
+    totals = DailyNutritionTotal.objects.all()
+    if user_ids is not None:
+        meals = meals.filter(user_id__in=user_ids)
+        totals = totals.filter(user_id__in=user_ids)
+
+    rows = meals.values('user_id', 'meal_date').annotate(
+        meal_count=Count('id'),
+        total_calories=Sum('calories'),
+        total_protein=Sum('protein'),
+        total_carbs=Sum('carbs'),
+        total_fat=Sum('fat')
+    ).order_by('user_id', 'meal_date')
+
+    with transaction.atomic():
+        totals.delete()
+        created = 0
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(DailyNutritionTotal(
+                user_id=row['user_id'],
+                date=row['meal_date'],
+                meal_count=row['meal_count'],
+                calories=row['total_calories'],
+                protein=row['total_protein'],
+                carbs=row['total_carbs'],
+                fat=row['total_fat'],
+            ))
+            if len(batch) >= batch_size:
+                DailyNutritionTotal.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        DailyNutritionTotal.objects.bulk_create(batch)
+        return created + len(batch)
 
 
 class NutritionGoal(models.Model):
@@ -26,43 +77,126 @@ class NutritionGoal(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Nutrition Goals"
 
-    def get_daily_progress(self, target_date=None):
-        """Calculate progress towards goals for a specific date"""
+    def get_daily_progress(self, target_date=None, summary=None):
+        """
+        Calculate progress towards goals for a specific date.
+
+        Pass the day's ``Meal.get_daily_summary`` as ``summary`` to reuse
+        its totals instead of querying them again.
+        """
         if target_date is None:
             target_date = date.today()
 
-        meals = Meal.objects.filter(user=self.user, meal_date=target_date)
-        totals = meals.aggregate(
-            total_calories=Sum('calories'),
-            total_protein=Sum('protein'),
-            total_carbs=Sum('carbs'),
-            total_fat=Sum('fat')
-        )
+        if summary is None:
+            summary = Meal.get_daily_summary(self.user, target_date)
 
-        return {
-            'calories': {
-                'consumed': totals['total_calories'] or 0,
-                'goal': self.calorie_goal,
-                'percentage': min(100, round((totals['total_calories'] or 0) / self.calorie_goal * 100, 1)) if self.calorie_goal > 0 else 0
-            },
-            'protein': {
-                'consumed': totals['total_protein'] or 0,
-                'goal': self.protein_goal,
-                'percentage': min(100, round((totals['total_protein'] or 0) / self.protein_goal * 100, 1)) if self.protein_goal > 0 else 0
-            },
-            'carbs': {
-                'consumed': totals['total_carbs'] or 0,
-                'goal': self.carbs_goal,
-                'percentage': min(100, round((totals['total_carbs'] or 0) / self.carbs_goal * 100, 1)) if self.carbs_goal > 0 else 0
-            },
-            'fat': {
-                'consumed': totals['total_fat'] or 0,
-                'goal': self.fat_goal,
-                'percentage': min(100, round((totals['total_fat'] or 0) / self.fat_goal * 100, 1)) if self.fat_goal > 0 else 0
+        def progress(consumed, goal):
+            return {
+                'consumed': consumed,
+                'goal': goal,
+                'percentage': min(100, round(consumed / goal * 100, 1)) if goal > 0 else 0
             }
+
+        return {
+            'calories': progress(summary['total_calories'], self.calorie_goal),
+            'protein': progress(summary['total_protein'], self.protein_goal),
+            'carbs': progress(summary['total_carbs'], self.carbs_goal),
+            'fat': progress(summary['total_fat'], self.fat_goal),
+        }
+
+
+class Food(models.Model):
+    """
+    Catalog entry with nutrition per 100g.
+
+    ``normalized_name`` is the lookup key used for de-duplication and
+    search; each word of the name and brand is also stored as a
+    ``FoodTerm`` so autocomplete is an index range scan.
+    """
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, editable=False)
+    brand = models.CharField(max_length=100, blank=True)
+
+    # Per 100g
+    calories = models.PositiveIntegerField(help_text="Calories (kcal) per 100g")
+    protein = models.DecimalField(max_digits=6, decimal_places=1, default=0, help_text="Protein per 100g")
+    carbs = models.DecimalField(max_digits=6, decimal_places=1, default=0, help_text="Carbohydrates per 100g")
+    fat = models.DecimalField(max_digits=6, decimal_places=1, default=0, help_text="Fat per 100g")
+
+    serving_size_g = models.PositiveIntegerField(default=100, help_text="Typical serving in grams")
+    serving_description = models.CharField(max_length=100, blank=True, help_text="e.g., 1 medium apple")
+    source = models.CharField(max_length=50, blank=True, help_text="Dataset the entry was imported from")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Food"
+        verbose_name_plural = "Foods"
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['normalized_name', 'brand'], name='food_unique_name_brand'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.brand})" if self.brand else self.name
+
+    def save(self, *args, **kwargs):
+        from .foods import clear_search_cache, normalize_food_name
+
+        self.normalized_name = normalize_food_name(self.name)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            FoodTerm.index([self])
+        clear_search_cache()
+
+    def delete(self, *args, **kwargs):
+        from .foods import clear_search_cache
+
+        result = super().delete(*args, **kwargs)
+        clear_search_cache()
+        return result
+
+    def get_terms(self):
+        """Words of the name and brand that search prefixes are matched against"""
+        from .foods import normalize_food_name
+        return set(normalize_food_name(f'{self.name} {self.brand}').split())
+
+    def nutrition_for(self, grams):
+        """Calories and macros for ``grams`` of this food, rounded like a Meal"""
+        factor = Decimal(grams) / 100
+        return {
+            'calories': int((self.calories * factor).quantize(Decimal('1'))),
+            'protein': (self.protein * factor).quantize(Decimal('0.1')),
+            'carbs': (self.carbs * factor).quantize(Decimal('0.1')),
+            'fat': (self.fat * factor).quantize(Decimal('0.1')),
         }
 
 
+class FoodTerm(models.Model):
+    """One word of a food's name or brand, for prefix search"""
+    food = models.ForeignKey(Food, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name = "Food Term"
+        verbose_name_plural = "Food Terms"
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'food'], name='food_term_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.food_id}"
+
+    @classmethod
+    def index(cls, foods, batch_size=1000):
+        """Replace the search terms of ``foods`` (which must be saved)"""
+        cls.objects.filter(food__in=[food.pk for food in foods]).delete()
+        cls.objects.bulk_create(
+            [cls(food_id=food.pk, term=term[:100]) for food in foods for term in food.get_terms()],
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+
+
 class Meal(models.Model):
     """Model for logging individual meals"""
     MEAL_TYPE_CHOICES = [
@@ -78,6 +212,14 @@ class Meal(models.Model):
         related_name='meals'
     )
     meal_type = models.CharField(max_length=20, choices=MEAL_TYPE_CHOICES)
+    food = models.ForeignKey(
+        Food,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='meals',
+        help_text="Catalog entry the meal was logged from, if any"
+    )
     food_name = models.CharField(max_length=200, help_text="Name or description of the food")
     portion = models.CharField(max_length=100, help_text="e.g., 1 cup, 100g, 2 slices")
 
@@ -110,37 +252,162 @@ class Meal(models.Model):
     class Meta:
         verbose_name = "Meal"
         verbose_name_plural = "Meals"
-        ordering = ['-meal_date', '-logged_at']
+        ordering = ['-meal_date', '-logged_at', '-id']
         indexes = [
-            models.Index(fields=['user', 'meal_date']),
+            # Also covers the (meal_date, logged_at, id) keyset order of meal history
+            models.Index(fields=['user', 'meal_date', 'logged_at']),
             models.Index(fields=['meal_date']),
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rollup_state = self.get_rollup_state()
+
     def __str__(self):
         return f"{self.user.username} - {self.get_meal_type_display()} - {self.food_name} ({self.meal_date})"
 
+    def get_rollup_state(self):
+        """Values this meal contributes to the daily rollup, or None if any is deferred"""
+        if any(field not in self.__dict__ for field in ROLLUP_FIELDS):
+            return None
+        # Normalized, so values assigned as strings ('500', '20.5') add up as numbers
+        try:
+            return tuple(self._meta.get_field(field).to_python(self.__dict__[field]) for field in ROLLUP_FIELDS)
+        except ValidationError:
+            # Not saveable as is; the stored values are read instead
+            return None
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None or set(ROLLUP_FIELDS) <= set(fields):
+            self._rollup_state = self.get_rollup_state()
+        else:
+            # Partly refreshed, so read the stored values again on save
+            self._rollup_state = None
+
+    def get_saved_rollup_state(self):
+        """Rollup values as currently stored in the database"""
+        return Meal.objects.filter(pk=self.pk).values_list(*ROLLUP_FIELDS).first()
+
+    def save(self, *args, **kwargs):
+        """
+        Save and move this meal's contribution in the daily rollup if it
+        changed. The user's cached recent foods are dropped either way.
+        """
+        adding = self._state.adding
+        with transaction.atomic():
+            old_state = None if adding else self._rollup_state or self.get_saved_rollup_state()
+            super().save(*args, **kwargs)
+            if kwargs.get('update_fields') is None:
+                new_state = self.get_rollup_state() or self.get_saved_rollup_state()
+            else:
+                # Unsaved changes to other fields must not reach the rollup
+                new_state = self.get_saved_rollup_state()
+
+            if new_state != old_state:
+                if old_state is not None:
+                    DailyNutritionTotal.apply(old_state, -1)
+                DailyNutritionTotal.apply(new_state, 1)
+
+        self._rollup_state = new_state
+        # After commit, so a concurrent request cannot re-cache the old meals
+        transaction.on_commit(partial(invalidate_recent_foods, self.user_id))
+
+    def delete(self, *args, **kwargs):
+        """Delete, remove this meal from the daily rollup and drop cached recent foods"""
+        with transaction.atomic():
+            state = self._rollup_state or self.get_saved_rollup_state()
+            result = super().delete(*args, **kwargs)
+            if state is not None:
+                DailyNutritionTotal.apply(state, -1)
+        transaction.on_commit(partial(invalidate_recent_foods, self.user_id))
+        return result
+
+    @classmethod
+    def get_daily_totals(cls, user, start_date, end_date):
+        """Meal count and macro totals per logged day, read from the daily rollup"""
+        rows = DailyNutritionTotal.objects.filter(
+            user=user,
+            date__gte=start_date,
+            date__lte=end_date
+        ).values_list('date', 'meal_count', 'calories', 'protein', 'carbs', 'fat')
+
+        return {
+            day: {
+                'meal_count': meal_count,
+                'total_calories': calories,
+                'total_protein': protein,
+                'total_carbs': carbs,
+                'total_fat': fat,
+            }
+            for day, meal_count, calories, protein, carbs, fat in rows
+        }
+
+    @classmethod
+    def get_range_summary(cls, user, start_date, end_date, include_meal_types=True):
+        """
+        Nutrition summary for every day from ``start_date`` to ``end_date``.
+
+        Costs one grouped query for the per-day totals plus one for the
+        meal type counts (skipped with ``include_meal_types=False``), so it
+        can back daily, weekly or longer reports alike. Days without meals
+        are included with zero totals.
+        """
+        daily_totals = cls.get_daily_totals(user, start_date, end_date)
+
+        days = []
+        totals = {'meal_count': 0, 'total_calories': 0, 'total_protein': 0, 'total_carbs': 0, 'total_fat': 0}
+        day_count = (end_date - start_date).days + 1
+        for offset in range(day_count):
+            day_date = start_date + timedelta(days=offset)
+            day = {'date': day_date, **dict.fromkeys(totals, 0), **daily_totals.get(day_date, {})}
+            for key in totals:
+                totals[key] += day[key]
+            days.append(day)
+
+        summary = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'days': days,
+            'total_meals': totals.pop('meal_count'),
+            **totals,
+        }
+        for key in ('calories', 'protein', 'carbs', 'fat'):
+            summary[f'avg_{key}_per_day'] = round(summary[f'total_{key}'] / day_count, 1) if day_count > 0 else 0
+
+        if include_meal_types:
+            meal_type_counts = dict.fromkeys((meal_type for meal_type, _ in cls.MEAL_TYPE_CHOICES), 0)
+            type_rows = cls.objects.filter(
+                user=user,
+                meal_date__gte=start_date,
+                meal_date__lte=end_date
+            ).values('meal_type').annotate(count=Count('id')).order_by()
+            for row in type_rows:
+                meal_type_counts[row['meal_type']] = row['count']
+
+            summary['meal_type_counts'] = meal_type_counts
+            summary['most_frequent_meal_type'] = (
+                max(meal_type_counts.items(), key=lambda x: x[1])[0] if summary['total_meals'] else None
+            )
+
+        return summary
+
     @classmethod
     def get_daily_summary(cls, user, target_date=None):
         """Get nutrition summary for a specific date"""
         if target_date is None:
             target_date = date.today()
 
-        meals = cls.objects.filter(user=user, meal_date=target_date)
-        totals = meals.aggregate(
-            total_calories=Sum('calories'),
-            total_protein=Sum('protein'),
-            total_carbs=Sum('carbs'),
-            total_fat=Sum('fat')
-        )
+        day = cls.get_range_summary(user, target_date, target_date, include_meal_types=False)['days'][0]
 
         return {
             'date': target_date,
-            'meal_count': meals.count(),
-            'total_calories': totals['total_calories'] or 0,
-            'total_protein': totals['total_protein'] or 0,
-            'total_carbs': totals['total_carbs'] or 0,
-            'total_fat': totals['total_fat'] or 0,
-            'meals': meals
+            'meal_count': day['meal_count'],
+            'total_calories': day['total_calories'],
+            'total_protein': day['total_protein'],
+            'total_carbs': day['total_carbs'],
+            'total_fat': day['total_fat'],
+            'meals': cls.objects.filter(user=user, meal_date=target_date)
         }
 
     @classmethod
@@ -149,37 +416,7 @@ class Meal(models.Model):
         if target_date is None:
             target_date = date.today()
 
-        start_date = target_date - timedelta(days=6)
-        meals = cls.objects.filter(
-            user=user,
-            meal_date__gte=start_date,
-            meal_date__lte=target_date
-        )
-
-        totals = meals.aggregate(
-            total_calories=Sum('calories'),
-            total_protein=Sum('protein'),
-            total_carbs=Sum('carbs'),
-            total_fat=Sum('fat')
-        )
-
-        meal_type_counts = {}
-        for meal_type, _ in cls.MEAL_TYPE_CHOICES:
-            meal_type_counts[meal_type] = meals.filter(meal_type=meal_type).count()
-
-        most_frequent_meal = max(meal_type_counts.items(), key=lambda x: x[1])[0] if meals.exists() else None
-
-        return {
-            'start_date': start_date,
-            'end_date': target_date,
-            'total_meals': meals.count(),
-            'avg_calories_per_day': round((totals['total_calories'] or 0) / 7, 1),
-            'avg_protein_per_day': round((totals['total_protein'] or 0) / 7, 1),
-            'avg_carbs_per_day': round((totals['total_carbs'] or 0) / 7, 1),
-            'avg_fat_per_day': round((totals['total_fat'] or 0) / 7, 1),
-            'most_frequent_meal_type': most_frequent_meal,
-            'meal_type_counts': meal_type_counts
-        }
+        return cls.get_range_summary(user, target_date - timedelta(days=6), target_date)
 
     def get_meal_type_emoji(self):
         """Return emoji for meal type"""
@@ -190,3 +427,83 @@ class Meal(models.Model):
             'snack': '🍎'
         }
         return emoji_map.get(self.meal_type, '🍴')
+
+
+class DailyNutritionTotal(models.Model):
+    """
+    Per-user, per-day rollup of logged meals.
+
+    Kept in step by ``Meal.save`` and ``Meal.delete``, so range reports
+    read one row per day instead of every meal. Queryset ``update()``,
+    ``delete()`` and ``bulk_create()`` on meals bypass it; run
+    ``manage.py rebuild_nutrition_totals`` after those.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_nutrition_totals'
+    )
+    date = models.DateField()
+    meal_count = models.PositiveIntegerField(default=0)
+    calories = models.PositiveIntegerField(default=0)
+    protein = models.DecimalField(max_digits=9, decimal_places=1, default=0)
+    carbs = models.DecimalField(max_digits=9, decimal_places=1, default=0)
+    fat = models.DecimalField(max_digits=9, decimal_places=1, default=0)
+
+    class Meta:
+        verbose_name = "Daily Nutrition Total"
+        verbose_name_plural = "Daily Nutrition Totals"
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='daily_nutrition_total_unique_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}: {self.calories} kcal from {self.meal_count} meals"
+
+    @classmethod
+    def apply(cls, state, sign):
+        """Add (``sign=1``) or remove (``sign=-1``) one meal's values from its day"""
+        user_id, day, calories, protein, carbs, fat = state
+        changes = {
+            'meal_count': F('meal_count') + sign,
+            'calories': F('calories') + sign * calories,
+            'protein': F('protein') + sign * protein,
+            'carbs': F('carbs') + sign * carbs,
+            'fat': F('fat') + sign * fat,
+        }
+
+        if cls.objects.filter(user_id=user_id, date=day).update(**changes):
+            if sign < 0:
+                cls.objects.filter(user_id=user_id, date=day, meal_count=0).delete()
+            return
+
+        if sign < 0:
+            # Nothing to remove from: the rollup was out of date
+            cls.rebuild_day(user_id, day)
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    user_id=user_id, date=day, meal_count=1,
+                    calories=calories, protein=protein, carbs=carbs, fat=fat
+                )
+        except IntegrityError:
+            # Another request created the row first
+            cls.objects.filter(user_id=user_id, date=day).update(**changes)
+
+    @classmethod
+    def rebuild_day(cls, user_id, day):
+        """Recompute one day from its meals"""
+        totals = Meal.objects.filter(user_id=user_id, meal_date=day).aggregate(
+            meal_count=Count('id'),
+            calories=Sum('calories'),
+            protein=Sum('protein'),
+            carbs=Sum('carbs'),
+            fat=Sum('fat')
+        )
+        if totals['meal_count']:
+            cls.objects.update_or_create(user_id=user_id, date=day, defaults=totals)
+        else:
+            cls.objects.filter(user_id=user_id, date=day).delete()
@@ -0,0 +1,105 @@
+"""
+Each user's recently and frequently logged foods, for one-click re-logging.
+
+The list is built from the last ``RECENT_FOODS_DAYS`` days of meals with a
+single query and kept in the default cache. ``Meal.save`` and
+``Meal.delete`` drop it, so it is rebuilt on the next read after any
+change; the timeout only bounds how long a list outlives the window
+moving past old meals.
+"""
+import hashlib
+from datetime import date, timedelta
+
+from django.core.cache import cache
+
+
+RECENT_FOODS_DAYS = 14
+RECENT_FOODS_LIMIT = 8
+RECENT_FOODS_TIMEOUT = 60 * 60
+
+# What makes two meals "the same food" for re-logging
+RECENT_FOOD_FIELDS = ('food_id', 'food_name', 'portion', 'calories', 'protein', 'carbs', 'fat')
+
+
+def get_cache_key(user_id):
+    return f'nutrition:recent_foods:{user_id}'
+
+
+def get_entry_key(values):
+    """Short stable id for one (food, portion, macros) combination"""
+    raw = '|'.join(str(value) for value in values)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+
+def build_recent_foods(user_id, today=None, limit=RECENT_FOODS_LIMIT):
+    """Most often logged foods in the window, ties broken by the latest"""
+    from .models import Meal
+
+    today = today or date.today()
+    rows = Meal.objects.filter(
+        user_id=user_id,
+        meal_date__gte=today - timedelta(days=RECENT_FOODS_DAYS - 1),
+        meal_date__lte=today
+    ).order_by('-meal_date', '-logged_at').values_list('meal_type', 'meal_date', *RECENT_FOOD_FIELDS)
+
+    entries = {}
+    for meal_type, meal_date, *values in rows:
+        key = get_entry_key(values)
+        if key in entries:
+            entries[key]['times'] += 1
+            continue
+        # Rows arrive newest first, so the first one sets the meal type to reuse
+        entries[key] = {
+            'key': key,
+            **dict(zip(RECENT_FOOD_FIELDS, values)),
+            'meal_type': meal_type,
+            'last_date': meal_date,
+            'times': 1,
+            'rank': len(entries),
+        }
+
+    ranked = sorted(entries.values(), key=lambda entry: (-entry['times'], entry['rank']))
+    return [{k: v for k, v in entry.items() if k != 'rank'} for entry in ranked[:limit]]
+
+
+def get_recent_foods(user_id):
+    """Cached recent foods for a user"""
+    key = get_cache_key(user_id)
+    entries = cache.get(key)
+    if entries is None:
+        entries = build_recent_foods(user_id)
+        cache.set(key, entries, timeout=RECENT_FOODS_TIMEOUT)
+    return entries
+
+
+def invalidate_recent_foods(user_id):
+    cache.delete(get_cache_key(user_id))
+
+
+def log_again(user, key, meal_type=None, meal_date=None):
+    """
+    Log a new meal copied from the recent food ``key``.
+
+    Returns the meal, or None if ``key`` is not among the user's recent
+    foods any more.
+    """
+    from .models import Food, Meal
+
+    entry = next((entry for entry in get_recent_foods(user.pk) if entry['key'] == key), None)
+    if entry is None:
+        return None
+
+    if meal_type not in dict(Meal.MEAL_TYPE_CHOICES):
+        meal_type = entry['meal_type']
+
+    values = {field: entry[field] for field in RECENT_FOOD_FIELDS}
+    if values['food_id'] and not Food.objects.filter(pk=values['food_id']).exists():
+        # The catalog entry was deleted after the list was cached
+        values['food_id'] = None
+
+    return Meal.objects.create(
+        user=user,
+        meal_type=meal_type,
+        meal_date=meal_date or date.today(),
+        **values
+    )
@@ -1,3 +1,432 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .foods import clear_search_cache, normalize_food_name, search_foods
+from .models import DailyNutritionTotal, Food, Meal, NutritionGoal, rebuild_daily_totals
+from .recent_foods import get_recent_foods, invalidate_recent_foods
+
+
+User = get_user_model()
+
+
+class RangeSummaryTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='eater', password='pass12345')
+        self.today = date.today()
+
+    def add_meal(self, day, meal_type='lunch', calories=500, protein='20.0'):
+        return Meal.objects.create(
+            user=self.user, meal_type=meal_type, food_name='Food', portion='1',
+            calories=calories, protein=Decimal(protein), carbs=Decimal('10.0'), fat=Decimal('5.0'),
+            meal_date=day
+        )
+
+    def test_totals_per_day_and_type(self):
+        start = self.today - timedelta(days=6)
+        self.add_meal(start, 'breakfast', 300)
+        self.add_meal(start, 'lunch', 700)
+        self.add_meal(self.today, 'lunch', 400)
+        self.add_meal(start - timedelta(days=1), 'dinner', 900)  # outside the window
+
+        with self.assertNumQueries(2):
+            summary = Meal.get_range_summary(self.user, start, self.today)
+
+        self.assertEqual(len(summary['days']), 7)
+        self.assertEqual(summary['days'][0]['total_calories'], 1000)
+        self.assertEqual(summary['days'][0]['meal_count'], 2)
+        self.assertEqual(summary['days'][1]['meal_count'], 0)
+        self.assertEqual(summary['total_meals'], 3)
+        self.assertEqual(summary['total_calories'], 1400)
+        self.assertEqual(summary['avg_calories_per_day'], 200)
+        self.assertEqual(summary['meal_type_counts'], {'breakfast': 1, 'lunch': 2, 'dinner': 0, 'snack': 0})
+        self.assertEqual(summary['most_frequent_meal_type'], 'lunch')
+
+    def test_daily_summary_and_progress(self):
+        self.add_meal(self.today, calories=1000, protein='25.0')
+        goal = NutritionGoal.objects.create(user=self.user, calorie_goal=2000, protein_goal=50)
+
+        summary = Meal.get_daily_summary(self.user, self.today)
+        with self.assertNumQueries(0):
+            progress = goal.get_daily_progress(self.today, summary)
+
+        self.assertEqual(summary['meal_count'], 1)
+        self.assertEqual(progress['calories']['percentage'], 50)
+        self.assertEqual(progress['protein']['consumed'], Decimal('25.0'))
+        self.assertEqual(goal.get_daily_progress(self.today), progress)
+
+    def test_weekly_view_query_count_does_not_grow(self):
+        self.client.force_login(self.user)
+        url = reverse('nutrition:weekly_summary')
+
+        self.add_meal(self.today)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+
+        for offset in range(7):
+            for meal_type in ('breakfast', 'lunch', 'dinner'):
+                self.add_meal(self.today - timedelta(days=offset), meal_type)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+
+        self.assertEqual(response.context['summary']['total_meals'], 22)
+        self.assertEqual(len(small), len(large))
+
+
+class DailyNutritionTotalTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollup', password='pass12345')
+        self.today = date.today()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def add_meal(self, day, calories=500):
+        return Meal.objects.create(
+            user=self.user, meal_type='lunch', food_name='Food', portion='1',
+            calories=calories, protein=Decimal('20.5'), carbs=Decimal('10.0'), fat=Decimal('5.0'),
+            meal_date=day
+        )
+
+    def rollup(self):
+        return {
+            total.date: (total.meal_count, total.calories, total.protein)
+            for total in DailyNutritionTotal.objects.filter(user=self.user)
+        }
+
+    def assertMatchesRebuild(self):
+        maintained = self.rollup()
+        rebuild_daily_totals(user_ids=[self.user.pk])
+        self.assertEqual(maintained, self.rollup())
+
+    def test_create_edit_and_delete(self):
+        first = self.add_meal(self.today, 300)
+        second = self.add_meal(self.today, 200)
+        self.assertEqual(self.rollup(), {self.today: (2, 500, Decimal('41.0'))})
+
+        second.calories = 250
+        second.save()
+        self.assertEqual(self.rollup()[self.today][1], 550)
+
+        first.delete()
+        self.assertEqual(self.rollup(), {self.today: (1, 250, Decimal('20.5'))})
+        second.delete()
+        self.assertEqual(self.rollup(), {})
+
+    def test_string_values_are_removed_again(self):
+        self.add_meal(self.today, 100)
+        before = self.rollup()
+
+        meal = Meal.objects.create(
+            user=self.user, meal_type='snack', food_name='Bar', portion='1', calories='500',
+            protein='20.5', carbs='3', fat='1.5', meal_date=self.today.isoformat()
+        )
+        self.assertEqual(self.rollup(), {self.today: (2, 600, Decimal('41.0'))})
+        meal.delete()
+        self.assertEqual(self.rollup(), before)
+
+    def test_edit_view_moves_meal_between_days(self):
+        meal = self.add_meal(self.today, 400)
+        self.add_meal(self.today, 100)
+        self.client.force_login(self.user)
+
+        self.client.post(reverse('nutrition:meal_edit', args=[meal.pk]), {
+            'meal_type': 'dinner', 'food_name': 'Soup', 'portion': '1 bowl', 'calories': 450,
+            'protein': '20.5', 'carbs': '10.0', 'fat': '5.0', 'meal_date': self.yesterday.isoformat(),
+        })
+
+        self.assertEqual(self.rollup(), {
+            self.today: (1, 100, Decimal('20.5')),
+            self.yesterday: (1, 450, Decimal('20.5')),
+        })
+        self.assertMatchesRebuild()
+
+    def test_deferred_and_partial_saves(self):
+        meal = self.add_meal(self.today, 300)
+        self.add_meal(self.today, 100)
+
+        deferred = Meal.objects.only('pk', 'notes').get(pk=meal.pk)
+        deferred.notes = 'Tasty'
+        deferred.save()
+        deferred.calories = 350
+        deferred.save(update_fields=['calories'])
+
+        meal.refresh_from_db()
+        meal.calories = 999  # not saved below
+        meal.save(update_fields=['notes'])
+
+        self.assertEqual(self.rollup(), {self.today: (2, 450, Decimal('41.0'))})
+        self.assertMatchesRebuild()
+
+    def test_summary_reads_rollup(self):
+        for _ in range(20):
+            self.add_meal(self.today)
+        summary = Meal.get_daily_summary(self.user, self.today)
+        self.assertEqual((summary['meal_count'], summary['total_calories']), (20, 10000))
+
+
+class NutritionTrendsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='trends', password='pass12345')
+        self.today = date(2026, 3, 15)  # a Sunday
+
+    def add_day(self, day, calories, protein='50.0', carbs='100.0', fat='20.0'):
+        Meal.objects.create(
+            user=self.user, meal_type='lunch', food_name='Food', portion='1',
+            calories=calories, protein=Decimal(protein), carbs=Decimal(carbs), fat=Decimal(fat),
+            meal_date=day
+        )
+
+    def test_report(self):
+        from .trends import NutritionTrends
+
+        goal = NutritionGoal.objects.create(user=self.user, calorie_goal=2000, protein_goal=60)
+        self.add_day(self.today - timedelta(days=2), 2000)
+        self.add_day(self.today - timedelta(days=1), 1000, protein='80.0')
+        # today is not logged
+
+        with self.assertNumQueries(1):
+            report = NutritionTrends(self.user, self.today - timedelta(days=6), self.today, goal).as_dict()
+
+        self.assertEqual(report['summary']['logged_days'], 2)
+        self.assertEqual(report['summary']['avg_calories'], 1500)
+        # Unlogged days do not count as zero intake
+        self.assertEqual(report['series']['calories_7d'][-1], 1500)
+        self.assertIsNone(report['series']['calories'][-1])
+        self.assertIsNone(report['series']['calories_7d'][0])
+        self.assertEqual(report['goal_adherence']['calories'], 50)
+        self.assertEqual(report['goal_adherence']['protein'], 50)
+        # protein 130g * 4, carbs 200g * 4, fat 40g * 9
+        self.assertEqual(report['macro_ratios'], {'protein': 31.0, 'carbs': 47.6, 'fat': 21.4})
+        self.assertEqual(report['weekdays'][4]['calories'], 2000)  # Friday
+        self.assertEqual(report['monthly'][-1]['logged_days'], 2)
+        self.assertEqual(report['yearly'][0]['meals'], 2)
+
+    def test_views(self):
+        self.client.force_login(self.user)
+        self.add_day(date.today(), 1800)
+
+        response = self.client.get(reverse('nutrition:nutrition_trends_data'), {'period': '5y'})
+        data = response.json()
+        self.assertEqual(data['period'], '5y')
+        self.assertEqual(len(data['series']['dates']), 1826)
+        self.assertEqual(data['summary']['total_meals'], 1)
+
+        response = self.client.get(reverse('nutrition:nutrition_trends'), {'period': 'bogus'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['period'], '1y')
+
+
+class FoodCatalogTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('import_foods', stdout=StringIO())
+        cls.user = User.objects.create_user(username='catalog', password='pass12345')
+
+    def setUp(self):
+        # The cache lives in the process and outlasts each test's rollback
+        clear_search_cache()
+
+    def test_import_is_idempotent(self):
+        count = Food.objects.count()
+        self.assertGreater(count, 50)
+
+        out = StringIO()
+        call_command('import_foods', stdout=out)
+        self.assertEqual(Food.objects.count(), count)
+        self.assertIn('Imported 0 new foods', out.getvalue())
+
+    def test_prefix_search(self):
+        self.assertEqual(normalize_food_name('  Crème   Brûlée! '), 'creme brulee')
+
+        names = [food['name'] for food in search_foods('chick')]
+        self.assertEqual(names[:2], ['Chickpeas cooked', 'Chicken thigh roasted'])
+        self.assertIn('Caesar salad with chicken', names)
+
+        names = [food['name'] for food in search_foods('CHICK bre')]
+        self.assertEqual(names, ['Chicken breast grilled'])
+        self.assertEqual(search_foods('  '), [])
+
+    def test_search_cache(self):
+        search_foods('salm')
+        with self.assertNumQueries(0):
+            self.assertEqual(search_foods('Salm')[0]['name'], 'Salmon baked')
+
+        # Saving a food clears the cache
+        Food.objects.create(name='Salmon smoked', calories=117, protein='18.3')
+        self.assertEqual(len(search_foods('salm')), 2)
+
+    def test_search_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('nutrition:food_search'), {'q': 'banana'})
+        result = response.json()['results'][0]
+
+        self.assertEqual(result['name'], 'Banana')
+        self.assertEqual(result['serving_description'], '1 medium banana')
+        self.assertEqual(result['serving']['calories'], 105)  # 118g at 89 kcal/100g
+
+    def test_meal_form_fills_from_food(self):
+        food = Food.objects.get(name='Banana')
+        self.client.force_login(self.user)
+
+        self.client.post(reverse('nutrition:meal_log'), {
+            'meal_type': 'snack', 'food': food.pk, 'meal_date': date.today().isoformat(),
+        })
+
+        meal = Meal.objects.get(user=self.user)
+        self.assertEqual(meal.food, food)
+        self.assertEqual((meal.food_name, meal.portion, meal.calories), ('Banana', '1 medium banana', 105))
+        self.assertEqual(meal.carbs, Decimal('26.9'))
+
+    def test_meal_form_requires_name_without_food(self):
+        from .forms import MealForm
+
+        form = MealForm({'meal_type': 'snack', 'calories': 100, 'meal_date': date.today().isoformat()})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(set(form.errors), {'food_name', 'portion', 'protein', 'carbs', 'fat'})
+
+
+class RecentFoodsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='regular', password='pass12345')
+        self.today = date.today()
+        invalidate_recent_foods(self.user.pk)
+
+    def add_meal(self, food_name, days_ago=0, meal_type='lunch', calories=300):
+        return Meal.objects.create(
+            user=self.user, meal_type=meal_type, food_name=food_name, portion='1 bowl',
+            calories=calories, protein=Decimal('10.0'), carbs=Decimal('40.0'), fat=Decimal('8.0'),
+            meal_date=self.today - timedelta(days=days_ago)
+        )
+
+    def test_ranked_by_frequency_then_recency(self):
+        self.add_meal('Porridge', days_ago=3, meal_type='breakfast')
+        self.add_meal('Porridge', days_ago=1, meal_type='breakfast')
+        self.add_meal('Soup', days_ago=0)
+        self.add_meal('Porridge', days_ago=2, calories=450)  # different macros, separate entry
+        self.add_meal('Curry', days_ago=30)  # outside the window
+
+        foods = get_recent_foods(self.user.pk)
+        self.assertEqual([(f['food_name'], f['times']) for f in foods], [('Porridge', 2), ('Soup', 1), ('Porridge', 1)])
+        self.assertEqual(foods[0]['meal_type'], 'breakfast')
+
+        with self.assertNumQueries(0):
+            get_recent_foods(self.user.pk)
+
+    def test_meal_changes_invalidate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            meal = self.add_meal('Soup')
+        self.assertEqual(len(get_recent_foods(self.user.pk)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_meal('Salad')
+        self.assertEqual(len(get_recent_foods(self.user.pk)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            meal.delete()
+        self.assertEqual([f['food_name'] for f in get_recent_foods(self.user.pk)], ['Salad'])
+
+    def test_invalidated_after_commit(self):
+        self.add_meal('Soup')
+        get_recent_foods(self.user.pk)
+
+        # Until the meal commits, a concurrent request would re-cache the old meals
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.add_meal('Salad')
+            with self.assertNumQueries(0):
+                self.assertEqual(len(get_recent_foods(self.user.pk)), 1)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(get_recent_foods(self.user.pk)), 2)
+
+    def test_log_again(self):
+        self.add_meal('Porridge', days_ago=1, meal_type='breakfast')
+        key = get_recent_foods(self.user.pk)[0]['key']
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('nutrition:meal_log_again'), {'key': key})
+        self.assertRedirects(response, reverse('nutrition:daily_summary'))
+        meal = Meal.objects.get(user=self.user, meal_date=self.today)
+        self.assertEqual((meal.food_name, meal.meal_type, meal.protein), ('Porridge', 'breakfast', Decimal('10.0')))
+        self.assertEqual(DailyNutritionTotal.objects.get(user=self.user, date=self.today).calories, 300)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('nutrition:meal_log_again'),
+                {'key': key, 'meal_type': 'snack'},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['meal_type'], 'snack')
+        self.assertEqual(get_recent_foods(self.user.pk)[0]['times'], 3)
+
+        response = self.client.post(reverse('nutrition:meal_log_again'), {'key': 'missing'}, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+class MealHistoryPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='history', password='pass12345')
+        self.client.force_login(self.user)
+        self.today = date.today()
+
+    def add_meals(self, count, meal_type='lunch'):
+        # Several meals per day so rows share meal_date and need the tie-breakers
+        for i in range(count):
+            Meal.objects.create(
+                user=self.user, meal_type=meal_type, food_name=f'{meal_type} {i}', portion='1',
+                calories=100, meal_date=self.today - timedelta(days=i // 3)
+            )
+
+    def test_pages_cover_history_once_without_count(self):
+        from .views import MEAL_HISTORY_PAGE_SIZE
+
+        self.add_meals(MEAL_HISTORY_PAGE_SIZE + 20)
+        url = reverse('nutrition:meal_history')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+        first = [meal.pk for meal in response.context['meals']]
+        self.assertEqual(len(first), MEAL_HISTORY_PAGE_SIZE)
+
+        response = self.client.get(url, {'cursor': response.context['next_cursor']})
+        second = [meal.pk for meal in response.context['meals']]
+        self.assertEqual(len(second), 20)
+        self.assertIsNone(response.context['next_cursor'])
+
+        expected = list(Meal.objects.filter(user=self.user).values_list('pk', flat=True))
+        self.assertEqual(first + second, expected)
+
+    def test_json_variant_keeps_filter(self):
+        self.add_meals(3, 'dinner')
+        self.add_meals(2, 'breakfast')
+        url = reverse('nutrition:meal_history_data')
+
+        with patch('nutrition.views.MEAL_HISTORY_PAGE_SIZE', 2):
+            data = self.client.get(url, {'meal_type': 'dinner'}).json()
+            self.assertEqual(len(data['meals']), 2)
+            data = self.client.get(url, {'meal_type': 'dinner', 'cursor': data['next_cursor']}).json()
+
+        self.assertEqual([meal['meal_type'] for meal in data['meals']], ['dinner'])
+        self.assertIsNone(data['next_cursor'])
+        self.assertIn('dinner 0', data['html'])  # the first one logged comes last
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('nutrition:meal_history_data'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
 
-# Create your tests here.
+        response = self.client.get(reverse('nutrition:meal_history'), {'cursor': 'bad', 'meal_type': 'snack'})
+        self.assertRedirects(response, reverse('nutrition:meal_history') + '?meal_type=snack')
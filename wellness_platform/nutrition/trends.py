@@ -0,0 +1,191 @@
+"""
+Long-range nutrition trends computed with pandas.
+
+The user's rows from the daily rollup are loaded once into a frame
+indexed by day. Every statistic is then a vectorized operation on that
+frame, so a five year window costs one query and a few milliseconds of
+NumPy work instead of a loop over the days.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .models import DailyNutritionTotal
+
+
+# Window lengths offered by the trends page, in days
+TREND_PERIODS = {
+    '3m': 91,
+    '1y': 365,
+    '2y': 730,
+    '5y': 1826,
+}
+DEFAULT_TREND_PERIOD = '1y'
+
+ROLLING_WINDOWS = (7, 30)
+
+# Energy per gram of each macro (kcal)
+MACRO_CALORIES = {'protein': 4, 'carbs': 4, 'fat': 9}
+
+# A day meets the calorie goal when it is within this share of the target
+CALORIE_GOAL_TOLERANCE = 0.10
+
+NUTRIENTS = ['calories', 'protein', 'carbs', 'fat']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def to_number(value, digits=1):
+    """Round a NumPy scalar for JSON, turning NaN into None"""
+    if value is None or pd.isna(value):
+        return None
+    return round(float(value), digits)
+
+
+def to_list(series, digits=1):
+    """Round a series for JSON, turning NaN into None"""
+    values = series.to_numpy(dtype=float).round(digits)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def to_records(frame, digits=1):
+    """Round a frame into a list of dicts for JSON, turning NaN into None"""
+    rounded = frame.round(digits).astype(object)
+    return rounded.where(frame.notna(), None).to_dict('records')
+
+
+class NutritionTrends:
+    """
+    Trend report for one user over ``start_date`` to ``end_date``.
+
+    Days without any logged meals are treated as missing rather than as
+    zero intake, so they do not drag averages down.
+    """
+
+    def __init__(self, user, start_date, end_date, goal=None):
+        self.user = user
+        self.start_date = start_date
+        self.end_date = end_date
+        self.goal = goal
+        self.frame = self.load_frame()
+
+    @classmethod
+    def for_period(cls, user, period=DEFAULT_TREND_PERIOD, end_date=None, goal=None):
+        """Report for one of ``TREND_PERIODS`` ending on ``end_date`` (default today)"""
+        end_date = end_date or date.today()
+        start_date = end_date - timedelta(days=TREND_PERIODS[period] - 1)
+        return cls(user, start_date, end_date, goal)
+
+    def load_frame(self):
+        """One row per calendar day in the window; unlogged days are NaN"""
+        # Cast in SQL so rows arrive as floats rather than Decimals
+        rows = DailyNutritionTotal.objects.filter(
+            user=self.user,
+            date__gte=self.start_date,
+            date__lte=self.end_date
+        ).annotate(
+            **{f'{nutrient}_value': Cast(nutrient, FloatField()) for nutrient in NUTRIENTS}
+        ).values_list('date', 'meal_count', *(f'{nutrient}_value' for nutrient in NUTRIENTS))
+
+        frame = pd.DataFrame.from_records(list(rows), columns=['date', 'meal_count', *NUTRIENTS])
+        frame['date'] = pd.to_datetime(frame['date'])
+        frame = frame.set_index('date').astype(float)
+        return frame.reindex(pd.date_range(self.start_date, self.end_date, freq='D'))
+
+    @property
+    def logged(self):
+        """Only the days with at least one meal"""
+        return self.frame.dropna(subset=['meal_count'])
+
+    def rolling_averages(self):
+        """Rolling mean of each nutrient over the logged days in each window"""
+        return {
+            f'{nutrient}_{window}d': self.frame[nutrient].rolling(window, min_periods=1).mean()
+            for window in ROLLING_WINDOWS
+            for nutrient in NUTRIENTS
+        }
+
+    def macro_ratios(self):
+        """Share of macro energy from protein, carbs and fat, in percent"""
+        frame = self.logged
+        energy = {macro: frame[macro].sum() * factor for macro, factor in MACRO_CALORIES.items()}
+        total = sum(energy.values())
+        if not total:
+            return {macro: None for macro in MACRO_CALORIES}
+        return {macro: to_number(value / total * 100) for macro, value in energy.items()}
+
+    def goal_adherence(self):
+        """Percentage of logged days that met the calorie and macro goals"""
+        logged = self.logged
+        if self.goal is None or logged.empty:
+            return None
+
+        calorie_goal = self.goal.calorie_goal
+        within = (logged['calories'] - calorie_goal).abs() <= calorie_goal * CALORIE_GOAL_TOLERANCE
+        return {
+            'calories': to_number(within.mean() * 100),
+            'protein': to_number((logged['protein'] >= self.goal.protein_goal).mean() * 100),
+            'carbs': to_number((logged['carbs'] <= self.goal.carbs_goal).mean() * 100),
+            'fat': to_number((logged['fat'] <= self.goal.fat_goal).mean() * 100),
+        }
+
+    def weekday_pattern(self):
+        """Average intake and logging rate for each day of the week"""
+        frame = self.frame
+        weekday = frame.index.dayofweek
+        averages = frame[NUTRIENTS].groupby(weekday).mean()
+        logging_rate = frame['meal_count'].notna().groupby(weekday).mean() * 100
+
+        return [
+            {
+                'weekday': WEEKDAYS[day],
+                'logged_pct': to_number(logging_rate.get(day)),
+                **{nutrient: to_number(averages[nutrient].get(day)) for nutrient in NUTRIENTS},
+            }
+            for day in range(7)
+        ]
+
+    def periods(self, freq):
+        """Per month (``'MS'``) or per year (``'YS'``) averages over logged days"""
+        grouped = self.frame.resample(freq)
+        table = grouped[NUTRIENTS].mean()
+        table.insert(0, 'meals', grouped['meal_count'].sum().astype(int))
+        table.insert(0, 'logged_days', grouped['meal_count'].count())
+        table.insert(0, 'period', table.index.strftime('%Y-%m-%d'))
+        return to_records(table)
+
+    def summary(self):
+        """Averages per logged day over the whole window"""
+        logged = self.logged
+        total_days = len(self.frame)
+        return {
+            'days': total_days,
+            'logged_days': len(logged),
+            'logged_pct': to_number(len(logged) / total_days * 100) if total_days else None,
+            'total_meals': int(logged['meal_count'].sum()),
+            **{f'avg_{nutrient}': to_number(logged[nutrient].mean()) for nutrient in NUTRIENTS},
+        }
+
+    def as_dict(self, include_series=True):
+        """Full report; ``include_series`` adds the per-day series for charts"""
+        report = {
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'summary': self.summary(),
+            'macro_ratios': self.macro_ratios(),
+            'goal_adherence': self.goal_adherence(),
+            'weekdays': self.weekday_pattern(),
+            'monthly': self.periods('MS'),
+            'yearly': self.periods('YS'),
+        }
+
+        if include_series:
+            series = {nutrient: self.frame[nutrient] for nutrient in NUTRIENTS}
+            series.update(self.rolling_averages())
+            report['series'] = {
+                'dates': self.frame.index.strftime('%Y-%m-%d').tolist(),
+                **{name: to_list(values) for name, values in series.items()},
+            }
+        return report
@@ -6,9 +6,14 @@ app_name = 'nutrition'
 urlpatterns = [
     path('', views.daily_summary, name='daily_summary'),
     path('log/', views.meal_log, name='meal_log'),
+    path('log/again/', views.meal_log_again, name='meal_log_again'),
+    path('foods/search/', views.food_search, name='food_search'),
     path('meal/<int:pk>/edit/', views.meal_edit, name='meal_edit'),
     path('meal/<int:pk>/delete/', views.meal_delete, name='meal_delete'),
     path('weekly/', views.weekly_summary, name='weekly_summary'),
+    path('trends/', views.nutrition_trends, name='nutrition_trends'),
+    path('trends/data/', views.nutrition_trends_data, name='nutrition_trends_data'),
     path('history/', views.meal_history, name='meal_history'),
+    path('history/data/', views.meal_history_data, name='meal_history_data'),
     path('goals/', views.nutrition_goals, name='nutrition_goals'),
 ]
@@ -1,9 +1,23 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
 from datetime import date, timedelta
+import json
 from .models import Meal, NutritionGoal
 from .forms import MealForm, NutritionGoalForm
+from .foods import DEFAULT_SEARCH_RESULTS, search_foods
+from .recent_foods import get_recent_foods, log_again
+from wellnessapp.pagination import InvalidCursor, KeysetPaginator
+
+
+# Meal history is paged newest first on these fields; the last one breaks ties
+MEAL_HISTORY_ORDERING = ('meal_date', 'logged_at', 'id')
+MEAL_HISTORY_PAGE_SIZE = 50
 
 
 @login_required
@@ -21,7 +35,56 @@ def meal_log(request):
         # Pre-fill with today's date
         form = MealForm(initial={'meal_date': date.today()})
 
-    return render(request, 'nutrition/meal_log.html', {'form': form})
+    return render(request, 'nutrition/meal_log.html', {
+        'form': form,
+        'recent_foods': get_recent_foods(request.user.pk),
+    })
+
+
+@login_required
+@require_POST
+def meal_log_again(request):
+    """Log a recent food again in one click (form POST or JSON)"""
+    wants_json = request.content_type == 'application/json'
+    if wants_json:
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    else:
+        data = request.POST
+
+    meal = log_again(request.user, data.get('key'), meal_type=data.get('meal_type'))
+
+    if wants_json:
+        if meal is None:
+            return JsonResponse({'error': 'That food is no longer in your recent foods'}, status=404)
+        return JsonResponse({
+            'id': meal.pk,
+            'meal_type': meal.meal_type,
+            'food_name': meal.food_name,
+            'calories': meal.calories,
+            'meal_date': meal.meal_date.isoformat(),
+        }, status=201)
+
+    if meal is None:
+        messages.error(request, 'That food is no longer in your recent foods')
+        return redirect('nutrition:meal_log')
+    messages.success(request, f'✅ {meal.food_name} logged again as {meal.get_meal_type_display().lower()}!')
+    return redirect('nutrition:daily_summary')
+
+
+@login_required
+def food_search(request):
+    """Autocomplete for the meal form: catalog foods matching ``?q=``"""
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_SEARCH_RESULTS))
+    except ValueError:
+        limit = DEFAULT_SEARCH_RESULTS
+
+    return JsonResponse({'results': search_foods(request.GET.get('q', ''), limit)})
 
 
 @login_required
@@ -78,7 +141,7 @@ def daily_summary(request):
     # Get user's nutrition goals if they exist
     try:
         nutrition_goal = request.user.nutrition_goal
-        progress = nutrition_goal.get_daily_progress(selected_date)
+        progress = nutrition_goal.get_daily_progress(selected_date, summary)
     except NutritionGoal.DoesNotExist:
         nutrition_goal = None
         progress = None
@@ -126,19 +189,18 @@ def weekly_summary(request):
     prev_week_end = end_date - timedelta(days=7)
     next_week_end = end_date + timedelta(days=7)
 
-    # Get daily data for the week for visualization
-    daily_data = []
-    for i in range(7):
-        day_date = summary['start_date'] + timedelta(days=i)
-        day_summary = Meal.get_daily_summary(request.user, day_date)
-        daily_data.append({
-            'date': day_date,
-            'calories': day_summary['total_calories'],
-            'protein': day_summary['total_protein'],
-            'carbs': day_summary['total_carbs'],
-            'fat': day_summary['total_fat'],
-            'meal_count': day_summary['meal_count'],
-        })
+    # Daily data for the week for visualization
+    daily_data = [
+        {
+            'date': day['date'],
+            'calories': day['total_calories'],
+            'protein': day['total_protein'],
+            'carbs': day['total_carbs'],
+            'fat': day['total_fat'],
+            'meal_count': day['meal_count'],
+        }
+        for day in summary['days']
+    ]
 
     context = {
         'summary': summary,
@@ -153,6 +215,46 @@ def weekly_summary(request):
     return render(request, 'nutrition/weekly_summary.html', context)
 
 
+def get_trends(request):
+    """Build the trend report for the period and end date in the query string"""
+    from .trends import DEFAULT_TREND_PERIOD, TREND_PERIODS, NutritionTrends
+
+    period = request.GET.get('period', DEFAULT_TREND_PERIOD)
+    if period not in TREND_PERIODS:
+        period = DEFAULT_TREND_PERIOD
+
+    try:
+        end_date = date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        end_date = date.today()
+
+    goal = NutritionGoal.objects.filter(user=request.user).first()
+    return period, NutritionTrends.for_period(request.user, period, end_date, goal)
+
+
+@login_required
+def nutrition_trends(request):
+    """Monthly, yearly and weekday nutrition trends"""
+    from .trends import TREND_PERIODS
+
+    period, trends = get_trends(request)
+
+    context = {
+        'period': period,
+        'periods': TREND_PERIODS,
+        'report': trends.as_dict(include_series=False),
+        'nutrition_goal': trends.goal,
+    }
+    return render(request, 'nutrition/trends.html', context)
+
+
+@login_required
+def nutrition_trends_data(request):
+    """Trend report with per-day and rolling average series as JSON"""
+    period, trends = get_trends(request)
+    return JsonResponse({'period': period, **trends.as_dict()})
+
+
 @login_required
 def nutrition_goals(request):
     """View and edit nutrition goals"""
@@ -182,24 +284,66 @@ def nutrition_goals(request):
     })
 
 
-@login_required
-def meal_history(request):
-    """View complete meal history"""
-    meals = Meal.objects.filter(user=request.user).select_related('user')
+def get_meal_history_page(request):
+    """Keyset page of the user's meals for the ``cursor`` and ``meal_type`` in the query string"""
+    meals = Meal.objects.filter(user=request.user)
 
     # Filter by meal type if provided
     meal_type_filter = request.GET.get('meal_type')
     if meal_type_filter and meal_type_filter in dict(Meal.MEAL_TYPE_CHOICES):
         meals = meals.filter(meal_type=meal_type_filter)
+    else:
+        meal_type_filter = None
+
+    paginator = KeysetPaginator(meals, fields=MEAL_HISTORY_ORDERING, page_size=MEAL_HISTORY_PAGE_SIZE)
+    return meal_type_filter, paginator.get_page(request.GET.get('cursor'))
 
-    # Get statistics
-    total_meals = meals.count()
+
+@login_required
+def meal_history(request):
+    """View meal history, newest first, one page at a time"""
+    try:
+        meal_type_filter, page = get_meal_history_page(request)
+    except InvalidCursor:
+        messages.error(request, 'That page link is no longer valid, showing your latest meals.')
+        query = {'meal_type': request.GET['meal_type']} if request.GET.get('meal_type') else {}
+        return redirect(f"{reverse('nutrition:meal_history')}?{urlencode(query)}")
 
     context = {
-        'meals': meals[:50],  # Limit to recent 50 meals
-        'total_meals': total_meals,
+        'meals': page,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
         'meal_type_filter': meal_type_filter,
         'meal_types': Meal.MEAL_TYPE_CHOICES,
     }
 
     return render(request, 'nutrition/meal_history.html', context)
+
+
+@login_required
+def meal_history_data(request):
+    """Next page of meal history as JSON, for infinite scrolling"""
+    try:
+        meal_type_filter, page = get_meal_history_page(request)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'meals': [
+            {
+                'id': meal.pk,
+                'meal_type': meal.meal_type,
+                'food_name': meal.food_name,
+                'portion': meal.portion,
+                'calories': meal.calories,
+                'protein': float(meal.protein),
+                'carbs': float(meal.carbs),
+                'fat': float(meal.fat),
+                'meal_date': meal.meal_date.isoformat(),
+                'logged_at': meal.logged_at.isoformat(),
+            }
+            for meal in page
+        ],
+        'html': render_to_string('nutrition/meal_history_items.html', {'meals': page}, request=request),
+        'next_cursor': page.next_cursor,
+    })
@@ -1,9 +1,15 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from wellnessapp.importer import detect_format
 from .models import UserProfile
 
 User = get_user_model()
 
+# Web imports run inside the request, so they must finish well before the
+# worker timeout (30 s under gunicorn). 2 MB is about 50,000 rows, a few
+# seconds of work; bigger files go through the import_wellness_data command.
+MAX_WEB_IMPORT_SIZE = 2 * 1024 * 1024
+
 
 class UserUpdateForm(forms.ModelForm):
     """Form for updating user basic information"""
@@ -214,3 +220,38 @@ class AccountDeleteForm(forms.Form):
             'placeholder': 'Enter your password'
         })
     )
+
+
+class DataImportForm(forms.Form):
+    """Form for uploading a file of historical data"""
+    KIND_CHOICES = [
+        ('meals', 'Meals'),
+        ('mood_entries', 'Mood entries'),
+        ('habit_completions', 'Habit completions'),
+        ('challenge_check_ins', 'Challenge check-ins'),
+    ]
+
+    kind = forms.ChoiceField(
+        choices=KIND_CHOICES,
+        widget=forms.Select(attrs={
+            'class': 'w-full px-4 py-3 rounded-lg bg-gray-100 dark:bg-gray-800 border border-gray-300 dark:border-gray-700 focus:border-indigo-500 focus:ring-2 focus:ring-indigo-500 focus:outline-none transition duration-200'
+        })
+    )
+    file = forms.FileField(
+        help_text='CSV, JSON array or JSON Lines (.csv, .json, .jsonl)',
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'w-full text-sm text-gray-700 dark:text-gray-300',
+            'accept': '.csv,.json,.jsonl,.ndjson'
+        })
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if detect_format(upload.name) is None:
+            raise forms.ValidationError('Upload a .csv, .json or .jsonl file.')
+        if upload.size > MAX_WEB_IMPORT_SIZE:
+            raise forms.ValidationError(
+                f'Files over {MAX_WEB_IMPORT_SIZE // (1024 * 1024)} MB are too big to import here. '
+                'Split the file, or ask an administrator to import it for you.'
+            )
+        return upload
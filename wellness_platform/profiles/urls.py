@@ -8,4 +8,6 @@ urlpatterns = [
     path('edit/', views.profile_edit, name='profile_edit'),
     path('settings/', views.account_settings, name='account_settings'),
     path('delete/', views.account_delete, name='account_delete'),
+    path('export/', views.data_export, name='data_export'),
+    path('import/', views.data_import, name='data_import'),
 ]
@@ -2,9 +2,14 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout, authenticate
 from django.contrib import messages
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.urls import reverse
+from django.utils.http import content_disposition_header
+from datetime import date
+from wellnessapp.export import EXPORT_DATASETS, EXPORT_FORMATS, buffered, gzipped, iter_user_export
+from wellnessapp.importer import ImportFileError, detect_format, run_import
 from .models import UserProfile
-from .forms import UserUpdateForm, ProfileUpdateForm, AccountDeleteForm
+from .forms import UserUpdateForm, ProfileUpdateForm, AccountDeleteForm, DataImportForm
 
 
 @login_required
@@ -18,6 +23,7 @@ def profile_view(request):
         'age': profile.get_age(),
         'bmi': profile.get_bmi(),
         'bmi_category': profile.get_bmi_category(),
+        'export_datasets': [(name, name.replace('_', ' ').capitalize()) for name in EXPORT_DATASETS],
     }
     return render(request, 'profiles/profile_view.html', context)
 
@@ -83,3 +89,71 @@ def account_delete(request):
         form = AccountDeleteForm()
 
     return render(request, 'profiles/account_delete.html', {'form': form})
+
+
+@login_required
+def data_export(request):
+    """
+    Download the user's wellness history.
+
+    ``?format=json`` (default) holds every dataset, or only ``?dataset=``;
+    ``?format=csv`` needs a dataset. ``?gzip=1`` compresses the file.
+    The response is streamed, so it starts at once and memory stays flat.
+    """
+    export_format = request.GET.get('format', 'json')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Unknown export format')
+
+    dataset = request.GET.get('dataset', 'all')
+    if dataset == 'all':
+        if export_format == 'csv':
+            return HttpResponseBadRequest('Choose a dataset for CSV exports')
+        dataset_names = list(EXPORT_DATASETS)
+    elif dataset in EXPORT_DATASETS:
+        dataset_names = [dataset]
+    else:
+        return HttpResponseBadRequest('Unknown dataset')
+
+    stream = buffered(iter_user_export(request.user, dataset_names, export_format))
+    filename = f'pulsewell-{request.user.get_username()}-{dataset}-{date.today().isoformat()}.{export_format}'
+    content_type = 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/json'
+
+    if request.GET.get('gzip') in ('1', 'true'):
+        stream = gzipped(stream)
+        filename += '.gz'
+        content_type = 'application/gzip'
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = content_disposition_header(as_attachment=True, filename=filename)
+    return response
+
+
+@login_required
+def data_import(request):
+    """
+    Import historical data from a CSV or JSON file.
+
+    The import runs within the request, so uploads are capped by
+    ``MAX_WEB_IMPORT_SIZE``; larger files are imported with the
+    ``import_wellness_data`` management command.
+    """
+    result = None
+    if request.method == 'POST':
+        form = DataImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = run_import(
+                    request.user, form.cleaned_data['kind'], upload.open('rb'), detect_format(upload.name),
+                )
+            except ImportFileError as e:
+                messages.error(request, f'The import stopped: {e}. Rows before that point were saved.')
+            else:
+                if result.created:
+                    messages.success(request, f'Imported {result.created} rows.')
+                else:
+                    messages.info(request, 'Nothing new to import.')
+    else:
+        form = DataImportForm()
+
+    return render(request, 'profiles/data_import.html', {'form': form, 'result': result})
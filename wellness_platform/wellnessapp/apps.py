@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class WellnessappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wellnessapp'
+
+    def ready(self):
+        from .signals import connect_search_signals
+
+        connect_search_signals()
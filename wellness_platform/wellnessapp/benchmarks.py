@@ -0,0 +1,243 @@
+"""
+View benchmarks with query-count and latency budgets.
+
+Every named URL in ``wellness_platform/urls.py`` is requested with the
+Django test client as a sample user. Each view is timed over several
+iterations and its SQL query count and response size are recorded, then
+compared with the budget declared in ``BUDGETS`` (or ``DEFAULT_BUDGET``).
+
+Used by ``manage.py benchmark_views`` and by ``wellnessapp.tests``.
+"""
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from .request_metrics import percentile
+
+
+DEFAULT_BUDGET = {'queries': 12, 'p95_ms': 250}
+
+# Per-view budgets, keyed by "namespace:name". Views whose query count
+# still grows with the data have loose budgets until they are fixed.
+BUDGETS = {
+    'dashboard:user_dashboard': {'queries': 9, 'p95_ms': 100},
+    'dashboard:admin_dashboard': {'queries': 5, 'p95_ms': 50},
+    'habits:habit_list': {'queries': 4, 'p95_ms': 100},
+    'habits:habit_detail': {'queries': 5, 'p95_ms': 100},
+    'mood:mood_history': {'queries': 5, 'p95_ms': 400},
+    'nutrition:daily_summary': {'queries': 5, 'p95_ms': 100},
+    'nutrition:weekly_summary': {'queries': 5, 'p95_ms': 100},
+    'nutrition:meal_history': {'queries': 4, 'p95_ms': 200},
+    'journal:journal_list': {'queries': 4, 'p95_ms': 250},
+    'journal:journal_detail': {'queries': 4, 'p95_ms': 50},
+    'challenges:explore': {'queries': 3, 'p95_ms': 150},
+    'challenges:detail': {'queries': 6, 'p95_ms': 100},
+    'challenges:my_challenges': {'queries': 8, 'p95_ms': 100},
+    'challenges:my_challenge': {'queries': 6, 'p95_ms': 200},
+    'challenges:daily_checkin': {'queries': 6, 'p95_ms': 100},
+    'blog:article_list': {'queries': 4, 'p95_ms': 100},
+    'blog:article_detail': {'queries': 12, 'p95_ms': 200},
+}
+
+# Views that are never benchmarked, with the reason
+SKIPPED_URLS = {
+    'account:logout': 'ends the benchmark session',
+    'challenges:join': 'creates a participation on GET',
+    'habits:habit_complete_bulk': 'POST only',
+    'blog:post_comment': 'POST only',
+    'blog:delete_comment': 'POST only',
+    'blog:like_comment': 'POST only',
+    'nutrition:meal_log_again': 'POST only',
+    'mood:mood_detail': 'template mood/mood_detail.html does not exist',
+    'profiles:account_settings': 'template profiles/account_settings.html does not exist',
+}
+
+# Views that are only reachable by admins
+ADMIN_URLS = {
+    'dashboard:admin_dashboard',
+    'challenges:create',
+    'challenges:edit',
+    'challenges:delete',
+    'blog:create_article',
+    'blog:edit_article',
+    'blog:delete_article',
+}
+
+# Which sample row fills a URL argument, keyed by (namespace or URL name, argument)
+SAMPLE_ARGS = {
+    ('challenges:daily_checkin', 'pk'): 'active_user_challenge_id',
+    ('habits', 'pk'): 'habit_id',
+    ('mood', 'pk'): 'mood_entry_id',
+    ('nutrition', 'pk'): 'meal_id',
+    ('journal', 'pk'): 'journal_entry_id',
+    ('challenges', 'pk'): 'user_challenge_id',
+    ('challenges', 'slug'): 'challenge_slug',
+    ('blog', 'slug'): 'article_slug',
+    ('blog', 'comment_id'): 'comment_id',
+}
+
+
+class BenchmarkSamples:
+    """Rows owned by the benchmark user that fill URL arguments"""
+
+    def __init__(self, user):
+        from blog.models import Article, Comment
+        from challenges.models import Challenge, UserChallenge
+        from journal.models import JournalEntry
+        from mood.models import MoodEntry
+        from nutrition.models import Meal
+
+        user_challenges = UserChallenge.objects.filter(user=user).select_related('challenge')
+        user_challenge = user_challenges.first()
+        challenge = user_challenge.challenge if user_challenge else Challenge.objects.filter(is_active=True).first()
+
+        self.habit_id = user.habits.values_list('pk', flat=True).first()
+        self.mood_entry_id = MoodEntry.objects.filter(user=user).values_list('pk', flat=True).first()
+        self.meal_id = Meal.objects.filter(user=user).values_list('pk', flat=True).first()
+        self.journal_entry_id = JournalEntry.objects.filter(user=user).values_list('pk', flat=True).first()
+        self.user_challenge_id = user_challenge.pk if user_challenge else None
+        # Only active participations accept check-ins
+        self.active_user_challenge_id = user_challenges.filter(status='active').values_list('pk', flat=True).first()
+        self.challenge_slug = challenge.slug if challenge else None
+        self.article_slug = Article.objects.filter(published=True).values_list('slug', flat=True).first()
+        self.comment_id = Comment.objects.filter(user=user).values_list('pk', flat=True).first()
+
+
+def iter_url_names(patterns=None, namespace=None):
+    """Yield ("namespace:name", argument names) for every named URL"""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            yield from iter_url_names(pattern.url_patterns, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, list(pattern.pattern.converters)
+
+
+def get_budget(name):
+    return BUDGETS.get(name, DEFAULT_BUDGET)
+
+
+def read_body(response):
+    """Response body, consuming streamed responses so their queries are counted"""
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class ViewBenchmark:
+    """
+    Request every named URL and compare it with its budget.
+
+    ``run()`` returns a dict that can be written out as JSON; views over
+    budget list the exceeded metrics under ``over_budget``.
+    """
+
+    def __init__(self, user, admin_user=None, iterations=10, check_latency=True, names=None):
+        self.user = user
+        self.admin_user = admin_user
+        self.iterations = iterations
+        self.check_latency = check_latency
+        self.names = names
+
+    def get_url(self, name, arguments, samples):
+        """Reverse ``name`` with sample rows, or return None when a sample is missing"""
+        namespace = name.split(':')[0]
+        kwargs = {}
+        for argument in arguments:
+            attribute = SAMPLE_ARGS.get((name, argument)) or SAMPLE_ARGS.get((namespace, argument), '')
+            value = getattr(samples, attribute, None)
+            if value is None:
+                return None
+            kwargs[argument] = value
+        return reverse(name, kwargs=kwargs)
+
+    def measure(self, client, url):
+        """Time ``iterations`` GETs of ``url`` after one warm-up request"""
+        read_body(client.get(url))
+
+        timings = []
+        queries = 0
+        for _ in range(self.iterations):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(url)
+                body = read_body(response)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = max(queries, len(captured))
+
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'queries': queries,
+            'bytes': len(body),
+        }
+
+    def check_budget(self, name, result):
+        budget = get_budget(name)
+        over = []
+        if result['queries'] > budget['queries']:
+            over.append('queries')
+        if self.check_latency and result['p95_ms'] > budget['p95_ms']:
+            over.append('p95_ms')
+        if result['status'] >= 500:
+            over.append('status')
+        return budget, over
+
+    def run(self):
+        clients = {}
+        samples = {}
+        for role, user in (('user', self.user), ('admin', self.admin_user)):
+            if user is not None:
+                # Server errors are recorded as a 500 status instead of raised
+                clients[role] = Client(raise_request_exception=False)
+                clients[role].force_login(user)
+                samples[role] = BenchmarkSamples(user)
+
+        views = {}
+        skipped = {}
+        try:
+            for name, arguments in iter_url_names():
+                if self.names and name not in self.names:
+                    continue
+                if name in SKIPPED_URLS:
+                    skipped[name] = SKIPPED_URLS[name]
+                    continue
+
+                role = 'admin' if name in ADMIN_URLS else 'user'
+                if role not in clients:
+                    skipped[name] = 'no admin user'
+                    continue
+
+                url = self.get_url(name, arguments, samples[role])
+                if url is None:
+                    skipped[name] = 'no sample data for URL arguments'
+                    continue
+
+                result = self.measure(clients[role], url)
+                result['budget'], result['over_budget'] = self.check_budget(name, result)
+                views[name] = result
+        finally:
+            for client in clients.values():
+                client.logout()
+
+        return {
+            'vendor': connection.vendor,
+            'iterations': self.iterations,
+            'views': views,
+            'skipped': skipped,
+        }
+
+
+def over_budget(results):
+    """Names of the views in ``results`` that exceeded a budget"""
+    return sorted(name for name, view in results['views'].items() if view['over_budget'])
@@ -0,0 +1,110 @@
+"""
+Month calendars of dated rows, such as habit completions or challenge check-ins.
+
+The rows of the month are fetched with one query into a dict keyed by
+date; the grid is then built from the dict without touching the database.
+"""
+from datetime import date, timedelta
+
+from django.utils.functional import cached_property
+
+
+WEEKDAY_LABELS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    """First day of the month ``count`` months after ``month``"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def parse_month(value, default):
+    """First day of a ``YYYY-MM`` month, or ``default`` if it is not one"""
+    try:
+        year, month = value.split('-')
+        return date(int(year), int(month), 1)
+    except (AttributeError, ValueError):
+        return default
+
+
+class MonthCalendar:
+    """
+    One month of ``queryset`` rows laid out in Monday-first weeks.
+
+    Each day is a dict with ``date``, ``day``, ``is_today``, ``is_future``,
+    ``entry`` (the row for that date or None) and ``completed``, which is
+    ``completed(entry)`` on days with a row. ``min_month`` and
+    ``max_month`` bound the previous/next links.
+    """
+    weekday_labels = WEEKDAY_LABELS
+
+    def __init__(self, queryset, date_field, month, today=None, completed=None, min_month=None, max_month=None):
+        self.today = today or date.today()
+        self.min_month = month_start(min_month) if min_month else None
+        self.max_month = month_start(max_month or self.today)
+        self.month = self.clamp(month_start(month))
+        self.first_day = self.month
+        self.last_day = add_months(self.month, 1) - timedelta(days=1)
+
+        self.date_field = date_field
+        # The month's rows, fetched the first time ``entries`` is read
+        self.rows = queryset.filter(**{f'{date_field}__gte': self.first_day, f'{date_field}__lte': self.last_day})
+        self.completed = completed or (lambda entry: True)
+
+    @classmethod
+    def from_request(cls, request, queryset, date_field, **kwargs):
+        """Calendar for the ``?month=YYYY-MM`` of the request, defaulting to the current month"""
+        today = kwargs.pop('today', None) or date.today()
+        month = parse_month(request.GET.get('month'), month_start(today))
+        return cls(queryset, date_field, month, today=today, **kwargs)
+
+    @cached_property
+    def entries(self):
+        return {getattr(row, self.date_field): row for row in self.rows}
+
+    def clamp(self, month):
+        if self.min_month and month < self.min_month:
+            return self.min_month
+        return min(month, self.max_month)
+
+    def get_day(self, day):
+        entry = self.entries.get(day)
+        return {
+            'date': day,
+            'day': day.day,
+            'is_today': day == self.today,
+            'is_future': day > self.today,
+            'entry': entry,
+            'completed': entry is not None and bool(self.completed(entry)),
+        }
+
+    @property
+    def days(self):
+        return [self.get_day(self.first_day + timedelta(days=offset)) for offset in range(self.last_day.day)]
+
+    @property
+    def weeks(self):
+        """Rows of seven days; cells outside the month are None"""
+        cells = [None] * self.first_day.weekday() + self.days
+        cells += [None] * (-len(cells) % 7)
+        return [cells[index:index + 7] for index in range(0, len(cells), 7)]
+
+    @property
+    def completed_count(self):
+        return sum(1 for entry in self.entries.values() if self.completed(entry))
+
+    @property
+    def previous_month(self):
+        previous = add_months(self.month, -1)
+        if self.min_month and previous < self.min_month:
+            return None
+        return previous
+
+    @property
+    def next_month(self):
+        following = add_months(self.month, 1)
+        return following if following <= self.max_month else None
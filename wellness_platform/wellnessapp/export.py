@@ -0,0 +1,181 @@
+"""
+Export of users' wellness history as CSV or JSON.
+
+Rows are read with ``.iterator(chunk_size=...)`` and written out as they
+arrive, so memory use stays flat however long a history is. The same row
+generators back the per-user download (streamed through
+``StreamingHttpResponse``) and ``manage.py export_wellness_data``, which
+writes every user to sharded files.
+"""
+import csv
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Rendered output is handed to the server in pieces of about this size
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class ExportDataset:
+    """
+    One exported table.
+
+    ``columns`` are field lookups on ``model``; a ``(name, lookup)`` pair
+    gives a column a different name, e.g. for fields of a related row.
+    """
+
+    def __init__(self, model, user_field, columns):
+        self.model = model
+        self.user_field = user_field
+        self.columns = [column if isinstance(column, tuple) else (column, column) for column in columns]
+
+    @property
+    def column_names(self):
+        return [name for name, _ in self.columns]
+
+    def get_header(self, include_user=False):
+        return ['user_id', *self.column_names] if include_user else self.column_names
+
+    def get_queryset(self, user_ids=None):
+        queryset = apps.get_model(self.model).objects.all()
+        if user_ids is not None:
+            queryset = queryset.filter(**{f'{self.user_field}__in': user_ids})
+        return queryset.order_by(self.user_field, 'id')
+
+    def iter_rows(self, user_ids=None, include_user=False, chunk_size=EXPORT_CHUNK_SIZE):
+        """Tuples in ``column_names`` order, prefixed with the user id if ``include_user``"""
+        lookups = [lookup for _, lookup in self.columns]
+        if include_user:
+            lookups.insert(0, self.user_field)
+        return self.get_queryset(user_ids).values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+EXPORT_DATASETS = {
+    'meals': ExportDataset('nutrition.Meal', 'user_id', [
+        'id', 'meal_date', 'meal_type', 'food_name', 'portion', 'calories', 'protein', 'carbs', 'fat',
+        'food_id', 'notes', 'logged_at',
+    ]),
+    'mood_entries': ExportDataset('mood.MoodEntry', 'user_id', [
+        'id', 'entry_date', 'mood', 'note', 'created_at', 'updated_at',
+    ]),
+    'habits': ExportDataset('habits.Habit', 'user_id', [
+        'id', 'name', 'description', 'frequency', 'category', 'is_active',
+        'current_streak', 'longest_streak', 'total_completions', 'created_at',
+    ]),
+    'habit_completions': ExportDataset('habits.HabitCompletion', 'habit__user_id', [
+        'id', 'habit_id', ('habit_name', 'habit__name'), 'completed_date', 'completed_at', 'notes',
+    ]),
+    'journal_entries': ExportDataset('journal.JournalEntry', 'user_id', [
+        'id', 'title', 'content', 'word_count', 'created_at', 'updated_at',
+    ]),
+    'challenge_check_ins': ExportDataset('challenges.DailyCheckIn', 'user_challenge__user_id', [
+        'id', ('challenge_id', 'user_challenge__challenge_id'), ('challenge', 'user_challenge__challenge__title'),
+        'date', 'completed', 'value_logged', 'mood', 'difficulty', 'notes', 'checked_in_at',
+    ]),
+}
+
+EXPORT_FORMATS = ('csv', 'json')
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """Like DjangoJSONEncoder but keeps Decimals numeric"""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+def format_csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def format_json_record(names, row):
+    return json.dumps(dict(zip(names, row)), cls=ExportEncoder)
+
+
+class Echo:
+    """File-like object whose write() returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def get_csv_writer():
+    """CSV writer whose writerow() returns the formatted line"""
+    return csv.writer(Echo())
+
+
+def iter_csv(dataset, rows, include_user=False):
+    """CSV lines, header first"""
+    writer = get_csv_writer()
+    yield writer.writerow(dataset.get_header(include_user))
+    for row in rows:
+        yield writer.writerow([format_csv_value(value) for value in row])
+
+
+def iter_json_document(user, dataset_names, chunk_size=EXPORT_CHUNK_SIZE):
+    """A single JSON object holding every requested dataset of one user"""
+    yield '{"user": %s, "exported_at": %s, "datasets": {' % (
+        json.dumps(user.get_username()),
+        json.dumps(datetime.now().astimezone().isoformat()),
+    )
+
+    for index, name in enumerate(dataset_names):
+        dataset = EXPORT_DATASETS[name]
+        yield f'{", " if index else ""}{json.dumps(name)}: ['
+        names = dataset.get_header()
+        rows = dataset.iter_rows(user_ids=[user.pk], chunk_size=chunk_size)
+        for position, row in enumerate(rows):
+            record = format_json_record(names, row)
+            yield f',\n{record}' if position else f'\n{record}'
+        yield ']'
+    yield '}}\n'
+
+
+def iter_user_export(user, dataset_names, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Text chunks of one user's export; CSV covers exactly one dataset"""
+    if export_format == 'json':
+        return iter_json_document(user, dataset_names, chunk_size)
+
+    if len(dataset_names) != 1:
+        raise ValueError('CSV exports hold one dataset at a time')
+    dataset = EXPORT_DATASETS[dataset_names[0]]
+    return iter_csv(dataset, dataset.iter_rows(user_ids=[user.pk], chunk_size=chunk_size))
+
+
+def buffered(chunks, size=STREAM_BUFFER_SIZE):
+    """Join small text chunks into UTF-8 blocks of about ``size`` bytes"""
+    parts = []
+    length = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        parts.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(parts)
+            parts = []
+            length = 0
+    if parts:
+        yield b''.join(parts)
+
+
+def gzipped(blocks, level=6):
+    """Compress a stream of byte blocks into one gzip stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,179 @@
+"""
+Registry of the queries behind the busiest views.
+
+Each entry builds the queryset a view runs for a sample user so that
+``manage.py explain_hot_queries`` can check its plan. Builders receive a
+``HotQueryContext`` and return a queryset.
+"""
+import re
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+
+HOT_QUERIES = {}
+
+
+def hot_query(name):
+    """Register a queryset builder under ``name``"""
+    def decorator(func):
+        HOT_QUERIES[name] = func
+        return func
+    return decorator
+
+
+class HotQueryContext:
+    """Ids of sample rows the hot queries are run against"""
+
+    def __init__(self, user_id=0, habit_id=0, challenge_id=0, user_challenge_id=0, article_id=0, today=None):
+        self.user_id = user_id
+        self.habit_id = habit_id
+        self.challenge_id = challenge_id
+        self.user_challenge_id = user_challenge_id
+        self.article_id = article_id
+        self.today = today or date.today()
+
+    @classmethod
+    def for_user(cls, user):
+        """Pick sample rows belonging to ``user``, falling back to id 0"""
+        from blog.models import Article
+        from challenges.models import UserChallenge
+
+        user_challenge = UserChallenge.objects.filter(user=user).first()
+        return cls(
+            user_id=user.pk,
+            habit_id=user.habits.values_list('pk', flat=True).first() or 0,
+            challenge_id=user_challenge.challenge_id if user_challenge else 0,
+            user_challenge_id=user_challenge.pk if user_challenge else 0,
+            article_id=Article.objects.values_list('pk', flat=True).first() or 0,
+        )
+
+
+# Plan lines that mean a whole table is read row by row
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+def find_full_scans(plan, vendor):
+    """Return the tables a query plan scans in full"""
+    pattern = FULL_SCAN_PATTERNS.get(vendor)
+    if pattern is None:
+        return []
+    return pattern.findall(plan)
+
+
+@hot_query('habit_list')
+def habit_list_query(context):
+    from habits.models import Habit
+    return Habit.objects.filter(user_id=context.user_id, is_active=True).with_today_status(context.today)
+
+
+@hot_query('habit_calendar')
+def habit_calendar_query(context):
+    from habits.models import HabitCompletion
+    from wellnessapp.calendars import MonthCalendar
+    completions = HabitCompletion.objects.filter(habit_id=context.habit_id)
+    return MonthCalendar(completions, 'completed_date', context.today, today=context.today).rows
+
+
+@hot_query('mood_history')
+def mood_history_query(context):
+    from mood.models import MoodEntry
+    return MoodEntry.objects.filter(user_id=context.user_id)
+
+
+@hot_query('mood_today')
+def mood_today_query(context):
+    from mood.models import MoodEntry
+    return MoodEntry.objects.filter(user_id=context.user_id, entry_date=context.today)
+
+
+@hot_query('meals_for_day')
+def meals_for_day_query(context):
+    from nutrition.models import Meal
+    return Meal.objects.filter(user_id=context.user_id, meal_date=context.today)
+
+
+@hot_query('nutrition_daily_totals')
+def nutrition_daily_totals_query(context):
+    from nutrition.models import DailyNutritionTotal
+    return DailyNutritionTotal.objects.filter(
+        user_id=context.user_id,
+        date__gte=context.today - timedelta(days=6),
+        date__lte=context.today
+    )
+
+
+@hot_query('food_prefix_search')
+def food_prefix_search_query(context):
+    from nutrition.foods import search_queryset
+    return search_queryset('chick bre')[:10]
+
+
+@hot_query('meal_history')
+def meal_history_query(context):
+    from nutrition.models import Meal
+    from nutrition.views import MEAL_HISTORY_ORDERING, MEAL_HISTORY_PAGE_SIZE
+    from wellnessapp.pagination import KeysetPaginator
+
+    # A later page: rows after a cursor one month back
+    paginator = KeysetPaginator(Meal.objects.filter(user_id=context.user_id), MEAL_HISTORY_ORDERING)
+    cursor = [context.today - timedelta(days=30), datetime.now(dt_timezone.utc), 0]
+    return paginator.get_queryset(cursor)[:MEAL_HISTORY_PAGE_SIZE + 1]
+
+
+@hot_query('journal_list')
+def journal_list_query(context):
+    from journal.models import JournalEntry
+    return JournalEntry.objects.filter(user_id=context.user_id).defer('content')
+
+
+@hot_query('my_active_challenges')
+def my_active_challenges_query(context):
+    from challenges.models import UserChallenge
+    return UserChallenge.objects.filter(user_id=context.user_id, status='active')
+
+
+@hot_query('challenge_joined')
+def challenge_joined_query(context):
+    from challenges.models import UserChallenge
+    return UserChallenge.objects.filter(
+        user_id=context.user_id,
+        challenge_id=context.challenge_id,
+        status='active'
+    )
+
+
+@hot_query('challenge_participants')
+def challenge_participants_query(context):
+    from challenges.models import UserChallenge
+    return UserChallenge.objects.filter(
+        challenge_id=context.challenge_id,
+        status__in=['active', 'completed']
+    ).values('pk')
+
+
+@hot_query('challenge_check_ins')
+def challenge_check_ins_query(context):
+    from challenges.models import DailyCheckIn
+    from wellnessapp.calendars import MonthCalendar
+    check_ins = DailyCheckIn.objects.filter(user_challenge_id=context.user_challenge_id)
+    return MonthCalendar(check_ins, 'date', context.today, today=context.today).rows
+
+
+@hot_query('challenge_explore')
+def challenge_explore_query(context):
+    from challenges.models import Challenge
+    return Challenge.objects.filter(is_active=True)[:10]
+
+
+@hot_query('article_list')
+def article_list_query(context):
+    from blog.models import Article
+    return Article.objects.filter(published=True).select_related('author')
+
+
+@hot_query('article_comments')
+def article_comments_query(context):
+    from blog.models import Comment
+    return Comment.objects.filter(article_id=context.article_id, parent=None).select_related('user')
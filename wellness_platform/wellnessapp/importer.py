@@ -0,0 +1,479 @@
+"""
+Bulk import of a user's history from CSV or JSON files.
+
+Files are read a record at a time, so a file with years of history is
+never held in memory. Records are validated and written in batches with
+``bulk_create(ignore_conflicts=True)``: rows that already exist (by the
+models' unique constraints, or by content for meals) are counted as
+duplicates rather than failing the import. ``bulk_create`` skips the
+models' ``save()`` methods, so derived data (habit streaks, challenge
+progress, the nutrition rollup) is recomputed once at the end.
+
+The column names match the CSV files written by ``wellnessapp.export``.
+"""
+import csv
+import io
+import json
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Q
+
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 50
+
+# File extensions each format is recognised by
+IMPORT_FORMATS = {
+    'csv': ('.csv',),
+    'json': ('.json', '.jsonl', '.ndjson'),
+}
+
+# Characters allowed between records of a JSON array or JSON Lines file
+JSON_SEPARATORS = ' \t\r\n,[]'
+
+TRUE_VALUES = {'1', 't', 'true', 'y', 'yes'}
+FALSE_VALUES = {'0', 'f', 'false', 'n', 'no'}
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be read"""
+
+
+def detect_format(filename):
+    """``'csv'`` or ``'json'`` from a file name, or None"""
+    name = filename.lower()
+    for file_format, extensions in IMPORT_FORMATS.items():
+        if name.endswith(extensions):
+            return file_format
+    return None
+
+
+def iter_csv_records(stream):
+    """(line number, dict) for each row of a CSV file opened in binary mode"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ImportFileError(f'Line {reader.line_num}: {e}') from e
+    finally:
+        text.detach()
+
+
+def iter_json_records(stream, chunk_size=64 * 1024):
+    """
+    (record number, dict) for each object of a JSON array or JSON Lines file.
+
+    Decodes one object at a time from a small rolling buffer instead of
+    loading the whole document.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    number = 0
+    try:
+        while True:
+            buffer = buffer.lstrip(JSON_SEPARATORS)
+            if not buffer:
+                if eof:
+                    return
+                chunk = text.read(chunk_size)
+                eof = not chunk
+                buffer = chunk
+                continue
+
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ImportFileError(f'Invalid JSON in record {number + 1}') from e
+                # The record continues in the next chunk
+                chunk = text.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+
+            buffer = buffer[end:]
+            number += 1
+            if not isinstance(record, dict):
+                raise ImportFileError(f'Record {number} is not an object')
+            yield number, record
+    except UnicodeDecodeError as e:
+        raise ImportFileError(f'File is not UTF-8: {e}') from e
+    finally:
+        text.detach()
+
+
+class ImportResult:
+    """Running totals of an import, reported after every batch"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.processed = 0
+        self.created = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+        self.done = False
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'processed': self.processed,
+            'created': self.created,
+            'duplicates': self.duplicates,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'done': self.done,
+        }
+
+
+class RowImporter:
+    """
+    Imports one kind of record for one user.
+
+    Subclasses list their ``columns`` (model fields read from the file),
+    turn cleaned rows into model instances in ``build_batch`` and update
+    derived data in ``finish``.
+    """
+    model_path = None
+    columns = []
+    future_date_fields = []
+
+    def __init__(self, user):
+        from django.apps import apps
+
+        self.user = user
+        self.model = apps.get_model(self.model_path)
+        self.today = date.today()
+
+    def clean_value(self, name, raw):
+        field = self.model._meta.get_field(name)
+        if isinstance(raw, str):
+            raw = raw.strip()
+
+        if raw in (None, ''):
+            # Every record needs its own date; the field default would be today
+            if field.has_default() and not isinstance(field, models.DateField):
+                return field.get_default()
+            if field.null:
+                return None
+            if field.blank:
+                return ''
+            raise ValidationError(f'{name} is required')
+
+        if isinstance(field, models.BooleanField) and isinstance(raw, str):
+            if raw.lower() in TRUE_VALUES:
+                return True
+            if raw.lower() in FALSE_VALUES:
+                return False
+            raise ValidationError(f'{name} must be true or false')
+
+        try:
+            return field.clean(raw, None)
+        except ValidationError as e:
+            raise ValidationError(f'{name}: {" ".join(e.messages)}') from e
+
+    def clean_row(self, record):
+        """Validated field values for one record; raises ValidationError"""
+        cleaned = {name: self.clean_value(name, record.get(name)) for name in self.columns}
+        for name in self.future_date_fields:
+            if cleaned[name] > self.today:
+                raise ValidationError(f'{name} is in the future')
+        return cleaned
+
+    def build_batch(self, rows, result):
+        """
+        Model instances for ``rows`` (pairs of line number and cleaned values).
+
+        Rows that already exist are counted on ``result`` and left out;
+        rows that cannot be resolved are reported as errors.
+        """
+        raise NotImplementedError
+
+    def finish(self):
+        """Recompute data derived from the imported rows"""
+
+
+class MealImporter(RowImporter):
+    model_path = 'nutrition.Meal'
+    columns = ['meal_date', 'meal_type', 'food_name', 'portion', 'calories', 'protein', 'carbs', 'fat', 'notes']
+    future_date_fields = ['meal_date']
+
+    def clean_row(self, record):
+        record = dict(record)
+        # Other trackers rarely record a portion
+        if not record.get('portion'):
+            record['portion'] = '1 serving'
+        return super().clean_row(record)
+
+    @staticmethod
+    def get_key(values):
+        return values['meal_date'], values['meal_type'], values['food_name'], values['calories']
+
+    def build_batch(self, rows, result):
+        # Meals have no unique constraint, so re-imports are matched by content
+        existing = set(self.model.objects.filter(
+            user=self.user,
+            meal_date__in={values['meal_date'] for _, values in rows}
+        ).values_list('meal_date', 'meal_type', 'food_name', 'calories'))
+
+        meals = []
+        for _, values in rows:
+            key = self.get_key(values)
+            if key in existing:
+                result.duplicates += 1
+                continue
+            existing.add(key)
+            meals.append(self.model(user=self.user, **values))
+        return meals
+
+    def finish(self):
+        from nutrition.models import rebuild_daily_totals
+        from nutrition.recent_foods import invalidate_recent_foods
+
+        rebuild_daily_totals(user_ids=[self.user.pk])
+        invalidate_recent_foods(self.user.pk)
+
+
+class MoodImporter(RowImporter):
+    model_path = 'mood.MoodEntry'
+    columns = ['entry_date', 'mood', 'note']
+    future_date_fields = ['entry_date']
+
+    def build_batch(self, rows, result):
+        existing = set(self.model.objects.filter(
+            user=self.user,
+            entry_date__in={values['entry_date'] for _, values in rows}
+        ).values_list('entry_date', flat=True))
+
+        entries = []
+        for _, values in rows:
+            if values['entry_date'] in existing:
+                result.duplicates += 1
+                continue
+            existing.add(values['entry_date'])
+            entries.append(self.model(user=self.user, **values))
+        return entries
+
+    def finish(self):
+        from mood.analytics import invalidate_mood_analytics
+        from mood.correlations import invalidate_mood_correlations
+
+        invalidate_mood_analytics(self.user.pk)
+        invalidate_mood_correlations(self.user.pk)
+
+
+class HabitCompletionImporter(RowImporter):
+    """Completions name their habit; habits the user does not have yet are created"""
+    model_path = 'habits.HabitCompletion'
+    columns = ['completed_date', 'notes']
+    future_date_fields = ['completed_date']
+
+    def __init__(self, user):
+        super().__init__(user)
+        from habits.models import Habit
+
+        self.habit_model = Habit
+        self.touched_habits = set()
+
+    def clean_row(self, record):
+        cleaned = super().clean_row(record)
+        habit_name = str(record.get('habit_name') or record.get('habit') or '').strip()
+        if not habit_name:
+            raise ValidationError('habit_name is required')
+        cleaned['habit_name'] = habit_name[:200]
+
+        # Only used when the habit has to be created
+        for name in ('frequency', 'category'):
+            value = record.get(name) or None
+            if value is not None:
+                value = self.habit_model._meta.get_field(name).clean(str(value).strip(), None)
+            cleaned[name] = value
+        return cleaned
+
+    def get_habits(self, rows):
+        """Habit ids by name for the batch, creating the missing habits"""
+        names = {values['habit_name'] for _, values in rows}
+        habits = dict(self.habit_model.objects.filter(user=self.user, name__in=names).values_list('name', 'pk'))
+
+        missing = {}
+        for _, values in rows:
+            if values['habit_name'] not in habits:
+                missing.setdefault(values['habit_name'], self.habit_model(
+                    user=self.user,
+                    name=values['habit_name'],
+                    frequency=values['frequency'] or 'daily',
+                    category=values['category'],
+                ))
+        if missing:
+            self.habit_model.objects.bulk_create(missing.values(), ignore_conflicts=True)
+            habits.update(self.habit_model.objects.filter(
+                user=self.user, name__in=missing
+            ).values_list('name', 'pk'))
+        return habits
+
+    def build_batch(self, rows, result):
+        habits = self.get_habits(rows)
+        existing = set(self.model.objects.filter(
+            habit_id__in=habits.values(),
+            completed_date__in={values['completed_date'] for _, values in rows}
+        ).values_list('habit_id', 'completed_date'))
+
+        completions = []
+        for _, values in rows:
+            habit_id = habits[values['habit_name']]
+            key = (habit_id, values['completed_date'])
+            if key in existing:
+                result.duplicates += 1
+                continue
+            existing.add(key)
+            self.touched_habits.add(habit_id)
+            completions.append(self.model(
+                habit_id=habit_id, completed_date=values['completed_date'], notes=values['notes']
+            ))
+        return completions
+
+    def finish(self):
+        if self.touched_habits:
+            self.habit_model.recompute_stats_for(self.touched_habits)
+
+
+class CheckInImporter(RowImporter):
+    """Check-ins for challenges the user has joined, matched by challenge and date"""
+    model_path = 'challenges.DailyCheckIn'
+    columns = ['date', 'completed', 'value_logged', 'mood', 'difficulty', 'notes']
+    future_date_fields = ['date']
+
+    def __init__(self, user):
+        super().__init__(user)
+        from challenges.models import UserChallenge
+
+        self.user_challenge_model = UserChallenge
+        self.touched_user_challenges = set()
+
+    def clean_row(self, record):
+        cleaned = super().clean_row(record)
+        # Exported files carry the challenge id; hand-written ones may use the slug
+        challenge_id = str(record.get('challenge_id') or '').strip()
+        slug = str(record.get('challenge_slug') or '').strip()
+        if challenge_id.isdigit():
+            cleaned['challenge'] = ('id', int(challenge_id))
+        elif slug:
+            cleaned['challenge'] = ('slug', slug)
+        else:
+            raise ValidationError('challenge_id or challenge_slug is required')
+        return cleaned
+
+    def build_batch(self, rows, result):
+        wanted = {values['challenge'] for _, values in rows}
+        participations = {}
+        for user_challenge in self.user_challenge_model.objects.filter(
+            Q(challenge_id__in=[value for by, value in wanted if by == 'id'])
+            | Q(challenge__slug__in=[value for by, value in wanted if by == 'slug']),
+            user=self.user
+        ).select_related('challenge'):
+            for challenge in (('id', user_challenge.challenge_id), ('slug', user_challenge.challenge.slug)):
+                participations.setdefault(challenge, []).append(user_challenge)
+
+        resolved = []
+        for line, values in rows:
+            # The participation running on that date
+            user_challenge = next((
+                user_challenge for user_challenge in participations.get(values['challenge'], [])
+                if user_challenge.start_date <= values['date'] <= user_challenge.end_date
+            ), None)
+            if user_challenge is None:
+                result.add_error(line, f'Not taking part in challenge {values["challenge"][1]} on {values["date"]}')
+                continue
+            resolved.append((user_challenge.pk, values))
+
+        existing = set(self.model.objects.filter(
+            user_challenge_id__in={user_challenge_id for user_challenge_id, _ in resolved},
+            date__in={values['date'] for _, values in resolved}
+        ).values_list('user_challenge_id', 'date'))
+
+        check_ins = []
+        for user_challenge_id, values in resolved:
+            key = (user_challenge_id, values['date'])
+            if key in existing:
+                result.duplicates += 1
+                continue
+            existing.add(key)
+            self.touched_user_challenges.add(user_challenge_id)
+            values = {name: values[name] for name in self.columns}
+            check_ins.append(self.model(user_challenge_id=user_challenge_id, **values))
+        return check_ins
+
+    def finish(self):
+        for user_challenge in self.user_challenge_model.objects.filter(
+            pk__in=self.touched_user_challenges
+        ).select_related('challenge'):
+            user_challenge.recompute_progress()
+
+
+IMPORTERS = {
+    'meals': MealImporter,
+    'mood_entries': MoodImporter,
+    'habit_completions': HabitCompletionImporter,
+    'challenge_check_ins': CheckInImporter,
+}
+
+
+def run_import(user, kind, stream, file_format, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Import one file of ``kind`` records for ``user``.
+
+    ``stream`` is a binary file object. ``progress`` is called with the
+    ``ImportResult`` after every batch. Derived data is recomputed at the
+    end even if the file turns out to be broken half way, so it always
+    matches the rows that were written. Raises ImportFileError for files
+    that cannot be read.
+    """
+    if kind not in IMPORTERS:
+        raise ValueError(f'Unknown import kind: {kind}')
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f'Unknown import format: {file_format}')
+
+    importer = IMPORTERS[kind](user)
+    result = ImportResult(kind)
+    records = iter_csv_records(stream) if file_format == 'csv' else iter_json_records(stream)
+
+    def flush(batch):
+        with transaction.atomic():
+            objects = importer.build_batch(batch, result)
+            importer.model.objects.bulk_create(objects, ignore_conflicts=True)
+        result.created += len(objects)
+        if progress:
+            progress(result)
+
+    try:
+        batch = []
+        for line, record in records:
+            result.processed += 1
+            try:
+                batch.append((line, importer.clean_row(record)))
+            except ValidationError as e:
+                result.add_error(line, ' '.join(e.messages))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    finally:
+        with transaction.atomic():
+            importer.finish()
+
+    result.done = True
+    if progress:
+        progress(result)
+    return result
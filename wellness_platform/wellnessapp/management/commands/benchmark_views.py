@@ -0,0 +1,117 @@
+import json
+import subprocess
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from wellnessapp.benchmarks import ViewBenchmark, over_budget
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every view with the test client and fail when one exceeds its budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to request views as (default: first seeded load user)')
+        parser.add_argument('--admin-user', help='Username for admin-only views (default: first superuser)')
+        parser.add_argument('--iterations', type=int, default=10, help='Timed requests per view')
+        parser.add_argument('--view', action='append', help='Only benchmark the named URL, e.g. habits:habit_list (repeatable)')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='Previous JSON results to compare against')
+        parser.add_argument('--no-latency', action='store_true', help='Only enforce query budgets')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be positive')
+
+        user = self.get_user(options['user'])
+        admin_user = self.get_admin_user(options['admin_user'])
+
+        benchmark = ViewBenchmark(
+            user,
+            admin_user=admin_user,
+            iterations=options['iterations'],
+            check_latency=not options['no_latency'],
+            names=options['view'],
+        )
+        results = benchmark.run()
+        results['user'] = user.username
+        results['commit'] = self.get_commit()
+        results['created_at'] = datetime.now().isoformat(timespec='seconds')
+
+        previous = self.load_previous(options['compare'])
+        self.report(results, previous)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        failures = over_budget(results)
+        if failures:
+            raise CommandError(f'{len(failures)} views exceed their budget: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'All {len(results["views"])} views are within budget'))
+
+    def get_user(self, username):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User "{username}" does not exist')
+
+        user = User.objects.filter(username__startswith='load_user_').order_by('pk').first()
+        if user is None:
+            raise CommandError('No load users found; run "manage.py seed_load_data" or pass --user')
+        return user
+
+    def get_admin_user(self, username):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User "{username}" does not exist')
+        return User.objects.filter(is_superuser=True).order_by('pk').first()
+
+    def get_commit(self):
+        """Current git commit, so result files can be told apart"""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def load_previous(self, path):
+        if not path:
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+    def report(self, results, previous):
+        previous_views = previous['views'] if previous else {}
+
+        for name, view in sorted(results['views'].items()):
+            line = (
+                f'{name:<32} {view["status"]} '
+                f'p50 {view["p50_ms"]:>7.1f}ms  p95 {view["p95_ms"]:>7.1f}ms  '
+                f'{view["queries"]:>3} queries  {view["bytes"]:>8} bytes'
+            )
+            before = previous_views.get(name)
+            if before:
+                line += (
+                    f'  (p95 {view["p95_ms"] - before["p95_ms"]:+.1f}ms, '
+                    f'queries {view["queries"] - before["queries"]:+d})'
+                )
+
+            if view['over_budget']:
+                budget = ', '.join(f'{metric} > {view["budget"][metric]}' for metric in view['over_budget'])
+                self.stdout.write(self.style.ERROR(f'✗ {line}  over budget: {budget}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {line}'))
+
+        for name, reason in sorted(results['skipped'].items()):
+            self.stdout.write(f'- {name} skipped: {reason}')
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from wellnessapp.hot_queries import HOT_QUERIES, HotQueryContext, find_full_scans
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN for every registered hot query and fail on full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username whose data the queries run against (default: first user)')
+        parser.add_argument('--query', action='append', help='Only explain the named query (repeatable)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just failures')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["user"]}" does not exist')
+            context = HotQueryContext.for_user(user)
+        else:
+            user = User.objects.order_by('pk').first()
+            context = HotQueryContext.for_user(user) if user else HotQueryContext()
+
+        names = options['query'] or sorted(HOT_QUERIES)
+        unknown = set(names) - set(HOT_QUERIES)
+        if unknown:
+            raise CommandError(f'Unknown hot queries: {", ".join(sorted(unknown))}')
+
+        failures = []
+        for name in names:
+            plan = HOT_QUERIES[name](context).explain()
+            scans = find_full_scans(plan, connection.vendor)
+
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'✗ {name}: full scan of {", ".join(scans)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+
+            if scans or options['verbose_plans']:
+                self.stdout.write(plan + '\n')
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries do a full table scan: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'All {len(names)} hot queries use indexes'))
@@ -0,0 +1,90 @@
+import gzip
+import json
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wellnessapp.export import (
+    EXPORT_CHUNK_SIZE, EXPORT_DATASETS, format_csv_value, format_json_record, get_csv_writer,
+)
+
+
+# File formats for the warehouse: CSV, or JSON Lines (one object per line)
+SHARD_FORMATS = ('csv', 'jsonl')
+
+
+class Command(BaseCommand):
+    help = 'Export every user\'s wellness history to files sharded by user id, for the data warehouse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory to write <dataset>/part-NNNNN files into')
+        parser.add_argument('--shards', type=int, default=1, help='Files per dataset; a user always lands in user_id %% shards')
+        parser.add_argument('--format', choices=SHARD_FORMATS, default='csv', help='File format')
+        parser.add_argument('--gzip', action='store_true', help='Compress each file')
+        parser.add_argument('--dataset', action='append', choices=sorted(EXPORT_DATASETS),
+                            help='Only export this dataset (repeatable, default: all)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        shards = options['shards']
+        if shards < 1:
+            raise CommandError('--shards must be at least 1')
+
+        output_dir = Path(options['output_dir'])
+        extension = options['format'] + ('.gz' if options['gzip'] else '')
+        manifest = {
+            'exported_at': datetime.now().astimezone().isoformat(),
+            'format': options['format'],
+            'gzip': options['gzip'],
+            'shards': shards,
+            'datasets': {},
+        }
+
+        for name in options['dataset'] or list(EXPORT_DATASETS):
+            dataset_dir = output_dir / name
+            dataset_dir.mkdir(parents=True, exist_ok=True)
+            paths = [dataset_dir / f'part-{shard:05d}.{extension}' for shard in range(shards)]
+
+            counts = self.export_dataset(EXPORT_DATASETS[name], paths, options)
+            manifest['datasets'][name] = {
+                'columns': ['user_id', *EXPORT_DATASETS[name].column_names],
+                'files': [
+                    {'path': str(path.relative_to(output_dir)), 'rows': count}
+                    for path, count in zip(paths, counts)
+                ],
+                'rows': sum(counts),
+            }
+            self.stdout.write(f'{name}: {sum(counts)} rows in {shards} file(s)')
+
+        with open(output_dir / 'manifest.json', 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Export written to {output_dir}'))
+
+    def export_dataset(self, dataset, paths, options):
+        """Stream one dataset into its shard files in a single pass; returns rows per shard"""
+        opener = gzip.open if options['gzip'] else open
+        header = dataset.get_header(include_user=True)
+        writer = get_csv_writer()
+        counts = [0] * len(paths)
+
+        if options['format'] == 'csv':
+            def format_row(row):
+                return writer.writerow([format_csv_value(value) for value in row])
+        else:
+            def format_row(row):
+                return format_json_record(header, row) + '\n'
+
+        with ExitStack() as stack:
+            files = [stack.enter_context(opener(path, 'wt', encoding='utf-8', newline='')) for path in paths]
+            if options['format'] == 'csv':
+                for handle in files:
+                    handle.write(writer.writerow(header))
+
+            # The user id leads every row and picks the shard
+            for row in dataset.iter_rows(include_user=True, chunk_size=options['chunk_size']):
+                shard = row[0] % len(paths)
+                files[shard].write(format_row(row))
+                counts[shard] += 1
+        return counts
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from wellnessapp.importer import IMPORT_BATCH_SIZE, IMPORTERS, ImportFileError, detect_format, run_import
+
+
+class Command(BaseCommand):
+    help = 'Import a CSV or JSON file of historical meals, moods, habit completions or challenge check-ins for one user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV, JSON array or JSON Lines file')
+        parser.add_argument('--user', required=True, help='Username to import for')
+        parser.add_argument('--kind', required=True, choices=sorted(IMPORTERS), help='What the file holds')
+        parser.add_argument('--format', choices=('csv', 'json'), help='File format (default: from the extension)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows validated and written per batch')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user named {options["user"]}')
+
+        file_format = options['format'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError('Cannot tell the file format from its name; pass --format')
+
+        def progress(result):
+            if result.done:
+                return
+            self.stdout.write(
+                f'{result.processed} rows read, {result.created} created, '
+                f'{result.duplicates} duplicates, {result.error_count} errors'
+            )
+
+        try:
+            with open(options['path'], 'rb') as stream:
+                result = run_import(
+                    user, options['kind'], stream, file_format,
+                    batch_size=options['batch_size'], progress=progress,
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except ImportFileError as e:
+            raise CommandError(f'Import stopped: {e}')
+
+        for error in result.errors:
+            self.stderr.write(f'Line {error["line"]}: {error["error"]}')
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'... and {result.error_count - len(result.errors)} more errors')
+        self.stdout.write(self.style.SUCCESS(f'Imported {result.created} {options["kind"].replace("_", " ")}'))
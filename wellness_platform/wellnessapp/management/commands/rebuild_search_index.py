@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from wellnessapp.search import SEARCH_SOURCES, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents of challenges, articles and journal entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=list(SEARCH_SOURCES), action='append', help='Only this kind (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index(kinds=options['kind'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} document(s)'))
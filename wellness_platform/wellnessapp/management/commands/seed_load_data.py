@@ -0,0 +1,289 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Article, Comment
+from challenges.models import Challenge, DailyCheckIn, UserChallenge, reconcile_challenge_counters
+from habits.models import Habit, HabitCompletion, calculate_streaks
+from journal.models import JournalEntry, get_content_stats
+from mood.models import MoodEntry
+from nutrition.models import DailyNutritionTotal, Meal, rebuild_daily_totals
+from wellnessapp.models import SearchDocument
+from wellnessapp.search import rebuild_search_index
+
+
+WORDS = (
+    'calm focus energy sleep water walk stretch breathe gratitude morning evening '
+    'run yoga salad protein rest reflect journal friends family work goals progress '
+    'tired happy stress balance mindful steady strong light heavy slow quick today'
+).split()
+
+FOODS = [
+    # (food_name, portion, calories, protein, carbs, fat)
+    ('Oatmeal with berries', '1 bowl', 320, '10.5', '54.0', '6.0'),
+    ('Grilled chicken breast', '150g', 250, '46.0', '0.0', '5.5'),
+    ('Greek yogurt', '1 cup', 150, '15.0', '8.0', '4.0'),
+    ('Brown rice', '1 cup', 215, '5.0', '45.0', '1.8'),
+    ('Salmon fillet', '120g', 280, '30.0', '0.0', '17.0'),
+    ('Banana', '1 medium', 105, '1.3', '27.0', '0.4'),
+    ('Avocado toast', '2 slices', 360, '9.0', '38.0', '19.0'),
+    ('Mixed salad', '1 bowl', 120, '3.0', '12.0', '7.0'),
+    ('Pasta bolognese', '1 plate', 520, '24.0', '68.0', '16.0'),
+    ('Almonds', '30g', 170, '6.0', '6.0', '15.0'),
+]
+
+HABIT_NAMES = [
+    ('Morning walk', 'health'), ('Meditate', 'mindfulness'), ('Read 20 pages', 'learning'),
+    ('Drink 8 glasses of water', 'health'), ('No phone after 10pm', 'mindfulness'),
+    ('Stretch', 'health'), ('Practice guitar', 'creativity'), ('Track spending', 'finance'),
+    ('Call a friend', 'social'), ('Plan tomorrow', 'productivity'), ('Weekly review', 'productivity'),
+    ('Long run', 'health'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Generate deterministic synthetic users and years of history for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users to create')
+        parser.add_argument('--days', type=int, default=365, help='Days of history per user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--prefix', default='load_user_', help='Username prefix for generated users')
+
+        # Distributions
+        parser.add_argument('--habits', type=int, default=6, help='Mean habits per user')
+        parser.add_argument('--completion-rate', type=float, default=0.7, help='Chance a habit is done on a given day')
+        parser.add_argument('--meals-per-day', type=float, default=3.0, help='Mean meals logged per day')
+        parser.add_argument('--mood-rate', type=float, default=0.8, help='Chance a mood is logged on a given day')
+        parser.add_argument('--journal-rate', type=float, default=0.3, help='Chance of a journal entry on a given day')
+        parser.add_argument('--challenges', type=int, default=3, help='Mean challenge participations per user')
+        parser.add_argument('--checkin-rate', type=float, default=0.85, help='Chance of a check-in on a challenge day')
+        parser.add_argument('--comments', type=int, default=5, help='Mean blog comments per user')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['days'] < 1:
+            raise CommandError('--users and --days must be positive')
+
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.today = date.today()
+        self.buffers = {}
+        self.counts = {}
+
+        User = get_user_model()
+        if User.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(f'Users with prefix "{options["prefix"]}" already exist; pick another --prefix')
+
+        if not Challenge.objects.exists():
+            call_command('populate_challenges', stdout=self.stdout)
+        self.challenges = list(Challenge.objects.filter(is_active=True))
+
+        with transaction.atomic():
+            password = make_password('loadtest123')
+            users = User.objects.bulk_create(
+                [
+                    User(username=f'{options["prefix"]}{i}', email=f'{options["prefix"]}{i}@example.com', password=password)
+                    for i in range(options['users'])
+                ],
+                batch_size=options['batch_size']
+            )
+            self.articles = self.get_articles(users[0])
+
+            for index, user in enumerate(users, start=1):
+                self.seed_user(user)
+                if index % 100 == 0:
+                    self.stdout.write(f'  {index}/{len(users)} users generated')
+
+            self.flush_all()
+            self.refresh_comment_counts()
+            # Participations were bulk created too, bypassing the challenge counters
+            reconcile_challenge_counters()
+            # Journal entries were bulk created without their search documents
+            self.counts[SearchDocument] = rebuild_search_index(
+                kinds=['journal'], batch_size=options['batch_size']
+            )
+            # bulk_create skips Meal.save(), so the daily rollup is rebuilt for the new users
+            self.counts[DailyNutritionTotal] = rebuild_daily_totals(
+                user_ids=[user.pk for user in users], batch_size=options['batch_size']
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Created {len(users)} users'))
+        for model, count in self.counts.items():
+            self.stdout.write(self.style.SUCCESS(f'  {model.__name__}: {count} rows'))
+
+    # Buffered inserts
+
+    def add(self, model, obj):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(obj)
+        if len(buffer) >= self.options['batch_size']:
+            self.flush(model)
+
+    def flush(self, model):
+        buffer = self.buffers.get(model)
+        if buffer:
+            model.objects.bulk_create(buffer, batch_size=self.options['batch_size'])
+            self.counts[model] = self.counts.get(model, 0) + len(buffer)
+            self.buffers[model] = []
+
+    def flush_all(self):
+        for model in list(self.buffers):
+            self.flush(model)
+
+    # Generators
+
+    def history_days(self):
+        start = self.today - timedelta(days=self.options['days'] - 1)
+        return [start + timedelta(days=offset) for offset in range(self.options['days'])]
+
+    def around(self, mean):
+        """Non-negative integer spread around ``mean``"""
+        return max(0, round(self.rng.gauss(mean, mean / 3))) if mean > 0 else 0
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def seed_user(self, user):
+        days = self.history_days()
+        self.seed_habits(user, days)
+        self.seed_moods(user, days)
+        self.seed_meals(user, days)
+        self.seed_journal(user, days)
+        self.seed_challenges(user, days)
+        self.seed_comments(user)
+
+    def seed_habits(self, user, days):
+        count = min(self.around(self.options['habits']), len(HABIT_NAMES))
+        habits = []
+        completions = []
+        for name, category in self.rng.sample(HABIT_NAMES, count):
+            frequency = 'weekly' if name.startswith(('Weekly', 'Long')) else 'daily'
+            rate = self.options['completion_rate']
+            if frequency == 'weekly':
+                rate /= 7
+            dates = [day for day in days if self.rng.random() < rate]
+
+            current, longest = calculate_streaks(dates, frequency)
+            habits.append(Habit(
+                user=user, name=name, category=category, frequency=frequency,
+                current_streak=current, longest_streak=longest,
+                total_completions=len(dates), last_completed_date=dates[-1] if dates else None,
+            ))
+            completions.append(dates)
+
+        # Habits are inserted right away because completions need their ids
+        Habit.objects.bulk_create(habits)
+        self.counts[Habit] = self.counts.get(Habit, 0) + len(habits)
+        for habit, dates in zip(habits, completions):
+            for day in dates:
+                self.add(HabitCompletion, HabitCompletion(habit=habit, completed_date=day))
+
+    def seed_moods(self, user, days):
+        moods = [choice for choice, _ in MoodEntry.MOOD_CHOICES]
+        for day in days:
+            if self.rng.random() < self.options['mood_rate']:
+                note = self.sentence(8) if self.rng.random() < 0.3 else None
+                self.add(MoodEntry, MoodEntry(user=user, mood=self.rng.choice(moods), entry_date=day, note=note))
+
+    def seed_meals(self, user, days):
+        meal_types = [choice for choice, _ in Meal.MEAL_TYPE_CHOICES]
+        for day in days:
+            for _ in range(self.around(self.options['meals_per_day'])):
+                food_name, portion, calories, protein, carbs, fat = self.rng.choice(FOODS)
+                self.add(Meal, Meal(
+                    user=user, meal_type=self.rng.choice(meal_types), food_name=food_name, portion=portion,
+                    calories=calories, protein=Decimal(protein), carbs=Decimal(carbs), fat=Decimal(fat),
+                    meal_date=day,
+                ))
+
+    def seed_journal(self, user, days):
+        for day in days:
+            if self.rng.random() < self.options['journal_rate']:
+                paragraphs = [self.sentence(self.rng.randint(20, 120)) for _ in range(self.rng.randint(1, 5))]
+                content = '\n\n'.join(paragraphs)
+                self.add(JournalEntry, JournalEntry(
+                    user=user, title=self.sentence(4).capitalize(), content=content,
+                    **get_content_stats(content)
+                ))
+
+    def seed_challenges(self, user, days):
+        count = min(self.around(self.options['challenges']), len(self.challenges))
+        moods = [choice for choice, _ in DailyCheckIn.MOOD_CHOICES]
+        difficulties = [choice for choice, _ in DailyCheckIn.DIFFICULTY_CHOICES]
+
+        participations = []
+        for challenge in self.rng.sample(self.challenges, count):
+            start_date = self.rng.choice(days)
+            end_date = start_date + timedelta(days=challenge.duration_days)
+            check_in_days = [
+                start_date + timedelta(days=offset)
+                for offset in range(challenge.duration_days)
+                if start_date + timedelta(days=offset) <= self.today and self.rng.random() < self.options['checkin_rate']
+            ]
+            completed = [self.rng.random() < 0.8 for _ in check_in_days]
+            participations.append((challenge, start_date, end_date, check_in_days, completed))
+
+        user_challenges = []
+        for challenge, start_date, end_date, check_in_days, completed in participations:
+            days_completed = sum(completed)
+            if days_completed >= challenge.duration_days:
+                status = 'completed'
+            elif end_date < self.today:
+                status = self.rng.choice(['failed', 'abandoned'])
+            else:
+                status = 'active'
+
+            # Streak of completed check-ins on consecutive days
+            completed_days = [day for day, done in zip(check_in_days, completed) if done]
+            current, longest = calculate_streaks(completed_days)
+            if check_in_days and not completed[-1]:
+                current = 0
+
+            percentage = min(100, days_completed / challenge.duration_days * 100) if challenge.duration_days else 0
+            user_challenges.append(UserChallenge(
+                user=user, challenge=challenge, start_date=start_date, end_date=end_date, status=status,
+                current_streak=current, longest_streak=longest, days_completed=days_completed,
+                completion_percentage=Decimal(str(round(percentage, 2))),
+                points_earned=challenge.points_reward if status == 'completed' else 0,
+                badge_earned=status == 'completed',
+            ))
+
+        UserChallenge.objects.bulk_create(user_challenges)
+        self.counts[UserChallenge] = self.counts.get(UserChallenge, 0) + len(user_challenges)
+        for user_challenge, (_, _, _, check_in_days, completed) in zip(user_challenges, participations):
+            for day, done in zip(check_in_days, completed):
+                self.add(DailyCheckIn, DailyCheckIn(
+                    user_challenge=user_challenge, date=day, completed=done,
+                    mood=self.rng.choice(moods), difficulty=self.rng.choice(difficulties),
+                ))
+
+    def seed_comments(self, user):
+        for _ in range(self.around(self.options['comments'])):
+            self.add(Comment, Comment(
+                article=self.rng.choice(self.articles), user=user, content=self.sentence(self.rng.randint(5, 40))
+            ))
+
+    def get_articles(self, author):
+        articles = list(Article.objects.filter(published=True))
+        if not articles:
+            for i in range(5):
+                article = Article(title=f'Wellness tips {i + 1}', content=self.sentence(400), author=author)
+                article.save()
+                articles.append(article)
+        return articles
+
+    def refresh_comment_counts(self):
+        """bulk_create skips Comment.save(), so counts are refreshed in one UPDATE"""
+        counts = Comment.objects.filter(article=OuterRef('pk')).order_by().values('article').annotate(
+            total=Count('pk')
+        ).values('total')
+        Article.objects.update(comment_count=Coalesce(Subquery(counts), 0))
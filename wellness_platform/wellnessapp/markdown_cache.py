@@ -0,0 +1,57 @@
+import hashlib
+import threading
+
+import markdown
+from django.core.cache import caches
+
+
+MARKDOWN_EXTENSIONS = [
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.tables',
+    'markdown.extensions.nl2br',
+    'markdown.extensions.sane_lists',
+]
+
+# Rendered HTML lives in its own cache so it can be sized independently
+CACHE_ALIAS = 'markdown'
+
+_local = threading.local()
+
+
+def get_converter():
+    """Return this thread's Markdown converter, building it on first use"""
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, output_format='html5')
+        _local.converter = converter
+    return converter
+
+
+def convert_markdown(text):
+    """Convert Markdown to HTML without touching the cache"""
+    converter = get_converter()
+    try:
+        return converter.convert(text)
+    finally:
+        converter.reset()
+
+
+def get_cache_key(text):
+    """Cache key derived from the content itself, so edits never serve stale HTML"""
+    return 'markdown:' + hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def render_markdown(text):
+    """Convert Markdown to HTML, reusing a cached render of identical content"""
+    cache = caches[CACHE_ALIAS]
+    key = get_cache_key(text)
+    html = cache.get(key)
+    if html is None:
+        html = convert_markdown(text)
+        cache.set(key, html, timeout=None)
+    return html
+
+
+def invalidate_markdown(text):
+    """Drop the cached render of some content"""
+    caches[CACHE_ALIAS].delete(get_cache_key(text))
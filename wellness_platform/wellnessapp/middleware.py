@@ -0,0 +1,79 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .request_metrics import RequestMetrics, instrument_templates, metrics_store
+
+
+logger = logging.getLogger('wellnessapp.request_metrics')
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every request and report it.
+
+    Adds a ``Server-Timing`` header (shown in the browser's network tab),
+    writes one JSON log line per request and records the request in
+    ``metrics_store`` for the admin dashboard. Repeated query fingerprints
+    are logged as a warning since they usually point to an N+1.
+
+    Opt-in: does nothing unless ``REQUEST_METRICS_ENABLED`` is True.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicate_threshold = getattr(settings, 'REQUEST_METRICS_DUPLICATE_THRESHOLD', 3)
+        metrics_store.window = getattr(settings, 'REQUEST_METRICS_WINDOW', metrics_store.window)
+        instrument_templates()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = metrics.activate()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        metrics.finish()
+
+        match = request.resolver_match
+        url_name = match.view_name if match else '<unresolved>'
+        duplicates = metrics.duplicates(self.duplicate_threshold)
+
+        metrics_store.record(url_name, metrics)
+        response['Server-Timing'] = self.server_timing(metrics, duplicates)
+        self.log(request, response, url_name, metrics, duplicates)
+        return response
+
+    def server_timing(self, metrics, duplicates):
+        entries = [
+            f'total;dur={metrics.wall_ms:.1f}',
+            f'db;dur={metrics.db_ms:.1f};desc="{metrics.query_count} queries"',
+            f'tpl;dur={metrics.template_ms:.1f}',
+        ]
+        if duplicates:
+            entries.append(f'dup;desc="{len(duplicates)} repeated queries"')
+        return ', '.join(entries)
+
+    def log(self, request, response, url_name, metrics, duplicates):
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'wall_ms': round(metrics.wall_ms, 1),
+            'db_ms': round(metrics.db_ms, 1),
+            'template_ms': round(metrics.template_ms, 1),
+            'queries': metrics.query_count,
+            'duplicates': [{'sql': sql, 'count': count} for sql, count in duplicates[:5]],
+        }
+        level = logging.WARNING if duplicates else logging.INFO
+        logger.log(level, json.dumps(line))
@@ -0,0 +1,125 @@
+# Generated by Django 5.2 on 2026-10-17 18:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copies of the index DDL and of the searchable sources as they were
+# when the index was introduced; later changes to wellnessapp.search must
+# not change what this migration does
+INDEX_SQL = {
+    'sqlite': [
+        """
+        CREATE VIRTUAL TABLE wellnessapp_searchindex USING fts5(
+            title, body,
+            content='wellnessapp_searchdocument', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER wellnessapp_searchdocument_insert AFTER INSERT ON wellnessapp_searchdocument BEGIN
+            INSERT INTO wellnessapp_searchindex(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+        """,
+        """
+        CREATE TRIGGER wellnessapp_searchdocument_delete AFTER DELETE ON wellnessapp_searchdocument BEGIN
+            INSERT INTO wellnessapp_searchindex(wellnessapp_searchindex, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+        END
+        """,
+        """
+        CREATE TRIGGER wellnessapp_searchdocument_update AFTER UPDATE ON wellnessapp_searchdocument BEGIN
+            INSERT INTO wellnessapp_searchindex(wellnessapp_searchindex, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO wellnessapp_searchindex(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        ALTER TABLE wellnessapp_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(body, '')), 'B')
+        ) STORED
+        """,
+        'CREATE INDEX wellnessapp_searchdocument_vector_idx ON wellnessapp_searchdocument USING GIN (search_vector)',
+    ],
+}
+
+DROP_INDEX_SQL = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS wellnessapp_searchdocument_insert',
+        'DROP TRIGGER IF EXISTS wellnessapp_searchdocument_delete',
+        'DROP TRIGGER IF EXISTS wellnessapp_searchdocument_update',
+        'DROP TABLE IF EXISTS wellnessapp_searchindex',
+    ],
+    'postgresql': [
+        'DROP INDEX IF EXISTS wellnessapp_searchdocument_vector_idx',
+        'ALTER TABLE wellnessapp_searchdocument DROP COLUMN IF EXISTS search_vector',
+    ],
+}
+
+# kind: (app label, model, title field, body fields, owner field)
+SOURCES = {
+    'challenge': ('challenges', 'Challenge', 'title', ['short_description', 'description', 'daily_requirement'], None),
+    'article': ('blog', 'Article', 'title', ['content'], None),
+    'journal': ('journal', 'JournalEntry', 'title', ['content'], 'user_id'),
+}
+
+
+def create_index(apps, schema_editor, batch_size=1000):
+    for sql in INDEX_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+    SearchDocument = apps.get_model('wellnessapp', 'SearchDocument')
+    for kind, (app_label, model_name, title, body, owner) in SOURCES.items():
+        fields = ['pk', title, *body, *([owner] if owner else [])]
+        batch = []
+        for obj in apps.get_model(app_label, model_name).objects.only(*fields).order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(
+                kind=kind,
+                object_id=obj.pk,
+                owner_id=getattr(obj, owner) if owner else None,
+                title=getattr(obj, title),
+                body='\n'.join(getattr(obj, field) or '' for field in body),
+            ))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+def drop_index(apps, schema_editor):
+    for sql in DROP_INDEX_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0002_article_article_published_idx_and_more'),
+        ('challenges', '0003_challenge_counters'),
+        ('journal', '0002_entry_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_unique')],
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,3 +1,28 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a challenge, article or journal entry.
+
+    Maintained by ``wellnessapp.search`` from save/delete signals; the
+    full-text index over ``title`` and ``body`` is created by the
+    migration for the database in use.
+    """
+    kind = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    # Set for private documents, which are only searched by their owner
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.object_id}: {self.title}'
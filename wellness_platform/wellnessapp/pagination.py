@@ -0,0 +1,95 @@
+"""
+Keyset (cursor) pagination for long, newest-first lists.
+
+Offset pagination makes the database walk past every skipped row and
+needs a ``COUNT(*)`` for page numbers. A keyset page instead starts
+right after the last row of the previous page, so page 1000 costs the
+same as page 1 as long as an index covers the ordering.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    """One page of rows plus the cursor for the page after it"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` in descending order of ``fields``.
+
+    The last field must be unique (normally ``'id'``) so every row has a
+    distinct position. Cursors are opaque URL-safe strings.
+    """
+
+    def __init__(self, queryset, fields=('id',), page_size=50):
+        self.queryset = queryset
+        self.fields = list(fields)
+        self.page_size = page_size
+        self.model_fields = [queryset.model._meta.get_field(name) for name in self.fields]
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field in self.model_fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(self.model_fields, values)]
+        except Exception as e:
+            raise InvalidCursor('Invalid cursor') from e
+
+    def after(self, values):
+        """
+        Condition for rows strictly after ``values`` in the ordering.
+
+        Expands the row comparison ``(a, b, c) < (x, y, z)`` and repeats
+        ``a <= x`` up front so the database can use it as an index range.
+        """
+        condition = Q()
+        for index in range(len(self.fields) - 1, -1, -1):
+            step = Q(**{f'{self.fields[index]}__lt': values[index]})
+            if index < len(self.fields) - 1:
+                step = step | (Q(**{self.fields[index]: values[index]}) & condition)
+            condition = step
+        return Q(**{f'{self.fields[0]}__lte': values[0]}) & condition
+
+    def get_queryset(self, values=None):
+        """Rows in page order, starting after the decoded cursor ``values`` if given"""
+        queryset = self.queryset.order_by(*(f'-{name}' for name in self.fields))
+        if values is not None:
+            queryset = queryset.filter(self.after(values))
+        return queryset
+
+    def get_page(self, cursor=None):
+        """Rows after ``cursor`` (from the start when empty); raises InvalidCursor"""
+        queryset = self.get_queryset(self.decode_cursor(cursor) if cursor else None)
+
+        # One extra row tells whether another page exists without counting
+        rows = list(queryset[:self.page_size + 1])
+        items = rows[:self.page_size]
+        next_cursor = self.encode_cursor(items[-1]) if len(rows) > self.page_size else None
+        return KeysetPage(items, next_cursor)
@@ -0,0 +1,155 @@
+"""
+Per-request timing and SQL statistics.
+
+``RequestMetrics`` collects the numbers for one request: wall time, time
+spent in SQL, query count, repeated query fingerprints (the usual sign of
+an N+1) and template render time. ``MetricsStore`` keeps a rolling window
+of recent requests per URL name so percentiles can be shown on the admin
+dashboard. The store lives in process memory, so each worker reports on
+the requests it served.
+
+Used by ``wellnessapp.middleware.RequestMetricsMiddleware``.
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from django.template.base import Template
+
+
+# Literals that vary between otherwise identical queries
+FINGERPRINT_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\((?:\s*(?:%s|\?)\s*,?)+\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def fingerprint(sql):
+    """Normalise ``sql`` so queries that differ only in their values match"""
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class RequestMetrics:
+    """Timings for a single request"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.wall_ms = 0
+        self.db_ms = 0
+        self.template_ms = 0
+        self.query_count = 0
+        self.fingerprints = Counter()
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper that times every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - start) * 1000
+            self.query_count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def finish(self):
+        self.wall_ms = (time.perf_counter() - self.start) * 1000
+
+    def duplicates(self, threshold):
+        """Fingerprints run at least ``threshold`` times, most repeated first"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+
+def instrument_templates():
+    """
+    Time template rendering for the active ``RequestMetrics``.
+
+    Only the outermost render is timed, so included and extended templates
+    are not counted twice. Safe to call more than once.
+    """
+    if getattr(Template.render, 'instrumented', False):
+        return
+
+    original_render = Template.render
+
+    def render(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return original_render(self, context)
+
+        metrics._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            metrics._template_depth -= 1
+            if metrics._template_depth == 0:
+                metrics.template_ms += (time.perf_counter() - start) * 1000
+
+    render.instrumented = True
+    Template.render = render
+
+
+class MetricsStore:
+    """Rolling window of recent request metrics per URL name"""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, url_name, metrics):
+        with self._lock:
+            self._samples[url_name].append(
+                (metrics.wall_ms, metrics.db_ms, metrics.template_ms, metrics.query_count)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        """Percentiles per URL name, slowest p95 first"""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+
+        rows = []
+        for name, values in samples.items():
+            wall = [value[0] for value in values]
+            rows.append({
+                'url_name': name,
+                'count': len(values),
+                'p50_ms': round(percentile(wall, 50), 1),
+                'p95_ms': round(percentile(wall, 95), 1),
+                'p99_ms': round(percentile(wall, 99), 1),
+                'db_p95_ms': round(percentile([value[1] for value in values], 95), 1),
+                'template_p95_ms': round(percentile([value[2] for value in values], 95), 1),
+                'avg_queries': round(sum(value[3] for value in values) / len(values), 1),
+                'max_queries': max(value[3] for value in values),
+            })
+        return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
+
+
+metrics_store = MetricsStore()
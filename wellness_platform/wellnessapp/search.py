@@ -0,0 +1,258 @@
+"""
+Full-text search over challenges, articles and journal entries.
+
+The title and body text of every searchable row is copied into a
+``SearchDocument`` when the row is saved, and dropped when it is deleted.
+The database indexes those documents: an FTS5 table kept in step by
+triggers on SQLite, a weighted ``tsvector`` column with a GIN index on
+PostgreSQL, both created by the 0001_search_document migration. Other
+databases fall back to ``icontains`` on the documents.
+
+``search()`` returns the matching ids best first, each with a snippet of
+the body where the search terms are wrapped in ``<mark>``.
+"""
+import re
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+
+class SearchSource:
+    """A model whose rows are searchable, with the fields copied into its documents"""
+
+    def __init__(self, model, title, body, owner=None):
+        self.model = model
+        self.title = title
+        self.body = body
+        self.owner = owner
+
+    @property
+    def fields(self):
+        return ['pk', self.title, *self.body, *([self.owner] if self.owner else [])]
+
+    def get_document(self, kind, obj):
+        """Document values of ``obj``, read from the fields loaded by ``fields``"""
+        return {
+            'kind': kind,
+            'object_id': obj.pk,
+            'owner_id': getattr(obj, self.owner) if self.owner else None,
+            'title': getattr(obj, self.title),
+            'body': '\n'.join(getattr(obj, field) or '' for field in self.body),
+        }
+
+
+SEARCH_SOURCES = {
+    'challenge': SearchSource('challenges.Challenge', 'title', ['short_description', 'description', 'daily_requirement']),
+    'article': SearchSource('blog.Article', 'title', ['content']),
+    'journal': SearchSource('journal.JournalEntry', 'title', ['content'], owner='user_id'),
+}
+
+# Matches beyond this are not ranked or shown
+MAX_RESULTS = 200
+MAX_TERMS = 8
+SNIPPET_WORDS = 16
+
+# Highlight markers put around matched terms by the database, turned into
+# <mark> tags once the rest of the snippet is escaped
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+
+def rebuild_search_index(kinds=None, batch_size=1000):
+    """
+    Replace the documents of ``kinds`` (default: all) from their source rows.
+
+    Returns the number of documents.
+    """
+    from .models import SearchDocument
+
+    total = 0
+    for kind in kinds or SEARCH_SOURCES:
+        source = SEARCH_SOURCES[kind]
+        SearchDocument.objects.filter(kind=kind).delete()
+
+        model = apps.get_model(source.model)
+        batch = []
+        for obj in model.objects.only(*source.fields).order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(**source.get_document(kind, obj)))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def index_document(kind, obj):
+    """Add or refresh the document of ``obj`` with a single upsert"""
+    from .models import SearchDocument
+
+    SearchDocument.objects.bulk_create(
+        [SearchDocument(**SEARCH_SOURCES[kind].get_document(kind, obj))],
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['owner_id', 'title', 'body'],
+    )
+
+
+def remove_document(kind, object_id):
+    from .models import SearchDocument
+
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+# Query parsing and highlighting
+
+def parse_terms(query):
+    """Lowercase words of a search box query; punctuation and operators are dropped"""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the database's match markers into <mark> tags"""
+    text = escape(snippet or '')
+    return mark_safe(text.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+# Backends
+
+class SQLiteSearchBackend:
+    """FTS5 with BM25 ranking; title matches weigh ten times body matches"""
+
+    sql = f"""
+        SELECT d.object_id, snippet(wellnessapp_searchindex, 1, char(2), char(3), '…', {SNIPPET_WORDS})
+        FROM wellnessapp_searchindex
+        JOIN wellnessapp_searchdocument d ON d.id = wellnessapp_searchindex.rowid
+        WHERE wellnessapp_searchindex MATCH %s AND d.kind = %s {{owner}}
+        ORDER BY bm25(wellnessapp_searchindex, 10.0, 1.0)
+        LIMIT %s
+    """
+
+    def get_match(self, terms):
+        # Every term must appear; the last one may still be being typed
+        return ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}" *'])
+
+    def search(self, kind, terms, owner_id, limit):
+        params = [self.get_match(terms), kind]
+        owner = ''
+        if owner_id is not None:
+            owner = 'AND d.owner_id = %s'
+            params.append(owner_id)
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql.format(owner=owner), params + [limit])
+            return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    """``tsvector`` matching with ``ts_rank``; headlines are only built for the returned rows"""
+
+    headline_options = (
+        f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS + 8}, MinWords={SNIPPET_WORDS // 2}, '
+        'MaxFragments=2, FragmentDelimiter=" … "'
+    )
+    sql = """
+        SELECT hit.object_id, ts_headline('english', hit.body, to_tsquery('english', %s), %s)
+        FROM (
+            SELECT object_id, body, ts_rank(search_vector, q) AS rank
+            FROM wellnessapp_searchdocument, to_tsquery('english', %s) q
+            WHERE kind = %s AND search_vector @@ q {owner}
+            ORDER BY rank DESC
+            LIMIT %s
+        ) hit
+        ORDER BY hit.rank DESC
+    """
+
+    def get_query(self, terms):
+        return ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+
+    def search(self, kind, terms, owner_id, limit):
+        query = self.get_query(terms)
+        params = [query, self.headline_options, query, kind]
+        owner = ''
+        if owner_id is not None:
+            owner = 'AND owner_id = %s'
+            params.append(owner_id)
+        with connection.cursor() as cursor:
+            cursor.execute(self.sql.format(owner=owner), params + [limit])
+            return cursor.fetchall()
+
+
+class FallbackSearchBackend:
+    """Substring matching for databases without a full-text index; title matches first"""
+
+    def search(self, kind, terms, owner_id, limit):
+        from .models import SearchDocument
+
+        documents = SearchDocument.objects.filter(kind=kind)
+        if owner_id is not None:
+            documents = documents.filter(owner_id=owner_id)
+        for term in terms:
+            documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        documents = documents.annotate(
+            in_title=Case(When(title__icontains=terms[0], then=Value(0)), default=Value(1), output_field=IntegerField())
+        ).order_by('in_title', '-object_id')
+        return [(document.object_id, self.get_snippet(document.body, terms)) for document in documents[:limit]]
+
+    def get_snippet(self, body, terms):
+        words = body.split()
+        first = next((i for i, word in enumerate(words) if any(term in word.lower() for term in terms)), 0)
+        start = max(first - SNIPPET_WORDS // 4, 0)
+        marked = [
+            f'{MARK_START}{word}{MARK_END}' if any(term in word.lower() for term in terms) else word
+            for word in words[start:start + SNIPPET_WORDS]
+        ]
+        return ('… ' if start else '') + ' '.join(marked) + (' …' if start + SNIPPET_WORDS < len(words) else '')
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    return SEARCH_BACKENDS.get(connection.vendor, FallbackSearchBackend)()
+
+
+class SearchResults:
+    """Ids of the matching rows, best first, with their highlighted snippets"""
+
+    def __init__(self, hits):
+        self.ids = [object_id for object_id, _ in hits]
+        self.snippets = {object_id: highlight(snippet) for object_id, snippet in hits}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def filter(self, queryset):
+        """``queryset`` narrowed to the matches, in relevance order"""
+        if not self.ids:
+            return queryset.none()
+        order = Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(self.ids)], output_field=IntegerField())
+        return queryset.filter(pk__in=self.ids).order_by(order)
+
+    def attach(self, objects):
+        """Set ``search_snippet`` on each of ``objects`` and return them"""
+        for obj in objects:
+            obj.search_snippet = self.snippets.get(obj.pk, '')
+        return objects
+
+
+def search(kind, query, owner=None, limit=MAX_RESULTS):
+    """
+    Rows of ``kind`` matching every word of ``query``.
+
+    Private kinds (journal entries) must pass the ``owner`` whose documents
+    are searched.
+    """
+    if SEARCH_SOURCES[kind].owner and owner is None:
+        raise ValueError(f'Searching {kind} documents needs an owner')
+    terms = parse_terms(query)
+    if not terms:
+        return SearchResults([])
+    owner_id = getattr(owner, 'pk', owner)
+    return SearchResults(get_search_backend().search(kind, terms, owner_id, limit))
@@ -0,0 +1,34 @@
+"""Keep search documents in step with the rows they are copied from"""
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .search import SEARCH_SOURCES, index_document, remove_document
+
+
+def connect_search_signals():
+    for kind, source in SEARCH_SOURCES.items():
+        model = apps.get_model(source.model)
+        post_save.connect(
+            index_on_save, sender=model, dispatch_uid=f'search_index_{kind}',
+        )
+        post_delete.connect(
+            remove_on_delete, sender=model, dispatch_uid=f'search_remove_{kind}',
+        )
+
+
+def get_kind(sender):
+    label = sender._meta.label
+    return next(kind for kind, source in SEARCH_SOURCES.items() if source.model == label)
+
+
+def index_on_save(sender, instance, update_fields=None, **kwargs):
+    kind = get_kind(sender)
+    source = SEARCH_SOURCES[kind]
+    # Saves of counters and other unsearched fields leave the document alone
+    if update_fields is not None and not set(update_fields) & set(source.fields):
+        return
+    index_document(kind, instance)
+
+
+def remove_on_delete(sender, instance, **kwargs):
+    remove_document(get_kind(sender), instance.pk)
@@ -1,3 +1,491 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import re
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Article
+from challenges.models import Challenge, DailyCheckIn, UserChallenge
+from habits.models import Habit, HabitCompletion
+from journal.models import JournalEntry
+from mood.models import MoodEntry
+from nutrition.models import DailyNutritionTotal, Meal
+from profiles.forms import MAX_WEB_IMPORT_SIZE
+
+from .calendars import MonthCalendar, add_months
+from .hot_queries import HOT_QUERIES, HotQueryContext
+from .importer import run_import
+from .benchmarks import ViewBenchmark, iter_url_names, over_budget
+from .markdown_cache import CACHE_ALIAS, convert_markdown, get_cache_key, get_converter, render_markdown
+from .middleware import RequestMetricsMiddleware
+from .models import SearchDocument
+from .request_metrics import fingerprint, metrics_store, percentile
+from .search import FallbackSearchBackend, search
+
+
+User = get_user_model()
+
+
+class ViewBenchmarkTests(TestCase):
+    """Every view stays within its query budget on a seeded dataset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_load_data', users=2, days=60, stdout=StringIO())
+        cls.user = User.objects.filter(username__startswith='load_user_').order_by('pk').first()
+        cls.admin = User.objects.create_superuser(username='bench_admin', password='pass12345')
+
+    def test_views_within_query_budget(self):
+        # Latency depends on the machine, so only query budgets are enforced here
+        results = ViewBenchmark(self.user, admin_user=self.admin, iterations=2, check_latency=False).run()
+
+        self.assertEqual(over_budget(results), [], {
+            name: results['views'][name] for name in over_budget(results)
+        })
+        covered = set(results['views']) | set(results['skipped'])
+        self.assertEqual(covered, {name for name, _ in iter_url_names()})
+
+    def test_percentile(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 95), 5)
+        self.assertEqual(percentile([7], 95), 7)
+
+
+class ExplainHotQueriesTests(TestCase):
+    """Every hot query uses an index, and unindexed ones are reported"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_load_data', users=1, days=14, stdout=StringIO())
+        cls.user = User.objects.get(username__startswith='load_user_')
+
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_hot_queries', user=self.user.username, stdout=out)
+        self.assertIn(f'All {len(HOT_QUERIES)} hot queries use indexes', out.getvalue())
+
+    def test_calendar_queries_match_the_views(self):
+        context = HotQueryContext.for_user(self.user)
+        self.client.force_login(self.user)
+        for name, url in [
+            ('habit_calendar', reverse('habits:habit_detail', args=[context.habit_id])),
+            ('challenge_check_ins', reverse('challenges:my_challenge', args=[context.user_challenge_id])),
+        ]:
+            with self.subTest(name):
+                calendar = self.client.get(url).context['calendar']
+                self.assertEqual(str(HOT_QUERIES[name](context).query), str(calendar.rows.query))
+
+    def test_full_scan_is_reported(self):
+        # Mood notes are not indexed, so this reads the whole table
+        unindexed = {'mood_by_note': lambda context: MoodEntry.objects.filter(note='Fine')}
+        out = StringIO()
+        with patch.dict(HOT_QUERIES, unindexed), self.assertRaisesMessage(CommandError, 'mood_by_note'):
+            call_command('explain_hot_queries', query=['mood_by_note', 'mood_history'], stdout=out)
+        self.assertIn('✗ mood_by_note: full scan of mood_moodentry', out.getvalue())
+        self.assertIn('✓ mood_history', out.getvalue())
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+class RequestMetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        metrics_store.clear()
+        self.user = User.objects.create_user(username='metrics', password='pass12345')
+        self.client.force_login(self.user)
+
+    def test_server_timing_header_and_log(self):
+        with self.assertLogs('wellnessapp.request_metrics', level='INFO') as logs:
+            response = self.client.get(reverse('habits:habit_list'))
+
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        self.assertIn('"url_name": "habits:habit_list"', logs.output[0])
+
+        rows = {row['url_name']: row for row in metrics_store.summary()}
+        self.assertEqual(rows['habits:habit_list']['count'], 1)
+        self.assertGreater(rows['habits:habit_list']['max_queries'], 0)
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM habits WHERE id = 12 AND name = 'a'"),
+            fingerprint("SELECT * FROM habits WHERE id = 7 AND name = 'b'"),
+        )
+        self.assertEqual(fingerprint('WHERE id IN (%s, %s)'), fingerprint('WHERE id IN (%s)'))
+
+    def test_repeated_queries_are_flagged(self):
+        for i in range(4):
+            Habit.objects.create(user=self.user, name=f'Habit {i}')
+
+        def view(request):
+            for habit in Habit.objects.all():
+                habit.completions.exists()
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        with self.assertLogs('wellnessapp.request_metrics', level='WARNING') as logs:
+            response = RequestMetricsMiddleware(view)(request)
+
+        self.assertIn('dup;desc="1 repeated queries"', response['Server-Timing'])
+        self.assertIn('"count": 4', logs.output[0])
+
+    def test_admin_dashboard_lists_views(self):
+        admin = User.objects.create_superuser(username='metrics_admin', password='pass12345')
+        self.client.force_login(admin)
+        with self.assertLogs('wellnessapp.request_metrics'):
+            self.client.get(reverse('habits:habit_list'))
+            response = self.client.get(reverse('dashboard:admin_dashboard'))
+        self.assertContains(response, 'habits:habit_list')
+
+
+class WellnessExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='exporter', password='pass12345')
+        cls.other = User.objects.create_user(username='someone_else', password='pass12345')
+        for user in (cls.user, cls.other):
+            habit = Habit.objects.create(user=user, name=f'{user.username} habit')
+            HabitCompletion.objects.create(habit=habit, completed_date=date(2026, 1, 5))
+            MoodEntry.objects.create(user=user, mood='happy', entry_date=date(2026, 1, 5))
+        Meal.objects.create(
+            user=cls.user, meal_type='lunch', food_name='Soup, "homemade"', portion='1 bowl',
+            calories=250, protein='12.5', meal_date=date(2026, 1, 5)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def download(self, **params):
+        response = self.client.get(reverse('profiles:data_export'), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_json_export(self):
+        response, body = self.download()
+        self.assertIn('attachment; filename="pulsewell-exporter-all-', response['Content-Disposition'])
+
+        data = json.loads(body)
+        self.assertEqual(data['user'], 'exporter')
+        self.assertEqual(data['datasets']['meals'][0]['protein'], 12.5)
+        self.assertEqual(data['datasets']['habit_completions'][0]['habit_name'], 'exporter habit')
+        self.assertEqual(len(data['datasets']['mood_entries']), 1)
+        self.assertEqual(data['datasets']['challenge_check_ins'], [])
+
+    def test_csv_export_gzipped(self):
+        response, body = self.download(format='csv', dataset='meals', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+
+        rows = list(csv.DictReader(StringIO(gzip.decompress(body).decode('utf-8'))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['food_name'], 'Soup, "homemade"')
+        self.assertEqual(rows[0]['meal_date'], '2026-01-05')
+
+    def test_invalid_requests(self):
+        url = reverse('profiles:data_export')
+        self.assertEqual(self.client.get(url, {'format': 'csv'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'dataset': 'passwords'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code, 400)
+
+    def test_sharded_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                'export_wellness_data', directory, shards=2, format='jsonl', gzip=True,
+                dataset=['habits', 'mood_entries'], stdout=StringIO()
+            )
+            manifest = json.loads((Path(directory) / 'manifest.json').read_text())
+            self.assertEqual(set(manifest['datasets']), {'habits', 'mood_entries'})
+            self.assertEqual(manifest['datasets']['habits']['rows'], 2)
+
+            for entry in manifest['datasets']['habits']['files']:
+                with gzip.open(Path(directory) / entry['path'], 'rt') as handle:
+                    records = [json.loads(line) for line in handle]
+                self.assertEqual(len(records), entry['rows'])
+                shard = int(re.search(r'part-(\d+)', entry['path']).group(1))
+                self.assertTrue(all(record['user_id'] % 2 == shard for record in records))
+
+
+class WellnessImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='importer', password='pass12345')
+        cls.challenge = Challenge.objects.create(
+            title='Walk Daily', slug='walk-daily', description='Walk', short_description='Walk',
+            duration_days=30, daily_requirement='Walk 30 minutes'
+        )
+        cls.user_challenge = UserChallenge.objects.create(
+            user=cls.user, challenge=cls.challenge, start_date=date(2026, 3, 1)
+        )
+
+    def run_import(self, kind, content, file_format='csv', **kwargs):
+        return run_import(self.user, kind, BytesIO(content.encode('utf-8')), file_format, **kwargs)
+
+    def test_habit_completions_recompute_streaks(self):
+        content = (
+            'habit_name,completed_date,notes\n'
+            'Stretch,2026-03-01,\n'
+            'Stretch,2026-03-02,felt good\n'
+            'Stretch,2026-03-03,\n'
+            'Stretch,2026-03-03,duplicate in file\n'
+            'Stretch,not a date,\n'
+        )
+        updates = []
+        result = self.run_import('habit_completions', content, batch_size=2, progress=updates.append)
+
+        self.assertEqual((result.processed, result.created, result.duplicates), (5, 3, 1))
+        self.assertEqual(result.errors[0]['line'], 6)
+        self.assertTrue(updates and updates[-1].done)
+
+        habit = Habit.objects.get(user=self.user, name='Stretch')
+        self.assertEqual((habit.total_completions, habit.longest_streak), (3, 3))
+        self.assertEqual(habit.last_completed_date, date(2026, 3, 3))
+
+        # Importing the same file again adds nothing
+        again = self.run_import('habit_completions', content)
+        self.assertEqual((again.created, again.duplicates), (0, 4))
+        self.assertEqual(HabitCompletion.objects.filter(habit=habit).count(), 3)
+
+    def test_json_lines_meals_and_mood(self):
+        meals = (
+            '{"meal_date": "2026-03-01", "meal_type": "lunch", "food_name": "Soup", "calories": 250, "protein": 12.5}\n'
+            '{"meal_date": "2026-03-01", "meal_type": "dinner", "food_name": "Rice", "calories": 400}\n'
+            '{"meal_date": "2026-03-01", "meal_type": "brunch", "food_name": "Eggs", "calories": 300}\n'
+        )
+        result = self.run_import('meals', meals, file_format='json')
+        self.assertEqual((result.created, result.error_count), (2, 1))
+        total = DailyNutritionTotal.objects.get(user=self.user, date=date(2026, 3, 1))
+        self.assertEqual((total.meal_count, total.calories), (2, 650))
+
+        moods = '[{"entry_date": "2026-03-01", "mood": "happy"},\n {"entry_date": "2026-03-02", "mood": "calm"}]'
+        result = self.run_import('mood_entries', moods, file_format='json', batch_size=1)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(MoodEntry.objects.filter(user=self.user).count(), 2)
+
+    def test_check_ins_update_challenge_progress(self):
+        content = (
+            'challenge_id,date,completed,mood\n'
+            f'{self.challenge.pk},2026-03-01,true,normal\n'
+            f'{self.challenge.pk},2026-03-02,yes,\n'
+            f'{self.challenge.pk},2026-06-01,true,\n'
+        )
+        result = self.run_import('challenge_check_ins', content)
+        self.assertEqual(result.created, 2)
+        self.assertIn('Not taking part', result.errors[0]['error'])
+
+        self.user_challenge.refresh_from_db()
+        self.assertEqual(self.user_challenge.days_completed, 2)
+        self.assertEqual(self.user_challenge.longest_streak, 2)
+        self.assertEqual(DailyCheckIn.objects.filter(user_challenge=self.user_challenge).count(), 2)
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        upload = BytesIO(b'habit_name,completed_date\nRead,2026-03-01\n')
+        upload.name = 'habits.csv'
+        response = self.client.post(reverse('profiles:data_import'), {'kind': 'habit_completions', 'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertContains(response, 'Imported 1 rows.')
+
+    def test_upload_view_rejects_large_files(self):
+        self.client.force_login(self.user)
+        upload = BytesIO(b'habit_name,completed_date\n' + b'Read,2026-03-01\n' * (MAX_WEB_IMPORT_SIZE // 16 + 1))
+        upload.name = 'habits.csv'
+        response = self.client.post(reverse('profiles:data_import'), {'kind': 'habit_completions', 'file': upload})
+        self.assertIsNone(response.context['result'])
+        self.assertIn('too big to import here', response.context['form'].errors['file'][0])
+        self.assertFalse(HabitCompletion.objects.filter(habit__user=self.user).exists())
+
+
+class MonthCalendarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='calendar', password='pass12345')
+        cls.habit = Habit.objects.create(user=cls.user, name='Read')
+        cls.challenge = Challenge.objects.create(
+            title='Hydrate', slug='hydrate', description='Drink', short_description='Drink',
+            duration_days=90, daily_requirement='Drink 2 litres'
+        )
+
+    def test_grid(self):
+        HabitCompletion.objects.create(habit=self.habit, completed_date=date(2026, 2, 10))
+        HabitCompletion.objects.create(habit=self.habit, completed_date=date(2026, 3, 1))
+
+        with self.assertNumQueries(1):
+            calendar = MonthCalendar(self.habit.completions.all(), 'completed_date', date(2026, 2, 14), today=date(2026, 2, 20))
+            weeks = calendar.weeks
+
+        # February 2026 starts on a Sunday and has 28 days
+        self.assertEqual(len(weeks), 5)
+        self.assertEqual(weeks[0][:6], [None] * 6)
+        days = [day for week in weeks for day in week if day]
+        self.assertEqual(len(days), 28)
+        self.assertEqual([day['day'] for day in days if day['completed']], [10])
+        self.assertTrue(days[25]['is_future'])
+        self.assertEqual(calendar.previous_month, date(2026, 1, 1))
+        self.assertIsNone(calendar.next_month)
+
+    def test_challenge_detail_month_navigation(self):
+        today = date.today()
+        start = add_months(today.replace(day=1), -1)
+        user_challenge = UserChallenge.objects.create(user=self.user, challenge=self.challenge, start_date=start)
+        for offset in range(20):
+            DailyCheckIn.objects.create(
+                user_challenge=user_challenge, date=start + timedelta(days=offset),
+                completed=offset % 3 != 0, mood='motivated'
+            )
+        self.client.force_login(self.user)
+        url = reverse('challenges:my_challenge', args=[user_challenge.pk])
+
+        # Session, user, participation, the month's check-ins and the today lookup
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {'month': start.strftime('%Y-%m')})
+        calendar = response.context['calendar']
+        self.assertEqual(calendar.month, start)
+        self.assertIsNone(calendar.previous_month)
+        self.assertEqual(calendar.completed_count, 13)
+        self.assertEqual(calendar.entries[start].mood, 'motivated')
+        self.assertContains(response, 'Mood: 💪 Motivated')
+
+        # Months before the challenge fall back to its first month
+        response = self.client.get(url, {'month': '2001-01'})
+        self.assertEqual(response.context['calendar'].month, start)
+
+    def test_habit_detail(self):
+        HabitCompletion.objects.create(habit=self.habit, completed_date=date.today())
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('habits:habit_detail', args=[self.habit.pk]))
+        calendar = response.context['calendar']
+        self.assertEqual(calendar.month, date.today().replace(day=1))
+        self.assertEqual(calendar.completed_count, 1)
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='seeker', password='pass12345')
+        cls.other = User.objects.create_user(username='snoop', password='pass12345')
+
+    def make_challenge(self, title, description, requirement='Do it daily'):
+        return Challenge.objects.create(
+            title=title, slug=title.lower().replace(' ', '-'), description=description,
+            short_description=description[:50], duration_days=7, daily_requirement=requirement,
+        )
+
+    def test_ranked_and_kept_in_sync(self):
+        body = self.make_challenge('Daily Steps', 'Build a walking habit', requirement='Walk 8000 steps')
+        title = self.make_challenge('Walking Week', 'Get outside every day')
+        self.make_challenge('Plank Month', 'Core strength')
+
+        # Title matches rank first, stemming matches "walk" to "walking"
+        results = search('challenge', 'walk')
+        self.assertEqual(results.ids, [title.pk, body.pk])
+        self.assertIn('<mark>', results.snippets[body.pk])
+
+        # As-you-type prefix on the last word
+        self.assertEqual(search('challenge', 'plank mon').ids, [Challenge.objects.get(title='Plank Month').pk])
+
+        title.title = 'Outdoor Week'
+        title.save()
+        self.assertEqual(search('challenge', 'walk').ids, [body.pk])
+
+        # Counter updates do not touch the document
+        fresh = Challenge.objects.get(pk=body.pk)
+        with self.assertNumQueries(1):
+            fresh.save(update_fields=['participant_count'])
+
+        body.delete()
+        self.assertEqual(len(search('challenge', 'walk')), 0)
+        self.assertFalse(SearchDocument.objects.filter(kind='challenge', object_id=body.pk).exists())
+
+    def test_snippets_are_escaped(self):
+        entry = JournalEntry.objects.create(user=self.user, title='Notes', content='Felt <b>calm</b> after yoga')
+        # FTS syntax in the query is dropped rather than raising
+        snippet = search('journal', 'calm" *(', owner=self.user).snippets[entry.pk]
+        self.assertIn('&lt;b&gt;<mark>calm</mark>&lt;/b&gt;', snippet)
+
+    def test_journal_search_is_private(self):
+        mine = JournalEntry.objects.create(user=self.user, title='Morning run', content='Ran by the river')
+        JournalEntry.objects.create(user=self.other, title='River walk', content='Quiet river')
+
+        with self.assertRaises(ValueError):
+            search('journal', 'river')
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('journal:journal_search'), {'q': 'river'})
+        self.assertEqual([entry.pk for entry in response.context['entries']], [mine.pk])
+        self.assertContains(response, '<mark>river</mark>')
+
+    def test_explore_and_article_list(self):
+        self.make_challenge('Hydration', 'Drink more water')
+        self.make_challenge('Sleep Early', 'Bed by ten')
+        Article.objects.create(title='Sleep hygiene', content='Keep a cool, dark room', author=self.user)
+        Article.objects.create(title='Snacks', content='Fruit helps you sleep? Not really', author=self.user)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('challenges:explore'), {'search': 'water'})
+        self.assertEqual([challenge.title for challenge in response.context['page_obj']], ['Hydration'])
+        self.assertContains(response, '<mark>water</mark>')
+
+        response = self.client.get(reverse('blog:article_list'), {'search': 'sleep'})
+        self.assertEqual([article.title for article in response.context['articles']], ['Sleep hygiene', 'Snacks'])
+
+    def test_rebuild_command_and_fallback(self):
+        entry = JournalEntry.objects.create(user=self.user, title='Gratitude', content='Thankful for friends and tea')
+        SearchDocument.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_search_index', '--kind', 'journal', stdout=out)
+        self.assertIn('Indexed 1 document(s)', out.getvalue())
+        self.assertEqual(search('journal', 'friend', owner=self.user).ids, [entry.pk])
+
+        hits = FallbackSearchBackend().search('journal', ['tea'], self.user.pk, 10)
+        self.assertEqual(hits, [(entry.pk, 'Thankful for friends and \x02tea\x03')])
+
+
+class MarkdownCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache = caches[CACHE_ALIAS]
+        self.cache.clear()
+
+    def test_cache_hit(self):
+        with patch('wellnessapp.markdown_cache.convert_markdown', wraps=convert_markdown) as convert:
+            first = render_markdown('**bold**')
+            second = render_markdown('**bold**')
+        self.assertEqual(first, second)
+        self.assertIn('<strong>bold</strong>', first)
+        self.assertEqual(convert.call_count, 1)
+
+    def test_article_render_and_invalidation(self):
+        author = User.objects.create_user(username='writer', password='pass12345')
+        article = Article.objects.create(title='Sleep', content='# Sleep well', author=author)
+        # Rendered when created, so the first reader hits the cache
+        self.assertIn('<h1>Sleep well</h1>', self.cache.get(get_cache_key('# Sleep well')))
+
+        article.content = '# Sleep better'
+        article.save()
+        self.assertIsNone(self.cache.get(get_cache_key('# Sleep well')))
+        self.assertIn('<h1>Sleep better</h1>', self.cache.get(get_cache_key('# Sleep better')))
+
+    def test_converter_reused_and_reset(self):
+        converter = get_converter()
+        html = convert_markdown('[home][site]\n\n[site]: https://example.com')
+        self.assertIn('href="https://example.com"', html)
+
+        # Same converter, but the link definition from the last document is gone
+        self.assertIs(get_converter(), converter)
+        self.assertNotIn('href', convert_markdown('[home][site]'))